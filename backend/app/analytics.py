@@ -0,0 +1,412 @@
+# backend/app/analytics.py
+# Multi-dimensional pivots over TimeEntry for /reports/pivot. The matching entries are
+# loaded as integer columns (user, project, issue, day number, minutes) and grouped by
+# any row/column dimensions with totals and percentiles of the entry durations.
+# Archived entries (app/archive.py) are read as Arrow columns and appended.
+# With NumPy (in requirements.txt) everything is computed on arrays; an install
+# without it gets the same result from plain dict/list loops.
+import itertools
+import math
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import sqlalchemy as sa
+from sqlmodel import func, select
+
+from . import archive
+from .models import Issue, IssueLabel, Project, TimeEntry, User
+from .queries import issue_filters
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the plain-Python path below stands in
+    np = None
+
+DIMENSIONS = ("user", "project", "issue", "label", "assignee", "day", "week", "month", "year")
+STATS = ("sum", "count", "mean", "min", "max")
+DEFAULT_STATS = ("sum", "count")
+MAX_PIVOT_CELLS = 100_000
+LOAD_BATCH = 50_000
+ARCHIVE_COLUMNS = ["user_id", "project_id", "issue_id", "date", "duration_minutes"]
+NO_LABEL, UNASSIGNED = "(none)", "(unassigned)"
+EPOCH = date(1970, 1, 1)
+_PERCENTILE = re.compile(r"p([1-9][0-9]?)$")
+
+
+def parse_spec(rows: Optional[str], columns: Optional[str], stats: Optional[str]):
+    """(row dims, column dims, stats) from comma-separated query values; raises ValueError."""
+    def split(value):
+        return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+    row_dims, col_dims = split(rows), split(columns)
+    dims = row_dims + col_dims
+    unknown = [d for d in dims if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown dimension(s): {', '.join(unknown)}; use {', '.join(DIMENSIONS)}")
+    if len(set(dims)) != len(dims):
+        raise ValueError("a dimension can only be used once")
+    wanted = split(stats) or list(DEFAULT_STATS)
+    bad = [s for s in wanted if s not in STATS and not _PERCENTILE.match(s)]
+    if bad:
+        raise ValueError(f"unknown stat(s): {', '.join(bad)}; use {', '.join(STATS)} or p1..p99")
+    return row_dims, col_dims, wanted
+
+
+def day_number(dialect: str):
+    """SQL for TimeEntry.date as days since 1970-01-01, or None to convert in Python."""
+    if dialect == "sqlite":
+        return sa.cast(func.julianday(TimeEntry.date) - 2440587.5, sa.Integer)
+    if dialect == "postgresql":
+        return sa.cast(TimeEntry.date - sa.literal(EPOCH), sa.Integer)
+    return None
+
+
+def entries_stmt(dialect: str, start: date, end: date, project_id=None, user_id=None, label=None, assignee=None):
+    day = day_number(dialect)
+    stmt = select(
+        TimeEntry.user_id, TimeEntry.project_id, TimeEntry.issue_id,
+        day if day is not None else TimeEntry.date, TimeEntry.duration_minutes,
+    ).where(TimeEntry.date >= start, TimeEntry.date < end)
+    if project_id:
+        stmt = stmt.where(TimeEntry.project_id == project_id)
+    if user_id:
+        stmt = stmt.where(TimeEntry.user_id == user_id)
+    if label or assignee:
+        stmt = issue_filters(stmt.where(TimeEntry.issue_id == Issue.id), label, assignee)
+    return stmt, day is not None
+
+
+def load_entries(session, start: date, end: date, *filters):
+    """Rows of (user_id, project_id, issue_id, day number, minutes): an (n, 5) array, or a list without NumPy."""
+    stmt, in_sql = entries_stmt(session.get_bind().dialect.name, start, end, *filters)
+    result = session.connection().execute(stmt)
+    if in_sql:
+        # all five columns are plain integers, so read the DBAPI tuples directly
+        # instead of paying for a Row object per entry
+        batches = iter(lambda: result.cursor.fetchmany(LOAD_BATCH), [])
+    else:
+        offset = EPOCH.toordinal()
+        batches = (
+            [(u, p, i, d.toordinal() - offset, m) for u, p, i, d, m in part]
+            for part in result.partitions(LOAD_BATCH)
+        )
+    try:
+        if np is None:
+            rows = [row for batch in batches for row in batch]
+            for cols in archived_entries(start, end, *filters):
+                rows += zip(*(c.to_pylist() for c in cols))
+            return rows
+        parts = [
+            np.fromiter(itertools.chain.from_iterable(b), dtype=np.int64, count=len(b) * 5).reshape(-1, 5)
+            for b in batches
+        ]
+    finally:
+        result.close()
+    parts += [np.column_stack([c.to_numpy() for c in cols]) for cols in archived_entries(start, end, *filters)]
+    return np.concatenate(parts) if parts else np.empty((0, 5), dtype=np.int64)
+
+
+def archived_entries(start: date, end: date, *filters):
+    """load_entries' columns for the archived entries, as five int64 Arrow columns per month."""
+    for table in archive.tables(ARCHIVE_COLUMNS, start, end, *filters):
+        # date32 is already a day number since 1970-01-01
+        yield [table[c].cast("int32").cast("int64") if c == "date" else table[c] for c in ARCHIVE_COLUMNS]
+
+
+class Lookups:
+    """Names behind the integer codes of each dimension, loaded only for the dimensions in use."""
+
+    def __init__(self, session, dims: List[str]):
+        self.users = dict(session.exec(select(User.id, User.username)).all()) if "user" in dims else {}
+        self.projects = dict(session.exec(select(Project.id, Project.name)).all()) if "project" in dims else {}
+        self.issues = dict(session.exec(select(Issue.id, Issue.title)).all()) if "issue" in dims else {}
+        # label / assignee codes index these lists; 0 is "(none)" / "(unassigned)"
+        self.labels, self.issue_labels = [NO_LABEL], {}
+        if "label" in dims:
+            rows = session.exec(select(IssueLabel.issue_id, IssueLabel.name)).all()
+            self.labels += sorted({name for _, name in rows})
+            index = {name: i for i, name in enumerate(self.labels)}
+            for issue_id, name in rows:
+                self.issue_labels.setdefault(issue_id, []).append(index[name])
+        self.assignees, self.issue_assignee = [UNASSIGNED], {}
+        if "assignee" in dims:
+            rows = session.exec(select(Issue.id, Issue.assignee)).all()
+            self.assignees += sorted({a for _, a in rows if a})
+            index = {name: i for i, name in enumerate(self.assignees)}
+            self.issue_assignee = {issue_id: index[a] for issue_id, a in rows if a}
+
+    def name(self, dim: str, code: int) -> str:
+        if dim == "user":
+            return self.users.get(code, str(code))
+        if dim == "project":
+            return self.projects.get(code, str(code))
+        if dim == "issue":
+            return self.issues.get(code, str(code))
+        if dim == "label":
+            return self.labels[code]
+        if dim == "assignee":
+            return self.assignees[code]
+        if dim in ("day", "week"):
+            return date.fromordinal(EPOCH.toordinal() + code).isoformat()
+        if dim == "month":
+            return f"{1970 + code // 12}-{code % 12 + 1:02d}"
+        return str(code)
+
+
+def _week(day: int) -> int:
+    # 1970-01-01 was a Thursday; weeks start on Monday like everywhere else
+    return day - (day + 3) % 7
+
+
+def _month(day: int) -> int:
+    d = EPOCH + timedelta(days=day)
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+def _percentile(sorted_values: list, p: float) -> float:
+    # linear interpolation between closest ranks, as numpy.percentile does by default
+    pos = (len(sorted_values) - 1) * p / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _python_stats(values: list, stats: List[str]) -> Dict:
+    out = {}
+    ordered = sorted(values) if any(s not in ("sum", "count", "mean") for s in stats) else values
+    for s in stats:
+        if s == "sum":
+            out[s] = sum(values)
+        elif s == "count":
+            out[s] = len(values)
+        elif not values:
+            out[s] = None
+        elif s == "mean":
+            out[s] = sum(values) / len(values)
+        elif s == "min":
+            out[s] = ordered[0]
+        elif s == "max":
+            out[s] = ordered[-1]
+        else:
+            out[s] = _percentile(ordered, int(s[1:]))
+    return out
+
+
+def _python_pivot(rows: list, lookups: Lookups, row_dims: List[str], col_dims: List[str], stats: List[str]):
+    def codes(dim, user, project, issue, day):
+        if dim == "user":
+            return (user,)
+        if dim == "project":
+            return (project,)
+        if dim == "issue":
+            return (issue,)
+        if dim == "label":
+            return lookups.issue_labels.get(issue) or (0,)
+        if dim == "assignee":
+            return (lookups.issue_assignee.get(issue, 0),)
+        if dim == "day":
+            return (day,)
+        if dim == "week":
+            return (_week(day),)
+        if dim == "month":
+            return (_month(day),)
+        return ((EPOCH + timedelta(days=day)).year,)
+
+    cells, by_row, by_col, everything = {}, {}, {}, []
+    dims = row_dims + col_dims
+    for user, project, issue, day, minutes in rows:
+        everything.append(minutes)
+        for key in itertools.product(*(codes(d, user, project, issue, day) for d in dims)):
+            r, c = key[:len(row_dims)], key[len(row_dims):]
+            cells.setdefault((r, c), []).append(minutes)
+            by_row.setdefault(r, []).append(minutes)
+            by_col.setdefault(c, []).append(minutes)
+    row_keys = sorted(by_row) if row_dims else [()]
+    col_keys = sorted(by_col) if col_dims else [()]
+    if len(row_keys) * len(col_keys) > MAX_PIVOT_CELLS:
+        raise ValueError(f"pivot would have more than {MAX_PIVOT_CELLS} cells")
+    empty = _python_stats([], stats)
+    grid = [[_python_stats(cells[(r, c)], stats) if (r, c) in cells else empty for c in col_keys] for r in row_keys]
+    row_totals = [_python_stats(by_row.get(r, []), stats) for r in row_keys]
+    col_totals = [_python_stats(by_col.get(c, []), stats) for c in col_keys]
+    return {
+        "row_keys": row_keys,
+        "column_keys": col_keys,
+        "cells": {s: [[cell[s] for cell in line] for line in grid] for s in stats},
+        "row_totals": {s: [t[s] for t in row_totals] for s in stats},
+        "column_totals": {s: [t[s] for t in col_totals] for s in stats},
+        "total": _python_stats(everything, stats),
+    }
+
+
+def _numpy_codes(dim: str, data, lookups: Lookups):
+    user, project, issue, day = data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+    if dim == "user":
+        return user
+    if dim == "project":
+        return project
+    if dim == "issue":
+        return issue
+    if dim == "assignee":
+        table = np.zeros(int(issue.max(initial=0)) + 1, dtype=np.int64)
+        for issue_id, code in lookups.issue_assignee.items():
+            if issue_id < len(table):
+                table[issue_id] = code
+        return table[issue]
+    if dim == "day":
+        return day
+    if dim == "week":
+        return day - (day + 3) % 7
+    months = day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return months if dim == "month" else 1970 + months // 12
+
+
+def _explode_labels(data, lookups: Lookups):
+    """Repeat each entry once per label of its issue; returns (entries, label codes)."""
+    size = int(data[:, 2].max(initial=0)) + 1
+    pairs = [(i, c) for i, codes in lookups.issue_labels.items() if i < size for c in codes]
+    issues = np.array([i for i, _ in pairs], dtype=np.int64)
+    codes = np.array([c for _, c in pairs], dtype=np.int64)
+    # issues without labels get the single label code 0 ("(none)")
+    counts = np.bincount(issues, minlength=size)
+    bare = np.flatnonzero(counts == 0)
+    issues, codes = np.concatenate([issues, bare]), np.concatenate([codes, np.zeros(len(bare), dtype=np.int64)])
+    order = np.argsort(issues, kind="stable")
+    codes = codes[order]
+    counts = np.bincount(issues, minlength=size)
+    offsets = np.cumsum(counts) - counts
+
+    per_entry = counts[data[:, 2]]
+    rep = np.repeat(np.arange(len(data)), per_entry)
+    within = np.arange(len(rep)) - np.repeat(np.cumsum(per_entry) - per_entry, per_entry)
+    return data[rep], codes[offsets[data[rep, 2]] + within]
+
+
+def _sorted_by_group(groups, size: int, values):
+    """`values` ordered by (group, value)."""
+    low = int(values.min(initial=0))
+    span = int(values.max(initial=0)) - low + 1
+    if size * span < 2 ** 62:
+        # one sort over a combined integer key beats a two-key lexsort by far
+        return np.sort(groups * span + (values - low)) % span + low
+    return values[np.lexsort((values, groups))]
+
+
+def _numpy_stats(groups, size: int, values, stats: List[str]) -> Dict:
+    """Per-group stats for group ids `groups` in [0, size); NaN where a group is empty."""
+    count = np.bincount(groups, minlength=size)
+    total = np.bincount(groups, weights=values, minlength=size)
+    out = {}
+    ordered = starts = None
+    for s in stats:
+        if s == "sum":
+            out[s] = total
+        elif s == "count":
+            out[s] = count
+        elif s == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[s] = total / count
+        else:
+            if ordered is None:
+                ordered = _sorted_by_group(groups, size, values).astype(np.float64)
+                ordered = np.append(ordered, np.nan)  # reads for empty groups land here
+                starts = np.cumsum(count) - count
+            empty = count == 0
+            if s == "min":
+                pos_lo = pos_hi = np.where(empty, len(ordered) - 1, starts)
+                frac = 0.0
+            else:
+                last = starts + count - 1
+                if s == "max":
+                    pos = last.astype(np.float64)
+                else:
+                    pos = starts + (count - 1) * (int(s[1:]) / 100)
+                pos_lo = np.where(empty, len(ordered) - 1, np.floor(pos).astype(np.int64))
+                pos_hi = np.where(empty, len(ordered) - 1, np.ceil(pos).astype(np.int64))
+                frac = pos - np.floor(pos)
+            lo, hi = ordered[pos_lo], ordered[pos_hi]
+            out[s] = lo + (hi - lo) * frac
+    return out
+
+
+def _numpy_pivot(data, lookups: Lookups, row_dims: List[str], col_dims: List[str], stats: List[str]):
+    dims = row_dims + col_dims
+    labels = None
+    if "label" in dims:
+        data, labels = _explode_labels(data, lookups)
+    values = data[:, 4]
+
+    def composite(group_dims):
+        # dense code per dimension, combined into one id per distinct key tuple
+        if not group_dims:
+            return np.zeros(len(data), dtype=np.int64), [()]
+        uniques, inverses = [], []
+        for d in group_dims:
+            codes = labels if d == "label" else _numpy_codes(d, data, lookups)
+            u, inv = np.unique(codes, return_inverse=True)
+            uniques.append(u)
+            inverses.append(inv.reshape(-1))
+        keys, groups = np.unique(
+            np.ravel_multi_index(inverses, [len(u) for u in uniques]), return_inverse=True
+        )
+        parts = np.unravel_index(keys, [len(u) for u in uniques])
+        key_tuples = list(zip(*(u[p].tolist() for u, p in zip(uniques, parts))))
+        return groups.reshape(-1), key_tuples
+
+    row_groups, row_keys = composite(row_dims)
+    col_groups, col_keys = composite(col_dims)
+    n_rows, n_cols = len(row_keys), len(col_keys)
+    if n_rows * n_cols > MAX_PIVOT_CELLS:
+        raise ValueError(f"pivot would have more than {MAX_PIVOT_CELLS} cells")
+    cells = _numpy_stats(row_groups * n_cols + col_groups, n_rows * n_cols, values, stats)
+    row_totals = _numpy_stats(row_groups, n_rows, values, stats)
+    col_totals = _numpy_stats(col_groups, n_cols, values, stats)
+    return {
+        "row_keys": row_keys,
+        "column_keys": col_keys,
+        "cells": {s: v.reshape(n_rows, n_cols).tolist() for s, v in cells.items()},
+        "row_totals": {s: v.tolist() for s, v in row_totals.items()},
+        "column_totals": {s: v.tolist() for s, v in col_totals.items()},
+        "total": None,
+    }
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, float):
+        value = round(value, 2)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def pivot(session, start: date, end: date, row_dims: List[str], col_dims: List[str], stats: List[str],
+          project_id=None, user_id=None, label=None, assignee=None) -> Dict:
+    """Pivot of entry minutes in [start, end) by `row_dims` x `col_dims`; raises ValueError if too large.
+
+    With `label` in the spec an entry counts once per label of its issue in the cells and
+    row/column totals; the grand `total` counts every entry once.
+    """
+    filters = (project_id, user_id, label, assignee)
+    lookups = Lookups(session, row_dims + col_dims)
+    data = load_entries(session, start, end, *filters)
+    if np is not None:
+        result = _numpy_pivot(data, lookups, row_dims, col_dims, stats)
+        total = _numpy_stats(np.zeros(len(data), dtype=np.int64), 1, data[:, 4], stats)
+        result["total"] = {s: v[0].item() for s, v in total.items()}
+    else:
+        result = _python_pivot(data, lookups, row_dims, col_dims, stats)
+    return {
+        "start": start.isoformat(),
+        "end": (end - timedelta(days=1)).isoformat(),
+        "rows": row_dims,
+        "columns": col_dims,
+        "stats": stats,
+        "row_keys": [[lookups.name(d, c) for d, c in zip(row_dims, key)] for key in result["row_keys"]],
+        "column_keys": [[lookups.name(d, c) for d, c in zip(col_dims, key)] for key in result["column_keys"]],
+        "cells": {s: [[_clean(v) for v in line] for line in m] for s, m in result["cells"].items()},
+        "row_totals": {s: [_clean(v) for v in t] for s, t in result["row_totals"].items()},
+        "column_totals": {s: [_clean(v) for v in t] for s, t in result["column_totals"].items()},
+        "total": {s: _clean(v) for s, v in result["total"].items()},
+        "engine": "numpy" if np is not None else "python",
+    }
@@ -0,0 +1,308 @@
+# backend/app/archive.py
+# Cold storage for old time entries. `run(cutoff)` moves every TimeEntry dated before
+# the cutoff into zstd-compressed Parquet files partitioned by month
+# (ARCHIVE_DIR/month=YYYY-MM/part-*.parquet) and deletes it from the table. The
+# DailyRollup cells stay where they are, so the rollup-based reports don't change.
+# Whatever lists individual entries (time log, exports, PDFs, pivots) merges the hot
+# rows with entries()/tables(), which open only the months a range touches, read
+# them memory-mapped and fetch only the columns asked for.
+#
+# Archived entries are read-only. A month is archived with DELETE ... RETURNING,
+# the file is written and renamed into place, then the delete commits; if the
+# process dies in between, the next run finds those rows already in the archive
+# and only deletes them.
+#
+# pyarrow is in requirements.txt; an install without it can't archive (the
+# scheduler then leaves ARCHIVE_AFTER_DAYS off), and an empty archive needs no reading.
+#
+#   cd backend && python -m app.archive --before 2024-01-01
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import delete
+from sqlmodel import func, select
+
+from . import metrics
+from .database import get_session
+from .models import Issue, Project, TimeEntry, User
+from .queries import issue_filters
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - checked by available()
+    pa = None
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archive")
+# entries older than this many days are archived by the scheduler; 0 turns it off
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "86400"))
+ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "9"))
+LOOKUP_CHUNK = 5000
+
+COLUMNS = ["id", "date", "user_id", "project_id", "issue_id", "duration_minutes", "notes", "created_at"]
+# names entries() can return besides COLUMNS, resolved from the current rows they refer to
+NAMES = {"issue_title": "issue_id", "user": "user_id", "project": "project_id"}
+
+log = logging.getLogger("app.archive")
+_datasets: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("user_id", pa.int64()),
+        ("project_id", pa.int64()),
+        ("issue_id", pa.int64()),
+        ("duration_minutes", pa.int64()),
+        ("notes", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError("the time entry archive needs pyarrow (pip install pyarrow)")
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _month_dir(month: date) -> str:
+    return os.path.join(ARCHIVE_DIR, f"month={month:%Y-%m}")
+
+
+def months(start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+    """First days of the archived months that overlap [start, end), oldest first."""
+    try:
+        names = os.listdir(ARCHIVE_DIR)
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in names:
+        if not name.startswith("month="):
+            continue
+        month = date.fromisoformat(name[len("month="):] + "-01")
+        if (start is None or _next_month(month) > start) and (end is None or month < end):
+            found.append(month)
+    return sorted(found)
+
+
+def has_entries(start: Optional[date] = None, end: Optional[date] = None) -> bool:
+    return bool(months(start, end))
+
+
+def _dataset(month: date):
+    """The month's Parquet files as one memory-mapped dataset, reopened only when its files change."""
+    path = _month_dir(month)
+    files = tuple(sorted(
+        os.path.join(path, f) for f in os.listdir(path) if f.endswith(".parquet") and not f.startswith(".")
+    ))
+    with _lock:
+        cached = _datasets.get(path)
+        if cached is None or cached[0] != files:
+            fs = pyarrow.fs.LocalFileSystem(use_mmap=True)
+            cached = _datasets[path] = (files, ds.dataset(list(files), schema=_schema(), format="parquet", filesystem=fs))
+        return cached[1]
+
+
+def _issue_ids(label: Optional[str], assignee: Optional[str]) -> Optional[list]:
+    if not label and not assignee:
+        return None
+    with get_session() as session:
+        return list(session.exec(issue_filters(select(Issue.id), label, assignee)))
+
+
+def _filter(start, end, project_id, user_id, issue_ids, after):
+    expr = ds.scalar(True)
+    if start:
+        expr &= ds.field("date") >= start
+    if end:
+        expr &= ds.field("date") < end
+    if project_id:
+        expr &= ds.field("project_id") == project_id
+    if user_id:
+        expr &= ds.field("user_id") == user_id
+    if issue_ids is not None:
+        expr &= ds.field("issue_id").isin(issue_ids)
+    if after:
+        day, entry_id = after
+        expr &= (ds.field("date") > day) | ((ds.field("date") == day) & (ds.field("id") > entry_id))
+    return expr
+
+
+def tables(
+    columns: List[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    after: Optional[tuple] = None,
+) -> Iterator:
+    """Archived entries in [start, end) as one pyarrow Table per month, ordered by (date, id).
+
+    Only `columns` (plus date and id) are read. `after` is a (date, id) keyset
+    position like the /time-entries cursor.
+    """
+    # months before the cursor's can be skipped without opening them
+    lo = after[0] if after and (start is None or after[0] > start) else start
+    found = months(lo, end)
+    if not found:
+        return
+    _require()
+    expr = _filter(start, end, project_id, user_id, _issue_ids(label, assignee), after)
+    read = list(dict.fromkeys(list(columns) + ["date", "id"]))
+    for month in found:
+        table = _dataset(month).to_table(columns=read, filter=expr)
+        if table.num_rows:
+            yield table.sort_by([("date", "ascending"), ("id", "ascending")])
+
+
+def count(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+) -> int:
+    found = months(start, end)
+    if not found:
+        return 0
+    _require()
+    expr = _filter(start, end, project_id, user_id, _issue_ids(label, assignee), None)
+    return sum(_dataset(month).count_rows(filter=expr) for month in found)
+
+
+_NAME_COLUMNS = {"issue_title": (Issue, Issue.title), "user": (User, User.username), "project": (Project, Project.name)}
+
+
+def _lookup(session, name: str, ids, known: Dict[int, Optional[str]]) -> Dict[int, Optional[str]]:
+    """Add the `name` of each of `ids` to `known` (None for a missing row), querying only new ids."""
+    model, column = _NAME_COLUMNS[name]
+    missing = list(set(ids).difference(known))
+    for i in range(0, len(missing), LOOKUP_CHUNK):
+        chunk = missing[i:i + LOOKUP_CHUNK]
+        known.update(dict.fromkeys(chunk))
+        known.update(session.exec(select(model.id, column).where(model.id.in_(chunk))).all())
+    return known
+
+
+def entries(names: List[str], *args, **kwargs) -> Iterator[tuple]:
+    """Archived entries as tuples in `names` order, ordered by (date, id); takes tables()' filters.
+
+    `names` are COLUMNS or NAMES keys. Like the joins of the live queries, an entry
+    whose issue, user or project no longer exists is left out when its name is asked for.
+    """
+    lookups = {n: {} for n in names if n in NAMES}
+    columns = list(dict.fromkeys(NAMES.get(n, n) for n in names))
+    with get_session() as session:
+        for table in tables(columns, *args, **kwargs):
+            data = {c: table[c].to_pylist() for c in columns}
+            for n, known in lookups.items():
+                ids = data[NAMES[n]]
+                _lookup(session, n, ids, known)
+                data[n] = [known[i] for i in ids]
+            rows = zip(*(data[n] for n in names))
+            if lookups:
+                keep = [names.index(n) for n in lookups]
+                rows = (r for r in rows if all(r[i] is not None for i in keep))
+            yield from rows
+
+
+def _archived_keys(month: date) -> set:
+    """(id, created_at) of the entries already archived for `month`."""
+    if not os.path.isdir(_month_dir(month)):
+        return set()
+    table = _dataset(month).to_table(columns=["id", "created_at"])
+    return set(zip(table["id"].to_pylist(), table["created_at"].to_pylist()))
+
+
+def _write(month: date, rows: List[tuple]) -> str:
+    path = _month_dir(month)
+    os.makedirs(path, exist_ok=True)
+    name = f"part-{datetime.utcnow():%Y%m%dT%H%M%S%f}.parquet"
+    tmp = os.path.join(path, "." + name + ".tmp")
+    table = pa.Table.from_pylist([dict(zip(COLUMNS, r)) for r in rows], schema=_schema())
+    pq.write_table(table, tmp, compression="zstd", compression_level=ARCHIVE_COMPRESSION_LEVEL)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, name))
+    return name
+
+
+def run(cutoff: date) -> Dict:
+    """Move every entry dated before `cutoff` into the archive, a month at a time."""
+    _require()
+    t0 = time.perf_counter()
+    moved, files = 0, []
+    with get_session() as session:
+        first = session.exec(select(func.min(TimeEntry.date)).where(TimeEntry.date < cutoff)).one()
+        month = _month_start(first) if first else cutoff
+        while month < cutoff:
+            end = min(_next_month(month), cutoff)
+            rows = session.execute(
+                delete(TimeEntry)
+                .where(TimeEntry.date >= month, TimeEntry.date < end)
+                .returning(*(getattr(TimeEntry, c) for c in COLUMNS))
+            ).all()
+            if rows:
+                archived = _archived_keys(month)
+                new = sorted((tuple(r) for r in rows if (r.id, r.created_at) not in archived), key=lambda r: (r[1], r[0]))
+                if new:
+                    files.append(_write(month, new))
+                # the file is in place before the rows go, so nothing is ever in neither
+                session.commit()
+                moved += len(new)
+                log.info("archived %d entries of %s", len(new), f"{month:%Y-%m}")
+            month = _next_month(month)
+    seconds = time.perf_counter() - t0
+    metrics.inc("archive_entries_total", "Time entries moved to the archive.", value=moved)
+    metrics.observe("archive_run_seconds", "Wall time of one archive run.", seconds)
+    return {"cutoff": cutoff.isoformat(), "archived": moved, "files": len(files), "seconds": round(seconds, 3)}
+
+
+def due_cutoff(today: Optional[date] = None) -> date:
+    return (today or date.today()) - timedelta(days=ARCHIVE_AFTER_DAYS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old time entries into the Parquet archive.")
+    when = parser.add_mutually_exclusive_group()
+    when.add_argument("--before", type=date.fromisoformat, help="archive entries dated before YYYY-MM-DD")
+    when.add_argument("--older-than", type=int, help="archive entries older than this many days")
+    args = parser.parse_args(argv)
+    if args.before:
+        cutoff = args.before
+    elif args.older_than is not None:
+        cutoff = date.today() - timedelta(days=args.older_than)
+    elif ARCHIVE_AFTER_DAYS:
+        cutoff = due_cutoff()
+    else:
+        parser.error("give --before or --older-than (or set ARCHIVE_AFTER_DAYS)")
+    print(json.dumps(run(cutoff)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# backend/app/async_routers.py
+# Async versions of the hot endpoints (timer, time entries, reports), served from
+# `async_engine` when ASYNC_DB is enabled. main.py mounts this router ahead of
+# routers.api so these paths take precedence; everything else stays on the sync
+# handlers. Query building and response shaping are shared with routers.py.
+import json
+from datetime import timedelta
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import events, report_cache, rollup
+from .auth import SessionUser, session_user
+from .database import async_db_session
+from .models import Issue, TimeEntry, Timer
+from .reports import range_datasets, rollup_totals_stmt, weekly_datasets
+from .routers import (
+    MAX_PAGE_SIZE, archived_entries, cached_response, entry_event, new_entry, page, page_request,
+    parse_range, parse_week_start, running_timer_stmt, stopped_entry, time_entries_query, timer_payload,
+    timer_started_event,
+)
+
+api_async = APIRouter(prefix="/api")
+
+
+@api_async.get("/timer/status")
+async def timer_status(
+    user: SessionUser = Depends(session_user), session: AsyncSession = Depends(async_db_session)
+):
+    return timer_payload((await session.exec(running_timer_stmt(user.id))).first())
+
+
+@api_async.post("/issues/{issue_id}/timer/start")
+async def start_timer(
+    issue_id: int, user: SessionUser = Depends(session_user), session: AsyncSession = Depends(async_db_session)
+):
+    issue = await session.get(Issue, issue_id)
+    if not issue:
+        raise HTTPException(404, "Issue not found")
+    running = (await session.exec(
+        select(Timer).where(Timer.user_id == user.id, Timer.running)
+    )).all()
+    for t in running:
+        t.running = False
+    timer = Timer(user_id=user.id, project_id=issue.project_id, issue_id=issue.id, running=True)
+    session.add(timer)
+    await session.commit()
+    await run_in_threadpool(events.publish, user.id, "timer", timer_started_event(issue))
+    return {"timer_id": timer.id, "started": timer.start_ts.isoformat()}
+
+
+@api_async.post("/timer/stop")
+async def stop_timer(
+    payload: Dict = {}, user: SessionUser = Depends(session_user), session: AsyncSession = Depends(async_db_session)
+):
+    timer = (await session.exec(
+        select(Timer).where(Timer.user_id == user.id, Timer.running)
+    )).first()
+    if not timer:
+        raise HTTPException(400, "No running timer")
+    entry = stopped_entry(timer, payload)
+    session.add(entry)
+    await rollup.entry_added_async(session, entry)
+    await session.commit()
+    await run_in_threadpool(events.publish, user.id, "timer", {"running": False})
+    await run_in_threadpool(events.publish, user.id, "entry", entry_event(entry))
+    return {"stopped": True, "duration_minutes": entry.duration_minutes, "entry_id": entry.id}
+
+
+@api_async.post("/issues/{issue_id}/time-entries")
+async def add_time_entry(
+    issue_id: int,
+    payload: Dict,
+    user: SessionUser = Depends(session_user),
+    session: AsyncSession = Depends(async_db_session),
+):
+    issue = await session.get(Issue, issue_id)
+    if not issue:
+        raise HTTPException(404, "Issue not found")
+    entry = new_entry(user.id, issue, payload)
+    session.add(entry)
+    await rollup.entry_added_async(session, entry)
+    await session.commit()
+    await run_in_threadpool(events.publish, user.id, "entry", entry_event(entry))
+    return entry
+
+
+@api_async.get("/time-entries")
+async def list_time_entries(
+    week_start: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    paginate: Optional[bool] = None,
+    session: AsyncSession = Depends(async_db_session),
+):
+    paginate, limit = page_request(paginate, cursor, limit)
+    names, stmt, count = time_entries_query(week_start, project_id, user_id, label, assignee, fields, cursor)
+    archived = archived_entries(names, week_start, project_id, user_id, label, assignee, cursor)
+    if not paginate:
+        rows = (await session.exec(stmt)).all()
+        if archived:
+            # the archive is read from files, so off the event loop
+            return await run_in_threadpool(lambda: [dict(zip(names, row)) for row in archived.merge(rows)])
+        return [{n: row._mapping[n] for n in names} for row in rows]
+    total = (await session.exec(count)).scalar_one()
+    rows = (await session.exec(stmt.limit(limit + 1))).all()
+    if archived:
+        total += await run_in_threadpool(archived.count)
+        rows = await run_in_threadpool(archived.page_rows, rows, limit)
+    return page(rows, names, limit, total, ["date", "id"])
+
+
+@api_async.delete("/time-entries/{entry_id}")
+async def delete_time_entry(
+    entry_id: int, user: SessionUser = Depends(session_user), session: AsyncSession = Depends(async_db_session)
+):
+    entry = await session.get(TimeEntry, entry_id)
+    if not entry:
+        raise HTTPException(404, "Time entry not found")
+    if entry.user_id != user.id:
+        raise HTTPException(403, "Not allowed")
+    await rollup.entry_removed_async(session, entry)
+    await session.delete(entry)
+    await session.commit()
+    await run_in_threadpool(events.publish, user.id, "entry_deleted", {"id": entry_id})
+    return {"ok": True}
+
+
+@api_async.get("/reports/week")
+async def weekly_report(
+    request: Request,
+    week_start: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    session: AsyncSession = Depends(async_db_session),
+):
+    ws = parse_week_start(week_start)
+    filters = (project_id, user_id, label, assignee)
+
+    async def render():
+        rows = (await session.exec(rollup_totals_stmt(ws, ws + timedelta(days=7), *filters))).all()
+        return json.dumps(weekly_datasets(ws, rows), ensure_ascii=False).encode("utf-8")
+
+    version = tuple((await session.exec(report_cache.version_stmt(ws))).one())
+    report = await report_cache.get_or_render_async("json", ws, filters, version, render)
+    return cached_response(request, report, "application/json")
+
+
+@api_async.get("/reports/range")
+async def range_report(
+    start: str,
+    end: Optional[str] = None,
+    period: Optional[str] = None,
+    bucket: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    session: AsyncSession = Depends(async_db_session),
+):
+    s, e = parse_range(start, end, period)
+    if bucket not in (None, "day", "week", "month"):
+        raise HTTPException(400, "bucket must be day, week or month")
+    rows = (await session.exec(rollup_totals_stmt(s, e, project_id, user_id, label, assignee))).all()
+    return range_datasets(s, e, bucket, rows)
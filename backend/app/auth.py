@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import RedirectResponse
 from sqlmodel import select
-import os, httpx
+from typing import Optional
+import logging, os, httpx, secrets, time
+import jwt
 from .database import get_session
 from .models import User
 
 router = APIRouter()
+log = logging.getLogger(__name__)
 CLIENT_ID = os.getenv("GITHUB_OAUTH_CLIENT_ID")
 CLIENT_SECRET = os.getenv("GITHUB_OAUTH_CLIENT_SECRET")
 DOMAIN = os.getenv("DOMAIN")
@@ -13,17 +16,106 @@ DOMAIN = os.getenv("DOMAIN")
 # Only these GitHub usernames are allowed to log in
 ALLOWED_USERS = {"David-XY", "domi413"}
 
+# without APP_SECRET a key is generated once and kept in this file, so every worker
+# (and the next restart) signs with the same key; hosts sharing a database must set it
+APP_SECRET_FILE = os.getenv("APP_SECRET_FILE", "data/app_secret")
+# HS256 keys shorter than the hash, or copied from an example, let anyone forge sessions
+MIN_SECRET_BYTES = 32
+PLACEHOLDER_SECRETS = {
+    "x", "secret", "changeme", "change-me", "change_me", "replace-me", "your-secret",
+    "generate-a-long-random-string", "replace-with-a-long-random-string",
+}
+
+
+def load_secret(path: str) -> str:
+    """The key stored at `path`, created there first if missing.
+
+    Workers starting together may race to create it: each writes its own temp
+    file and links it into place, and the losers read the winner's key.
+    """
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(secrets.token_urlsafe(32))
+    try:
+        os.link(tmp, path)
+        log.warning("APP_SECRET not set; generated a key in %s", path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp)
+    with open(path) as f:
+        return f.read().strip()
+
+
+def check_secret(secret: str, source: str) -> str:
+    if len(secret.encode()) < MIN_SECRET_BYTES or secret.lower() in PLACEHOLDER_SECRETS:
+        raise RuntimeError(
+            f"{source} is a placeholder or shorter than {MIN_SECRET_BYTES} bytes; "
+            "set a long random string or leave APP_SECRET empty to generate one"
+        )
+    return secret
+
+
+if os.getenv("APP_SECRET"):
+    APP_SECRET = check_secret(os.getenv("APP_SECRET"), "APP_SECRET")
+else:
+    APP_SECRET = check_secret(load_secret(APP_SECRET_FILE), APP_SECRET_FILE)
+SESSION_COOKIE = "session"
+SESSION_TTL = int(os.getenv("SESSION_TTL_DAYS", "30")) * 86400
+
+
+class SessionUser:
+    """Identity carried by the signed session cookie; a verified token is all the endpoints need."""
+    __slots__ = ("id", "username")
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+
+def issue_token(user: User) -> str:
+    now = int(time.time())
+    claims = {"sub": str(user.id), "name": user.username, "iat": now, "exp": now + SESSION_TTL}
+    return jwt.encode(claims, APP_SECRET, algorithm="HS256")
+
+
+def read_token(token: str) -> Optional[SessionUser]:
+    try:
+        claims = jwt.decode(token, APP_SECRET, algorithms=["HS256"], options={"require": ["sub", "exp"]})
+        return SessionUser(int(claims["sub"]), claims.get("name", ""))
+    except (jwt.PyJWTError, ValueError):
+        return None
+
+
+def session_user(request: Request) -> SessionUser:
+    """Dependency: the signed-in user from the session cookie, without touching the DB."""
+    token = request.cookies.get(SESSION_COOKIE)
+    if not token:
+        raise HTTPException(status_code=401, detail="not authenticated")
+    principal = read_token(token)
+    if not principal:
+        raise HTTPException(status_code=401, detail="invalid session")
+    return principal
+
 
 @router.get("/auth/me")
 def me(request: Request):
-    uid = request.cookies.get("user_id")
-    if not uid:
+    token = request.cookies.get(SESSION_COOKIE)
+    principal = read_token(token) if token else None
+    if not principal:
         return {"user": None}
     with get_session() as session:
-        user = session.get(User, int(uid))
-        if not user or user.username not in ALLOWED_USERS:
-            return {"user": None}
-        return {"user": {"id": user.id, "username": user.username, "email": user.email}}
+        user = session.get(User, principal.id)
+    if not user or user.username not in ALLOWED_USERS:
+        return {"user": None}
+    return {"user": {"id": user.id, "username": user.username, "email": user.email}}
 
 
 @router.get("/auth/github/login")
@@ -71,5 +163,8 @@ async def github_callback(code: str, request: Request):
             session.refresh(user)
 
     resp = RedirectResponse(url=f"https://app.{DOMAIN}/")
-    resp.set_cookie("user_id", str(user.id), httponly=True, secure=True, samesite="lax")
+    resp.set_cookie(
+        SESSION_COOKIE, issue_token(user), max_age=SESSION_TTL, httponly=True, secure=True, samesite="lax"
+    )
+    resp.delete_cookie("user_id")
     return resp
@@ -0,0 +1,238 @@
+# backend/app/batch_reports.py
+# Batches of weekly PDF reports (every week of a range, optionally per user and/or
+# project) rendered in a process pool. The entries for the whole batch are fetched
+# with one query and split per PDF in the parent; only the drawing runs in the
+# workers. The zip carries a manifest.json with each PDF's render time.
+#
+#   cd backend && python -m app.batch_reports --start 2024-01-01 --period month --by user,project -o reports.zip
+import argparse
+import heapq
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlmodel import select
+
+from . import archive
+from .database import get_session
+from .models import Issue, Project, TimeEntry, User
+from .queries import issue_filters
+from .reports import PDF_YIELD_PER, period_end, render_pdf
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "0")) or os.cpu_count() or 1
+REPORT_BATCH_MAX_PDFS = int(os.getenv("REPORT_BATCH_MAX_PDFS", "2000"))
+SPLITS = ("user", "project")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared render pool, started on first use.
+
+    Workers are spawned rather than forked: the server process has live DB
+    connections and threads that a forked child must not inherit.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def parse_splits(by: Optional[str]) -> List[str]:
+    splits = [s.strip() for s in (by or "").split(",") if s.strip()]
+    unknown = [s for s in splits if s not in SPLITS]
+    if unknown:
+        raise ValueError(f"unknown split(s): {', '.join(unknown)}; use {', '.join(SPLITS)}")
+    return [s for s in SPLITS if s in splits]
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", name or "").strip("-").lower()[:40] or "x"
+
+
+def batch_rows(session, start: date, end: date, project_id=None, user_id=None, label=None, assignee=None):
+    """Every entry of the batch: the entry_rows columns plus user and project ids, archived ones included."""
+    stmt = (
+        select(TimeEntry.date, TimeEntry.duration_minutes, Issue.title, User.username, Project.name,
+               TimeEntry.user_id, TimeEntry.project_id)
+        .where(TimeEntry.issue_id == Issue.id)
+        .where(TimeEntry.user_id == User.id)
+        .where(TimeEntry.project_id == Project.id)
+        .where(TimeEntry.date >= start, TimeEntry.date < end)
+        .order_by(TimeEntry.date, TimeEntry.id)
+    )
+    if project_id:
+        stmt = stmt.where(TimeEntry.project_id == project_id)
+    if user_id:
+        stmt = stmt.where(TimeEntry.user_id == user_id)
+    stmt = issue_filters(stmt, label, assignee)
+    rows = session.exec(stmt.execution_options(yield_per=PDF_YIELD_PER))
+    if not archive.has_entries(start, end):
+        return rows
+    archived = archive.entries(
+        ["date", "duration_minutes", "issue_title", "user", "project", "user_id", "project_id"],
+        start, end, project_id, user_id, label, assignee,
+    )
+    return heapq.merge(archived, rows, key=lambda r: r[0])
+
+
+def plan(rows, start: date, end: date, splits: List[str], project_id=None, user_id=None) -> List[tuple]:
+    """Split `rows` into one render task per week (x user x project) that has entries.
+
+    Each task is (zip name, rows, start, end, project_id, user_id, title), the
+    arguments of `_render`.
+    """
+    tasks: Dict[tuple, tuple] = {}
+    for day, minutes, title, username, project_name, uid, pid in rows:
+        week = day - timedelta(days=day.weekday())
+        key = (week, uid if "user" in splits else None, pid if "project" in splits else None)
+        task = tasks.get(key)
+        if task is None:
+            if len(tasks) >= REPORT_BATCH_MAX_PDFS:
+                raise ValueError(f"batch would have more than {REPORT_BATCH_MAX_PDFS} PDFs")
+            parts = []
+            if "user" in splits:
+                parts.append(f"{_slug(username)}-{uid}")
+            if "project" in splits:
+                parts.append(f"{_slug(project_name)}-{pid}")
+            name = f"{week.isoformat()}/{'_'.join(parts)}.pdf" if parts else f"weekly-{week.isoformat()}.pdf"
+            task = tasks[key] = (
+                name, [], max(week, start), min(week + timedelta(days=7), end),
+                key[2] or project_id, key[1] or user_id, "Weekly Report",
+            )
+        task[1].append((day, minutes, title, username, project_name))
+    return sorted(tasks.values(), key=lambda t: t[0])
+
+
+def _render(task: tuple):
+    name, rows, start, end, project_id, user_id, title = task
+    t0 = time.perf_counter()
+    buf = io.BytesIO()
+    render_pdf(buf, rows, start, end, project_id, user_id, title)
+    return name, buf.getvalue(), time.perf_counter() - t0, len(rows)
+
+
+def render_batch(
+    start: date,
+    end: date,
+    splits: List[str],
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    workers: Optional[int] = None,
+):
+    """Render the batch for [start, end); returns ([(name, pdf bytes)], manifest dict).
+
+    `workers` = 1 renders in this process; otherwise the shared pool is used.
+    Raises ValueError if the batch exceeds REPORT_BATCH_MAX_PDFS.
+    """
+    t0 = time.perf_counter()
+    with get_session() as session:
+        tasks = plan(batch_rows(session, start, end, project_id, user_id, label, assignee),
+                     start, end, splits, project_id, user_id)
+    fetched = time.perf_counter()
+
+    workers = workers or REPORT_WORKERS
+    if len(tasks) <= 1:
+        workers = 1
+    if workers == 1:
+        results = [_render(t) for t in tasks]
+    else:
+        pool = get_pool() if workers == REPORT_WORKERS else ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            # a few chunks per worker keeps the pickling overhead down without
+            # leaving workers idle behind one slow chunk
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = list(pool.map(_render, tasks, chunksize=chunksize))
+        except BrokenProcessPool:
+            if pool is _pool:
+                shutdown_pool()
+            raise
+        finally:
+            if pool is not _pool:
+                pool.shutdown()
+    done = time.perf_counter()
+
+    manifest = {
+        "start": start.isoformat(),
+        "end": (end - timedelta(days=1)).isoformat(),
+        "split_by": splits,
+        "workers": workers,
+        "fetch_seconds": round(fetched - t0, 3),
+        "render_seconds": round(done - fetched, 3),
+        "pdfs": [
+            {"name": name, "entries": entries, "bytes": len(pdf), "render_seconds": round(seconds, 4)}
+            for name, pdf, seconds, entries in results
+        ],
+    }
+    return [(name, pdf) for name, pdf, _, _ in results], manifest
+
+
+def write_zip(out, pdfs: List[tuple], manifest: dict):
+    # the PDFs are already compressed, so they are stored as-is
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as zf:
+        for name, pdf in pdfs:
+            zf.writestr(name, pdf)
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.batch_reports")
+    parser.add_argument("--start", required=True, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last day, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--period", choices=("week", "month", "quarter", "year"), default="month")
+    parser.add_argument("--by", default="", help="comma-separated: user, project")
+    parser.add_argument("--project-id", type=int)
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--label")
+    parser.add_argument("--assignee")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    parser.add_argument("-o", "--out", default="reports.zip")
+    args = parser.parse_args(argv)
+
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end) + timedelta(days=1) if args.end else period_end(start, args.period)
+    try:
+        pdfs, manifest = render_batch(
+            start, end, parse_splits(args.by), args.project_id, args.user_id,
+            args.label, args.assignee, workers=args.workers,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        shutdown_pool()
+    with open(args.out, "wb") as f:
+        write_zip(f, pdfs, manifest)
+
+    for pdf in manifest["pdfs"]:
+        print(f"{pdf['render_seconds'] * 1000:8.1f}ms  {pdf['entries']:>7} entries  {pdf['name']}")
+    cpu = sum(p["render_seconds"] for p in manifest["pdfs"])
+    print(f"{len(pdfs)} PDFs -> {args.out}  fetch={manifest['fetch_seconds']:.2f}s  "
+          f"render={manifest['render_seconds']:.2f}s wall / {cpu:.2f}s summed on {manifest['workers']} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
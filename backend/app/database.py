@@ -1,14 +1,108 @@
 # backend/app/database.py
-from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel import create_engine, Session
+from sqlalchemy import event, inspect
 from contextlib import contextmanager
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/app.db")
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+
+# connection pool (both backends; SQLite file databases use a QueuePool too)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite: WAL lets readers run alongside the single writer, and NORMAL sync is
+# durable under WAL except for the last commits on power loss
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.close()
+
+
+def _engine_kwargs(url: str) -> dict:
+    if url.startswith("sqlite"):
+        kwargs = {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not _sqlite_memory(url):
+            kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+        return kwargs
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def _sqlite_memory(url: str) -> bool:
+    return url.split("?")[0] in ("sqlite://", "sqlite:///:memory:")
+
+
+def make_engine(url: str):
+    eng = create_engine(url, **_engine_kwargs(url))
+    if url.startswith("sqlite") and not _sqlite_memory(url):
+        event.listen(eng, "connect", _sqlite_pragmas)
+    return eng
+
+
+engine = make_engine(DATABASE_URL)
+
+# Optional asyncio path (aiosqlite / asyncpg) for the hot endpoints in async_routers.py;
+# the sync engine above stays in use for everything else.
+ASYNC_DB = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS[scheme.split('+')[0]]}://{rest}"
+
+
+def make_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    kwargs = _engine_kwargs(url)
+    kwargs.get("connect_args", {}).pop("check_same_thread", None)
+    eng = create_async_engine(async_url(url), **kwargs)
+    if url.startswith("sqlite") and not _sqlite_memory(url):
+        event.listen(eng.sync_engine, "connect", _sqlite_pragmas)
+    return eng
+
+
+async_engine = make_async_engine(DATABASE_URL) if ASYNC_DB else None
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+# last revision whose schema matches what create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+
+
+def alembic_config():
+    from alembic.config import Config
+    cfg = Config()
+    cfg.set_main_option("script_location", MIGRATIONS_DIR)
+    return cfg
+
 
 def init_db():
-    SQLModel.metadata.create_all(engine)
+    from alembic import command
+    cfg = alembic_config()
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        insp = inspect(conn)
+        if insp.has_table("user") and not insp.has_table("alembic_version"):
+            # database created by create_all; adopt it instead of recreating tables
+            command.stamp(cfg, BASELINE_REVISION)
+        command.upgrade(cfg, "head")
+
 
 @contextmanager
 def get_session():
@@ -17,3 +111,22 @@ def get_session():
         yield session
     finally:
         session.close()
+
+
+def db_session():
+    """FastAPI dependency: one Session per request, closed once the response is built."""
+    with get_session() as session:
+        yield session
+
+
+async def async_db_session():
+    """Async counterpart of db_session, bound to `async_engine` (requires ASYNC_DB)."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    # nothing may lazy-load after commit on an AsyncSession, so keep attributes loaded
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+if __name__ == "__main__":
+    # `python -m app.database` migrates once before several workers start and would race on it
+    init_db()
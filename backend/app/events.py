@@ -0,0 +1,162 @@
+# backend/app/events.py
+# Pub/sub for per-user timer and time-entry events, consumed by the /api/events SSE
+# stream. Publishers are the sync endpoints (run in the threadpool), so events are
+# handed to each subscriber's event loop thread-safely.
+#
+# A published event goes straight to this process's streams. With more than one
+# worker (EVENT_RELAY) it is also written to the UserEvent table; every worker runs
+# relay(), which polls that table while the worker has open streams and hands the
+# other workers' events to them, so a stream sees the user's events whichever
+# worker served the write. Rows are pruned after EVENT_RETENTION_SECONDS.
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import delete, insert
+from sqlmodel import select
+
+from . import leader
+from .database import engine
+from .models import UserEvent
+
+# per-connection buffer; a client this far behind misses events until it reconnects
+QUEUE_SIZE = 100
+EVENT_POLL_SECONDS = float(os.getenv("EVENT_POLL_SECONDS", "1"))
+EVENT_RETENTION_SECONDS = float(os.getenv("EVENT_RETENTION_SECONDS", "60"))
+# a single worker has every stream itself; set EVENT_RELAY=1 when several hosts share the database
+EVENT_RELAY = os.getenv("EVENT_RELAY", "1" if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else "0") == "1"
+# rows are read again for this long, so one whose commit lagged its timestamp isn't missed
+LOOKBACK_SECONDS = 5
+
+_subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+_lock = threading.Lock()
+stats = {"published": 0, "relayed": 0, "delivered": 0, "dropped": 0}
+log = logging.getLogger("app.events")
+_relay: asyncio.Task = None
+
+
+def _deliver(queue: asyncio.Queue, message: str):
+    try:
+        queue.put_nowait(message)
+        stats["delivered"] += 1
+    except asyncio.QueueFull:
+        stats["dropped"] += 1
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _send(user_id: int, message: str):
+    with _lock:
+        targets = list(_subscribers.get(user_id, ()))
+    for loop, queue in targets:
+        try:
+            loop.call_soon_threadsafe(_deliver, queue, message)
+        except RuntimeError:
+            # loop already closed; the subscriber is on its way out
+            pass
+
+
+def publish(user_id: int, event: str, data: dict):
+    """Send `event` to every open stream of `user_id`, on any worker.
+
+    Blocks on one INSERT when EVENT_RELAY is on, so async code calls it through
+    the threadpool.
+    """
+    message = sse(event, data)
+    stats["published"] += 1
+    _send(user_id, message)
+    if not EVENT_RELAY:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(UserEvent).values(
+                user_id=user_id, origin=leader.worker_id(), message=message, created_at=time.time()
+            ))
+    except Exception:
+        # the change itself is committed; other workers' streams just miss this event
+        log.exception("Could not record %s event for other workers", event)
+
+
+def _poll(since: float, seen: Dict[int, float]) -> list:
+    """Other workers' events created after `since` and not relayed yet."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(UserEvent.id, UserEvent.user_id, UserEvent.message, UserEvent.created_at)
+            .where(UserEvent.created_at > since, UserEvent.origin != leader.worker_id())
+            .order_by(UserEvent.id)
+        ).all()
+    return [r for r in rows if r.id not in seen]
+
+
+def _prune(before: float):
+    with engine.begin() as conn:
+        conn.execute(delete(UserEvent).where(UserEvent.created_at < before))
+
+
+async def relay():
+    # only events published while this worker has open streams are relayed
+    started = pruned = time.time()
+    seen: Dict[int, float] = {}
+    while True:
+        now = time.time()
+        since = max(started, now - LOOKBACK_SECONDS)
+        rows = []
+        try:
+            if _subscribers:
+                rows = await asyncio.to_thread(_poll, since, seen)
+            else:
+                # nobody to hand events to; skip the query until a stream opens
+                started = now
+            if now - pruned > EVENT_RETENTION_SECONDS:
+                await asyncio.to_thread(_prune, now - EVENT_RETENTION_SECONDS)
+                pruned = now
+        except Exception:
+            log.exception("Event relay poll failed")
+        for row in rows:
+            seen[row.id] = row.created_at
+            stats["relayed"] += 1
+            _send(row.user_id, row.message)
+        for event_id in [i for i, t in seen.items() if t <= since]:
+            del seen[event_id]
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+
+
+def start_relay():
+    global _relay
+    if EVENT_RELAY:
+        _relay = asyncio.get_running_loop().create_task(relay())
+
+
+def stop_relay():
+    if _relay:
+        _relay.cancel()
+
+
+@contextmanager
+def subscribe(user_id: int):
+    """Register a queue of pre-formatted SSE messages for the calling event loop."""
+    entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+    with _lock:
+        _subscribers.setdefault(user_id, set()).add(entry)
+    try:
+        yield entry[1]
+    finally:
+        with _lock:
+            subs = _subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(entry)
+                if not subs:
+                    del _subscribers[user_id]
+
+
+def snapshot() -> dict:
+    with _lock:
+        streams = sum(len(s) for s in _subscribers.values())
+        return {**stats, "users": len(_subscribers), "streams": streams}
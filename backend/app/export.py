@@ -0,0 +1,66 @@
+# backend/app/export.py
+# Streaming CSV/NDJSON exports. Rows come off the DB `EXPORT_YIELD_PER` at a time,
+# are formatted line by line and leave as ~64 KiB (optionally gzipped) blocks, so
+# memory stays flat no matter how many rows an export covers.
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from typing import Iterable, Iterator, List
+
+from .database import get_session
+
+EXPORT_YIELD_PER = 5000
+EXPORT_BLOCK_SIZE = 64 * 1024
+
+
+def stream_rows(stmt) -> Iterator:
+    """Iterate `stmt` in its own session; the session lives as long as the generator."""
+    with get_session() as session:
+        yield from session.exec(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def csv_lines(names: List[str], rows: Iterable) -> Iterator[str]:
+    # rows are positional; only their first len(names) values are written
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(names)
+    width = len(names)
+    for row in rows:
+        writer.writerow([_plain(v) for v in row[:width]])
+        # hand over whatever the writer produced and reuse the buffer
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+
+def ndjson_lines(names: List[str], rows: Iterable) -> Iterator[str]:
+    width = len(names)
+    for row in rows:
+        yield json.dumps(dict(zip(names, map(_plain, row[:width]))), ensure_ascii=False) + "\n"
+
+
+def blocks(lines: Iterable[str], gzip: bool = False) -> Iterator[bytes]:
+    """Join lines into ~EXPORT_BLOCK_SIZE byte blocks, gzip-compressed if asked."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    buf, size = [], 0
+    for line in lines:
+        buf.append(line)
+        size += len(line)
+        if size >= EXPORT_BLOCK_SIZE:
+            data = "".join(buf).encode("utf-8")
+            buf, size = [], 0
+            data = gz.compress(data) if gz else data
+            if data:
+                yield data
+    data = "".join(buf).encode("utf-8")
+    if gz:
+        data = gz.compress(data) + gz.flush()
+    if data:
+        yield data
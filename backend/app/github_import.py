@@ -1,83 +1,450 @@
+import asyncio
+import logging
 import os
 import httpx
-import traceback
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from sqlalchemy import delete, insert, update
 from sqlmodel import select
 from .database import get_session
-from .models import Project, Issue
+from . import metrics, search
+from .models import Project, Issue, IssueLabel, RepoSyncState
 
 GITHUB_PAT = os.getenv("GITHUB_PAT")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
 DEFAULT_REPOS = ["domi413/vhdl-fmt", "domi413/vhdl-fmt-doc"]
+PER_PAGE = 100
+UPSERT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# max in-flight GitHub requests across all repos of one import run
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "4"))
+IMPORT_MAX_RETRIES = int(os.getenv("IMPORT_MAX_RETRIES", "5"))
+IMPORT_MAX_BACKOFF = float(os.getenv("IMPORT_MAX_BACKOFF", "300"))
+# sequential re-walks of a listing that changed while it was being read
+IMPORT_MAX_REWALKS = int(os.getenv("IMPORT_MAX_REWALKS", "2"))
 
-async def import_repo(repo: str):
+log = logging.getLogger("app.github_import")
+
+
+def github_client() -> httpx.AsyncClient:
     headers = {"Accept": "application/vnd.github+json"}
     if GITHUB_PAT:
         headers["Authorization"] = f"token {GITHUB_PAT}"
+    return httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        timeout=30,
+        limits=httpx.Limits(max_connections=IMPORT_CONCURRENCY, max_keepalive_connections=IMPORT_CONCURRENCY),
+    )
+
+
+def issues_url(repo: str, page: int, since: str = None) -> str:
+    # sort by updated so `since=` listings are stable and the cursor only moves forward
+    url = (
+        f"{GITHUB_API_URL}/repos/{repo}/issues"
+        f"?state=all&sort=updated&direction=asc&per_page={PER_PAGE}&page={page}"
+    )
+    if since:
+        url += f"&since={since}"
+    return url
 
-    print(f"[import_repo] Starting import for {repo}")
 
+def repo_of(url: str) -> str:
+    # "owner/name" from a /repos/{owner}/{name}/... API URL
+    return "/".join(url.split("/repos/", 1)[-1].split("/")[:2])
+
+
+def server_time(r: httpx.Response) -> str:
+    """When GitHub served `r`, formatted like updated_at (our clock if there is no Date)."""
     try:
-        async with httpx.AsyncClient() as client:
-            page = 1
-            items = []
-            while True:
-                url = f"https://api.github.com/repos/{repo}/issues?state=all&per_page=100&page={page}"
-                print(f"[import_repo] Fetching {url}")
+        when = parsedate_to_datetime(r.headers["Date"])
+    except (KeyError, TypeError, ValueError):
+        when = datetime.now(timezone.utc)
+    return when.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def last_page(r: httpx.Response) -> int:
+    last = r.links.get("last")
+    if not last:
+        return 1
+    return int(httpx.URL(last["url"]).params.get("page", 1))
+
+
+def retry_delay(r: httpx.Response, attempt: int):
+    """Seconds to wait before retrying `r`, or None if it should not be retried."""
+    if r.status_code in (403, 429):
+        if "Retry-After" in r.headers:
+            return min(float(r.headers["Retry-After"]), IMPORT_MAX_BACKOFF)
+        if r.headers.get("X-RateLimit-Remaining") == "0":
+            reset = int(r.headers.get("X-RateLimit-Reset", 0))
+            return min(max(reset - time.time(), 0) + 1, IMPORT_MAX_BACKOFF)
+        return None
+    if r.status_code >= 500:
+        return min(2 ** attempt, IMPORT_MAX_BACKOFF)
+    return None
+
+
+async def fetch(client: httpx.AsyncClient, sem: asyncio.Semaphore, url: str, etag: str = None) -> httpx.Response:
+    headers = {"If-None-Match": etag} if etag else {}
+    for attempt in range(IMPORT_MAX_RETRIES + 1):
+        try:
+            async with sem:
                 r = await client.get(url, headers=headers)
-                if r.status_code != 200:
-                    print(f"[import_repo] ERROR {r.status_code}: {r.text}")
-                    r.raise_for_status()
-                batch = r.json()
-                if not batch:
-                    break
-                items.extend(batch)
-                print(f"[import_repo] Got {len(batch)} issues on page {page}")
-                page += 1
+        except httpx.TransportError as e:
+            if attempt == IMPORT_MAX_RETRIES:
+                raise
+            delay = min(2 ** attempt, IMPORT_MAX_BACKOFF)
+            log.warning("%r on %s, retrying in %.0fs", e, url, delay)
+            await asyncio.sleep(delay)
+            continue
+        metrics.import_page(repo_of(url), r.status_code, r.headers.get("X-RateLimit-Remaining"))
+        delay = retry_delay(r, attempt)
+        if delay is None or attempt == IMPORT_MAX_RETRIES:
+            break
+        log.warning("%s on %s, retrying in %.0fs", r.status_code, url, delay)
+        await asyncio.sleep(delay)
+    if r.status_code not in (200, 304):
+        log.error("%s on %s: %s", r.status_code, url, r.text)
+        r.raise_for_status()
+    return r
+
+
+def issue_row(project_id: int, it: dict) -> dict:
+    return {
+        "project_id": project_id,
+        "github_number": it["number"],
+        "title": it["title"],
+        "body": it.get("body"),
+        "url": it["html_url"],
+        "state": it.get("state", "open"),
+        "labels": [label.get("name") for label in it.get("labels", [])],
+        "assignee": (it.get("assignee") or {}).get("login"),
+        "updated_at": it.get("updated_at"),
+    }
+
+
+def load_issue_ids(session, project_id: int) -> dict:
+    return dict(session.exec(
+        select(Issue.github_number, Issue.id).where(Issue.project_id == project_id)
+    ).all())
+
+
+def write_labels(session, issue_labels: list):
+    """Replace the IssueLabel rows of the given `(issue_id, labels)` pairs."""
+    ids = [issue_id for issue_id, _ in issue_labels]
+    if not ids:
+        return
+    session.execute(delete(IssueLabel).where(IssueLabel.issue_id.in_(ids)))
+    rows = [
+        {"issue_id": issue_id, "name": name}
+        for issue_id, labels in issue_labels
+        for name in set(labels or []) if name
+    ]
+    if rows:
+        session.execute(insert(IssueLabel), rows)
+
+
+def backfill_issue_labels():
+    """Populate IssueLabel from Issue.labels for databases imported before it existed.
+
+    The search index was built from IssueLabel by its migration, so it is rebuilt
+    once the labels are in.
+    """
+    with get_session() as session:
+        if session.exec(select(IssueLabel.issue_id).limit(1)).first() is not None:
+            return
+        rows = session.exec(select(Issue.id, Issue.labels)).all()
+        if not rows:
+            return
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            write_labels(session, rows[i:i + UPSERT_BATCH_SIZE])
+        search.rebuild(session.connection())
+        session.commit()
+        log.info("Backfilled labels for %d issues", len(rows))
+
+
+def bump_issues_version(session, project_id: int):
+    # tells every worker's issue snapshot that this project's issues changed
+    session.execute(
+        update(Project).where(Project.id == project_id).values(issues_version=Project.issues_version + 1)
+    )
+
+
+def upsert_issues(session, project_id: int, items: list, existing: dict = None,
+                  batch_size: int = UPSERT_BATCH_SIZE) -> dict:
+    """Insert or update GitHub issue payloads for one project in batches.
+
+    Existing rows are resolved through `existing` (`github_number -> id`,
+    loaded in one query when not given and kept up to date with new ids),
+    then each batch is one bulk INSERT plus one bulk UPDATE by primary key,
+    followed by the batch's labels and search entries, and the project's
+    issues_version is bumped. Does not commit; returns per-batch timings.
+    """
+    if existing is None:
+        existing = load_issue_ids(session, project_id)
+    rows = [issue_row(project_id, it) for it in items if "pull_request" not in it]
+
+    batches = []
+    started = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        t0 = time.perf_counter()
+        batch = rows[i:i + batch_size]
+        new = [r for r in batch if r["github_number"] not in existing]
+        changed = [{"id": existing[r["github_number"]], **r} for r in batch if r["github_number"] in existing]
+        if new:
+            inserted = session.execute(insert(Issue).returning(Issue.github_number, Issue.id), new)
+            existing.update(inserted.all())
+        if changed:
+            session.execute(update(Issue), changed)
+        write_labels(session, [(existing[r["github_number"]], r["labels"]) for r in batch])
+        search.index_issues(session, [(existing[r["github_number"]], r) for r in batch])
+        dt = time.perf_counter() - t0
+        batches.append({
+            "size": len(batch),
+            "inserted": len(new),
+            "updated": len(changed),
+            "seconds": round(dt, 4),
+            "issues_per_sec": round(len(batch) / dt, 1) if dt else None,
+        })
+        log.debug("batch: +%d ~%d in %.0fms", len(new), len(changed), dt * 1000)
+
+    if rows:
+        bump_issues_version(session, project_id)
+    elapsed = time.perf_counter() - started
+    return {
+        "upserted": len(rows),
+        "seconds": elapsed,
+        "issues_per_sec": len(rows) / elapsed if elapsed else 0.0,
+        "batches": batches,
+    }
+
 
-        with next(get_session()) as session:
-            project = session.exec(select(Project).where(Project.github_repo == repo)).first()
+class RepoWriter:
+    """Writes issue pages for one repo as they arrive.
+
+    Each page is committed on its own so no transaction stays open across an
+    await (concurrent repos would otherwise lock each other out on SQLite).
+    Upserts are idempotent and the sync cursor only moves once every page is
+    in, so a failed run is simply redone from the old cursor next time.
+    The project row and the existing-issue map are only loaded once a page
+    actually carries issues, so an all-304 refresh never touches them.
+
+    `since=` is inclusive, so every refresh lists the issues last updated exactly
+    at the cursor again; those are skipped unless their stored fields differ.
+    """
+
+    def __init__(self, session, repo: str, since: str = None):
+        self.session = session
+        self.repo = repo
+        self.since = since
+        self.newest = since
+        self.project_id = None
+        self.existing = None
+        self.etags = {}
+        self.stats = {"upserted": 0, "seconds": 0.0, "issues_per_sec": 0.0, "pages": 0, "batches": []}
+
+    def _project_id(self) -> int:
+        if self.project_id is None:
+            project = self.session.exec(select(Project).where(Project.github_repo == self.repo)).first()
             if not project:
-                project = Project(name=repo.split('/')[-1], github_repo=repo)
-                session.add(project)
-                session.commit()
-                session.refresh(project)
-                print(f"[import_repo] Created new project {project.name}")
-
-            for it in items:
-                if "pull_request" in it:
-                    continue
-                labels = [label.get("name") for label in it.get("labels", [])]
-                assignee = (it.get("assignee") or {}).get("login")
-                existing = session.exec(
-                    select(Issue).where(Issue.project_id == project.id).where(Issue.github_number == it["number"])
-                ).first()
-                if existing:
-                    existing.title = it["title"]
-                    existing.body = it.get("body")
-                    existing.url = it["html_url"]
-                    existing.state = it.get("state", "open")
-                    existing.labels = labels
-                    existing.assignee = assignee
-                    print(f"[import_repo] Updated issue #{it['number']}: {it['title']}")
+                project = Project(name=self.repo.split('/')[-1], github_repo=self.repo)
+                self.session.add(project)
+                self.session.commit()
+                self.session.refresh(project)
+                log.info("Created new project %s", project.name)
+            self.project_id = project.id
+            self.existing = load_issue_ids(self.session, self.project_id)
+        return self.project_id
+
+    def write(self, page: int, r: httpx.Response, etag: str = None):
+        self.stats["pages"] += 1
+        if r.status_code == 304:
+            # unchanged since last sync; 304s don't count against the rate limit
+            self.etags[str(page)] = etag
+            return
+        if r.headers.get("ETag"):
+            self.etags[str(page)] = r.headers["ETag"]
+        items = r.json()
+        if not items:
+            return
+        log.debug("%s: got %d issues on page %d", self.repo, len(items), page)
+        self.newest = max([self.newest or ""] + [it["updated_at"] for it in items if it.get("updated_at")]) or None
+        items = self._drop_unchanged_boundary(items)
+        if not items:
+            return
+        s = upsert_issues(self.session, self._project_id(), items, self.existing)
+        self.session.commit()
+        self.stats["upserted"] += s["upserted"]
+        self.stats["seconds"] += s["seconds"]
+        self.stats["batches"].extend(s["batches"])
+
+    def _drop_unchanged_boundary(self, items: list) -> list:
+        numbers = [it["number"] for it in items if self.since and it.get("updated_at") == self.since]
+        if not numbers:
+            return items
+        stored = {
+            row[0]: row[1:]
+            for row in self.session.exec(
+                select(Issue.github_number, Issue.title, Issue.body, Issue.url, Issue.state, Issue.labels,
+                       Issue.assignee)
+                .where(Issue.project_id == Project.id, Project.github_repo == self.repo)
+                .where(Issue.github_number.in_(numbers))
+            ).all()
+        }
+        fields = ("title", "body", "url", "state", "labels", "assignee")
+
+        def unchanged(it):
+            if it["number"] not in stored or "pull_request" in it:
+                return False
+            row = issue_row(None, it)
+            return tuple(row[f] for f in fields) == tuple(stored[it["number"]])
+
+        return [it for it in items if it["number"] not in numbers or not unchanged(it)]
+
+    @property
+    def changed(self) -> bool:
+        return self.project_id is not None
+
+
+def load_sync_state(repo: str):
+    with get_session() as session:
+        sync = session.exec(select(RepoSyncState).where(RepoSyncState.repo == repo)).first()
+        return (sync.since, dict(sync.etags or {})) if sync else (None, {})
+
+
+def save_sync_state(session, repo: str, since: str, etags: dict):
+    sync = session.exec(select(RepoSyncState).where(RepoSyncState.repo == repo)).first()
+    if not sync:
+        sync = RepoSyncState(repo=repo)
+        session.add(sync)
+    sync.since = since
+    sync.etags = etags
+    sync.synced_at = datetime.utcnow()
+    session.commit()
+
+
+async def import_repo(repo: str, client: httpx.AsyncClient = None, sem: asyncio.Semaphore = None,
+                      on_page=None):
+    """Sync one repo's issues. Never raises; failures are reported in the returned stats.
+
+    `on_page(repo, upserted)` is called after each page has been handled.
+    All DB work runs in a worker thread so the event loop stays responsive.
+    """
+    if client is None:
+        async with github_client() as client:
+            return await import_repo(repo, client, sem, on_page)
+    sem = sem or asyncio.Semaphore(IMPORT_CONCURRENCY)
+
+    log.info("Starting import for %s", repo)
+    started = time.perf_counter()
+
+    try:
+        since, etags = await asyncio.to_thread(load_sync_state, repo)
+        with get_session() as session:
+            writer = RepoWriter(session, repo, since)
+
+            async def write(page, r, etag):
+                before = writer.stats["upserted"]
+                await asyncio.to_thread(writer.write, page, r, etag)
+                if on_page:
+                    on_page(repo, writer.stats["upserted"] - before)
+
+            async def walk(concurrency: int):
+                """Fetch and write every page of the listing; returns (pages, when page 1 was served)."""
+                first = await fetch(client, sem, issues_url(repo, 1, since), etags.get("1"))
+                if first.status_code == 304:
+                    pages = max((int(p) for p in etags), default=1)
                 else:
-                    session.add(Issue(
-                        project_id=project.id,
-                        github_number=it["number"],
-                        title=it["title"],
-                        body=it.get("body"),
-                        url=it["html_url"],
-                        state=it.get("state", "open"),
-                        labels=labels,
-                        assignee=assignee
-                    ))
-                    print(f"[import_repo] Added new issue #{it['number']}: {it['title']}")
-            session.commit()
-            print(f"[import_repo] Finished import for {repo}, total {len(items)} issues processed")
+                    pages = last_page(first)
+                await write(1, first, etags.get("1"))
+
+                # remaining pages are fetched concurrently and streamed to the writer;
+                # the bounded queue keeps at most a few undigested pages in memory
+                queue = asyncio.Queue(maxsize=concurrency)
+                todo = iter(range(2, pages + 1))
+
+                async def worker():
+                    for page in todo:
+                        etag = etags.get(str(page))
+                        try:
+                            r = await fetch(client, sem, issues_url(repo, page, since), etag)
+                        except Exception as e:
+                            r = e
+                        await queue.put((page, r, etag))
+
+                workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, pages - 1))]
+                try:
+                    for _ in range(pages - 1):
+                        page, r, etag = await queue.get()
+                        if isinstance(r, Exception):
+                            raise r
+                        await write(page, r, etag)
+                finally:
+                    for w in workers:
+                        w.cancel()
+                return pages, server_time(first)
+
+            async def settled(pages: int, listed_at: str, known: set) -> bool:
+                # An issue updated mid-walk moves to the end of the listing and shifts every
+                # later issue back a slot, so one that sat on an already fetched page boundary
+                # is skipped. Such an issue is on the last page now (which is written too);
+                # `known` collects the ones already seen there before this walk began.
+                if pages == 1:
+                    return True
+                r = await fetch(client, sem, issues_url(repo, pages, since))
+                await write(pages, r, None)
+                moved = {(it["number"], it["updated_at"]) for it in r.json() if it.get("updated_at", "") >= listed_at}
+                stable = last_page(r) <= pages and moved <= known
+                known |= moved
+                return stable
+
+            known = set()
+            pages, listed_at = await walk(IMPORT_CONCURRENCY)
+            stable = await settled(pages, listed_at, known)
+            for _ in range(IMPORT_MAX_REWALKS):
+                if stable:
+                    break
+                log.info("%s changed during the import, listing it again", repo)
+                pages, listed_at = await walk(1)
+                stable = await settled(pages, listed_at, known)
+
+            stats = writer.stats
+            stats["repo"] = repo
+            stats["duration"] = time.perf_counter() - started
+            if not writer.changed:
+                log.info("%s unchanged since %s, nothing to do", repo, since)
+                if writer.etags != etags:
+                    # the boundary listing came back 200; keep its ETags so next time it's a 304
+                    await asyncio.to_thread(save_sync_state, session, repo, since, writer.etags)
+                stats["unchanged"] = True
+                metrics.import_finished(repo, "unchanged", stats["duration"])
+                return stats
+
+            if stable:
+                # a moved cursor changes the listing URLs, so the old ETags are void
+                cursor, new_etags = writer.newest, writer.etags if writer.newest == since else {}
+            else:
+                # still changing under us; list from the old cursor again next time
+                log.warning("%s kept changing during the import, not moving its cursor", repo)
+                cursor, new_etags = since, {}
+            await asyncio.to_thread(save_sync_state, session, repo, cursor, new_etags)
+
+            stats["issues_per_sec"] = stats["upserted"] / stats["seconds"] if stats["seconds"] else 0.0
+            log.info(
+                "Finished import for %s, %d issues upserted from %d pages in %.2fs (%.0f issues/s)",
+                repo, stats["upserted"], stats["pages"], stats["seconds"], stats["issues_per_sec"],
+            )
+            metrics.import_finished(repo, "changed", stats["duration"], stats["upserted"])
+            return stats
 
     except Exception as e:
-        print(f"[import_repo] FAILED for {repo}: {e}")
-        traceback.print_exc()
+        log.exception("Import failed for %s", repo)
+        duration = time.perf_counter() - started
+        metrics.import_finished(repo, "failed", duration)
+        return {"repo": repo, "error": str(e), "duration": duration}
 
-async def import_all(repos=None):
+async def import_all(repos=None, on_page=None):
     repos = repos or DEFAULT_REPOS
-    for r in repos:
-        await import_repo(r)
+    sem = asyncio.Semaphore(IMPORT_CONCURRENCY)
+    async with github_client() as client:
+        return await asyncio.gather(*(import_repo(r, client, sem, on_page) for r in repos))
@@ -0,0 +1,156 @@
+# backend/app/ingest.py
+# Bulk time-entry ingestion: validates rows against one pre-fetch of the referenced
+# issues, inserts the valid ones with a single executemany and folds them into the
+# daily rollup. Invalid rows are reported back and never abort the batch.
+import csv
+import codecs
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import select
+
+from . import rollup
+from .database import get_session
+from .models import Issue, TimeEntry
+
+# rows handed to insert_entries at once by the streaming upload
+INGEST_CHUNK_SIZE = 5000
+# errors listed in a response; the total is always reported as error_count
+MAX_REPORTED_ERRORS = 1000
+# longest line (or quoted CSV record) buffered while waiting for its end
+MAX_RECORD_BYTES = 64 * 1024
+
+
+class RecordTooLarge(ValueError):
+    """A record of the upload is longer than MAX_RECORD_BYTES; the rest can't be parsed."""
+
+
+def parse_row(row: dict) -> Tuple[int, date, int, str]:
+    """(issue_id, date, minutes, notes) from a JSON object or CSV record; raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    try:
+        issue_id = int(row.get("issue_id"))
+    except (TypeError, ValueError):
+        raise ValueError("issue_id must be an integer")
+    try:
+        minutes = int(row.get("duration_minutes"))
+    except (TypeError, ValueError):
+        raise ValueError("duration_minutes must be an integer")
+    if minutes <= 0:
+        raise ValueError("duration_minutes must be > 0")
+    raw_date = row.get("date")
+    try:
+        d = date.fromisoformat(raw_date) if raw_date else date.today()
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid date: {raw_date!r}")
+    return issue_id, d, minutes, row.get("notes") or None
+
+
+def insert_entries(session, user_id: int, rows: Iterable[Tuple[int, object]]) -> Tuple[int, List[dict]]:
+    """Validate and insert numbered `rows` for `user_id` in the caller's transaction.
+
+    A row is a dict, or a ValueError already raised while parsing it. Returns
+    (inserted count, [{"row": n, "error": ...}]); the caller commits.
+    """
+    parsed, errors = [], []
+    for n, row in rows:
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            parsed.append((n, parse_row(row)))
+        except ValueError as e:
+            errors.append({"row": n, "error": str(e)})
+
+    ids = {p[0] for _, p in parsed}
+    projects = dict(session.exec(select(Issue.id, Issue.project_id).where(Issue.id.in_(ids))).all()) if ids else {}
+
+    now = datetime.utcnow()
+    values, cells = [], {}
+    for n, (issue_id, d, minutes, notes) in parsed:
+        project_id = projects.get(issue_id)
+        if project_id is None:
+            errors.append({"row": n, "error": f"unknown issue_id {issue_id}"})
+            continue
+        values.append({
+            "user_id": user_id, "project_id": project_id, "issue_id": issue_id,
+            "date": d, "duration_minutes": minutes, "notes": notes, "created_at": now,
+        })
+        key = (d, user_id, project_id, issue_id)
+        cells[key] = cells.get(key, 0) + minutes
+
+    if values:
+        # Core executemany on the session's connection skips the ORM bulk-insert bookkeeping
+        session.connection().execute(insert(TimeEntry.__table__), values)
+        rollup.add_cells(session, cells)
+    errors.sort(key=lambda e: e["row"])
+    return len(values), errors
+
+
+def ingest_chunk(user_id: int, rows: List[Tuple[int, object]]) -> Tuple[int, List[dict]]:
+    """insert_entries in a transaction of its own (used per chunk by streaming uploads)."""
+    with get_session() as session:
+        result = insert_entries(session, user_id, rows)
+        session.commit()
+    return result
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row number, dict or ValueError) from a CSV or NDJSON byte stream.
+
+    Only one line (or, for CSV, one quoted multi-line record) is buffered at a time;
+    one longer than MAX_RECORD_BYTES raises RecordTooLarge.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buf, n, header, pending = "", 0, None, ""
+
+    def records(text: str):
+        nonlocal header, pending, n
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        if fmt == "ndjson":
+            for line in lines:
+                if not line.strip():
+                    continue
+                n += 1
+                try:
+                    yield n, json.loads(line)
+                except ValueError:
+                    yield n, ValueError("invalid JSON")
+            return
+        # a CSV record is complete once its quotes balance
+        complete = []
+        for line in lines:
+            pending += line + "\n"
+            if pending.count('"') % 2:
+                if len(pending) > MAX_RECORD_BYTES:
+                    raise RecordTooLarge(f"record {n + 1} is longer than {MAX_RECORD_BYTES} bytes")
+                continue
+            if pending.strip():
+                complete.append(pending)
+            pending = ""
+        for values in csv.reader(complete):
+            if header is None:
+                header = values
+                continue
+            n += 1
+            yield n, dict(zip(header, values))
+
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        # keep the trailing partial line for the next chunk
+        cut = buf.rfind("\n") + 1
+        text, buf = buf[:cut], buf[cut:]
+        for item in records(text):
+            yield item
+        if len(buf) > MAX_RECORD_BYTES:
+            raise RecordTooLarge(f"line after record {n} is longer than {MAX_RECORD_BYTES} bytes")
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        for item in records(buf):
+            yield item
+    if pending.strip():
+        yield n + 1, ValueError("unterminated quoted field")
@@ -0,0 +1,140 @@
+# backend/app/issue_snapshot.py
+# In-process, versioned snapshot of every project's issues for /api/issues.
+#
+# Each issue is kept as an IssueRecord whose field values are already JSON-encoded,
+# and each snapshot has state/label/assignee indexes of record positions, so a
+# filtered page is an index intersection plus a byte join. A project's snapshot
+# is tagged with Project.issues_version, which the importer and the webhook bump
+# in the same transaction as their changes. A request reads only the versions
+# (one small query), rebuilds a snapshot whose version moved, and derives its
+# ETag from versions and query, so every worker answers revalidations alike.
+import bisect
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlmodel import select
+
+from .models import Issue, Project
+from .queries import encode_cursor
+
+FIELDS = [c.name for c in Issue.__table__.columns]
+_COLUMNS = [Issue.__table__.c[name] for name in FIELDS]
+_ID, _STATE, _ASSIGNEE, _LABELS = (FIELDS.index(n) for n in ("id", "state", "assignee", "labels"))
+
+
+def _encode(value) -> bytes:
+    # the same encoding FastAPI's JSONResponse uses
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class IssueRecord:
+    __slots__ = ("id", "encoded")
+
+    def __init__(self, id: int, encoded: Tuple[bytes, ...]):
+        self.id = id
+        # JSON of each value in FIELDS order
+        self.encoded = encoded
+
+    def json(self, fields: List[int], keys: List[bytes]) -> bytes:
+        return b"{" + b",".join(k + self.encoded[i] for i, k in zip(fields, keys)) + b"}"
+
+
+class Snapshot:
+    """The issues of one project (or of all projects), ordered by id, with filter indexes."""
+
+    __slots__ = ("version", "records", "ids", "by_state", "by_label", "by_assignee")
+
+    def __init__(self, version: tuple, rows):
+        self.version = version
+        self.records: List[IssueRecord] = []
+        self.by_state: Dict[str, List[int]] = {}
+        self.by_label: Dict[str, List[int]] = {}
+        self.by_assignee: Dict[str, List[int]] = {}
+        for pos, row in enumerate(rows):
+            self.records.append(IssueRecord(row[_ID], tuple(_encode(v) for v in row)))
+            self.by_state.setdefault(row[_STATE], []).append(pos)
+            if row[_ASSIGNEE]:
+                self.by_assignee.setdefault(row[_ASSIGNEE], []).append(pos)
+            for label in set(row[_LABELS] or ()):
+                if label:
+                    self.by_label.setdefault(label, []).append(pos)
+        self.ids = [r.id for r in self.records]
+
+    def select(self, state: Optional[str], label: Optional[str], assignee: Optional[str]) -> List[int]:
+        """Positions of the matching records, in id order."""
+        lists = []
+        for index, key in ((self.by_state, state), (self.by_label, label), (self.by_assignee, assignee)):
+            if key:
+                lists.append(index.get(key, []))
+        if not lists:
+            return range(len(self.records))
+        lists.sort(key=len)
+        if len(lists) == 1:
+            return lists[0]
+        others = [set(l) for l in lists[1:]]
+        return [p for p in lists[0] if all(p in o for o in others)]
+
+
+_snapshots: Dict[Optional[int], Snapshot] = {}
+_lock = threading.Lock()
+
+
+def versions(session, project_id: Optional[int]) -> Optional[tuple]:
+    """Version key of a project's snapshot (all projects for None); None if there is no such project."""
+    stmt = select(Project.id, Project.issues_version).order_by(Project.id)
+    if project_id is not None:
+        stmt = stmt.where(Project.id == project_id)
+    rows = tuple(tuple(r) for r in session.exec(stmt).all())
+    if project_id is not None and not rows:
+        return None
+    return rows
+
+
+def get(session, project_id: Optional[int], version: tuple) -> Snapshot:
+    """The snapshot for `version` (from versions()), rebuilt if it is out of date."""
+    snap = _snapshots.get(project_id)
+    if snap is not None and snap.version == version:
+        return snap
+    # one rebuild at a time; whoever waited finds the fresh snapshot afterwards
+    with _lock:
+        snap = _snapshots.get(project_id)
+        if snap is not None and snap.version == version:
+            return snap
+        stmt = sa.select(*_COLUMNS).order_by(Issue.id)
+        if project_id is not None:
+            stmt = stmt.where(Issue.project_id == project_id)
+        # versions were read before the rows, so the rows are at least that new
+        snap = Snapshot(version, session.exec(stmt).all())
+        _snapshots[project_id] = snap
+        return snap
+
+
+def etag(version: tuple, *query) -> str:
+    return '"' + hashlib.sha1(repr((version,) + query).encode()).hexdigest() + '"'
+
+
+def render(
+    snap: Snapshot,
+    fields: List[str],
+    state: Optional[str] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> bytes:
+    """JSON body of /api/issues: a page object, or a plain list when `limit` is None."""
+    idx = [FIELDS.index(f) for f in fields]
+    keys = [_encode(f) + b":" for f in fields]
+    positions = snap.select(state, label, assignee)
+    if limit is None:
+        return b"[" + b",".join(snap.records[p].json(idx, keys) for p in positions) + b"]"
+    start = bisect.bisect_right(positions, after, key=lambda p: snap.ids[p]) if after else 0
+    chunk = positions[start:start + limit + 1]
+    more = len(chunk) > limit
+    chunk = chunk[:limit]
+    cursor = _encode(encode_cursor(snap.ids[chunk[-1]])) if more else b"null"
+    items = b",".join(snap.records[p].json(idx, keys) for p in chunk)
+    return b'{"items":[' + items + b'],"next_cursor":' + cursor + b',"total":' + str(len(positions)).encode() + b"}"
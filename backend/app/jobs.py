@@ -0,0 +1,186 @@
+# backend/app/jobs.py
+# Background GitHub imports, shared by the API and the scheduler. Jobs are rows of
+# the ImportJob table, so /github/jobs/{id} answers the same on every worker. The
+# worker that queues a job runs it and keeps its heartbeat and progress current;
+# a job whose heartbeat stops (the worker died) is reported as failed.
+#
+# Imports never overlap: a job takes this worker's lock, then the "import" lease
+# that all workers (and hosts sharing the database) compete for, so a manual
+# refresh on one worker waits for the scheduled import on another.
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+
+from . import leader
+from .database import get_session
+from .github_import import import_all, DEFAULT_REPOS
+from .models import ImportJob
+
+MAX_FINISHED_JOBS = 50
+IMPORT_LEASE = "import"
+# how often a queued or running job writes its heartbeat and progress
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "2"))
+# a queued/running job with no heartbeat for this long lost its worker
+JOB_STALE_SECONDS = leader.LEADER_LEASE_SECONDS
+ACTIVE = ("queued", "running")
+
+log = logging.getLogger("app.jobs")
+# job id -> task, for the jobs this worker runs
+_tasks: Dict[str, asyncio.Task] = {}
+# one import per worker at a time; the lease extends that to every worker
+_import_lock = asyncio.Lock()
+
+
+def _stale(job: ImportJob, now: float) -> bool:
+    return job.status in ACTIVE and job.heartbeat_at < now - JOB_STALE_SECONDS
+
+
+def as_dict(job: ImportJob) -> dict:
+    now = time.time()
+    status, error, end = job.status, job.error, job.finished_at or now
+    if _stale(job, now):
+        status, error, end = "failed", "the worker running this job stopped", job.heartbeat_at
+    return {
+        "id": job.id,
+        "repos": job.repos,
+        "source": job.source,
+        "status": status,
+        "pages_fetched": job.pages_fetched,
+        "issues_upserted": job.issues_upserted,
+        "elapsed_seconds": round(end - job.started_at, 3) if job.started_at else 0.0,
+        "results": job.results or [],
+        "error": error,
+    }
+
+
+def _create(repos: List[str], source: str) -> Tuple[ImportJob, bool]:
+    """(new queued job for the repos no live job covers, True), or (the live job, False)."""
+    now = time.time()
+    with get_session() as session:
+        # jobs left behind by a dead worker are closed so they don't block new ones
+        session.execute(
+            update(ImportJob)
+            .where(ImportJob.status.in_(ACTIVE), ImportJob.heartbeat_at < now - JOB_STALE_SECONDS)
+            .values(status="failed", error="the worker running this job stopped", finished_at=now)
+        )
+        session.commit()
+        covering = {}
+        for job in session.exec(select(ImportJob).where(ImportJob.status.in_(ACTIVE))):
+            for repo in job.repos:
+                covering[repo] = job
+        todo = [r for r in repos if r not in covering]
+        if not todo:
+            return covering[repos[0]], False
+        job = ImportJob(
+            id=uuid.uuid4().hex, repos=todo, source=source, holder=leader.worker_id(),
+            created_at=now, heartbeat_at=now,
+        )
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return job, True
+
+
+def _update(job_id: str, **values):
+    with get_session() as session:
+        session.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+        session.commit()
+
+
+def _finish(job_id: str, **values):
+    now = time.time()
+    with get_session() as session:
+        session.execute(
+            update(ImportJob).where(ImportJob.id == job_id).values(finished_at=now, heartbeat_at=now, **values)
+        )
+        newest = (
+            select(ImportJob.id).where(ImportJob.finished_at.is_not(None))
+            .order_by(ImportJob.finished_at.desc()).limit(MAX_FINISHED_JOBS)
+        )
+        session.execute(delete(ImportJob).where(ImportJob.finished_at.is_not(None), ImportJob.id.not_in(newest)))
+        session.commit()
+
+
+async def _beat(job_id: str, progress: dict, state: dict):
+    # tells other workers the job is alive (queued or running) and how far it got,
+    # and keeps the lease once the job holds it
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            if state["leased"] and not await asyncio.to_thread(leader.try_acquire, IMPORT_LEASE):
+                log.warning("Import job %s lost the import lease", job_id)
+            await asyncio.to_thread(_update, job_id, heartbeat_at=time.time(), **progress)
+        except Exception:
+            log.exception("Heartbeat of import job %s failed", job_id)
+
+
+async def _run(job_id: str, repos: List[str]):
+    progress = {"pages_fetched": 0, "issues_upserted": 0}
+
+    def on_page(repo: str, upserted: int):
+        progress["pages_fetched"] += 1
+        progress["issues_upserted"] += upserted
+
+    outcome = {"status": "failed", "error": "import cancelled"}
+    # beats from the start, so a job queued behind this worker's lock or another
+    # worker's lease isn't taken for dead
+    state = {"leased": False}
+    heartbeat = asyncio.get_running_loop().create_task(_beat(job_id, progress, state))
+    try:
+        async with _import_lock:
+            while not await asyncio.to_thread(leader.try_acquire, IMPORT_LEASE):
+                # another worker is importing
+                await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            state["leased"] = True
+            try:
+                now = time.time()
+                await asyncio.to_thread(_update, job_id, status="running", started_at=now, heartbeat_at=now)
+                results = [
+                    {k: v for k, v in r.items() if k != "batches"}
+                    for r in await import_all(repos, on_page=on_page)
+                ]
+            finally:
+                state["leased"] = False
+                await asyncio.to_thread(leader.release, IMPORT_LEASE)
+        failed = [r for r in results if r.get("error")]
+        outcome = {
+            "status": "failed" if failed else "done",
+            "results": results,
+            "error": "; ".join(f"{r['repo']}: {r['error']}" for r in failed) or None,
+        }
+    except Exception as e:
+        outcome = {"status": "failed", "error": str(e)}
+    finally:
+        heartbeat.cancel()
+        _tasks.pop(job_id, None)
+        await asyncio.to_thread(_finish, job_id, **progress, **outcome)
+
+
+async def enqueue_import(repos: List[str] = None, source: str = "manual") -> ImportJob:
+    """Start a background import unless every repo is already queued or running.
+
+    Repos that already have a pending job (on any worker) are left to it; if
+    nothing is left the existing job is returned instead of starting a duplicate.
+    """
+    repos = list(repos or DEFAULT_REPOS)
+    job, created = await asyncio.to_thread(_create, repos, source)
+    if created:
+        _tasks[job.id] = asyncio.get_running_loop().create_task(_run(job.id, job.repos))
+    return job
+
+
+def task(job_id: str) -> Optional[asyncio.Task]:
+    """The task running `job_id` if this worker runs it."""
+    return _tasks.get(job_id)
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    with get_session() as session:
+        job = session.get(ImportJob, job_id)
+        return as_dict(job) if job else None
@@ -0,0 +1,62 @@
+# backend/app/leader.py
+# Leader election between uvicorn workers (and hosts sharing the database) through
+# a lease row. Whoever holds the unexpired "scheduler" lease runs the scheduled
+# GitHub imports; it renews the lease every LEADER_RENEW_SECONDS, and if it dies
+# the lease runs out after LEADER_LEASE_SECONDS and another worker takes over.
+#
+# Taking the lease is one conditional UPDATE (or an INSERT for a fresh row), which
+# both SQLite and PostgreSQL apply atomically, so no advisory locks are needed.
+# Expiry compares wall clocks, so hosts sharing a database need NTP.
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import case, delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import engine
+from .models import Lease
+
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+LEADER_RENEW_SECONDS = float(os.getenv("LEADER_RENEW_SECONDS", "10"))
+
+_TOKEN = uuid.uuid4().hex[:8]
+
+
+def worker_id() -> str:
+    # unique per process (the pid also tells forked workers apart), readable in the lease table
+    return f"{socket.gethostname()}:{os.getpid()}:{_TOKEN}"
+
+
+def try_acquire(name: str, holder: str = None, ttl: float = LEADER_LEASE_SECONDS) -> bool:
+    """Take or renew lease `name` for `holder` (this worker); False while someone else holds it."""
+    holder = holder or worker_id()
+    now = time.time()
+    with engine.begin() as conn:
+        renewed = conn.execute(
+            update(Lease)
+            .where(Lease.name == name)
+            .where((Lease.holder == holder) | (Lease.expires_at < now))
+            .values(
+                holder=holder,
+                expires_at=now + ttl,
+                acquired_at=case((Lease.holder == holder, Lease.acquired_at), else_=now),
+            )
+        ).rowcount
+        if renewed:
+            return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(Lease).values(name=name, holder=holder, expires_at=now + ttl, acquired_at=now))
+        return True
+    except IntegrityError:
+        # the row exists and is held by another worker
+        return False
+
+
+def release(name: str, holder: str = None):
+    """Give up lease `name` if `holder` (this worker) has it, so another can take over at once."""
+    holder = holder or worker_id()
+    with engine.begin() as conn:
+        conn.execute(delete(Lease).where(Lease.name == name, Lease.holder == holder))
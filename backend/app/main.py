@@ -1,10 +1,18 @@
+import logging
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
+from fastapi.responses import PlainTextResponse
+from .database import init_db, ASYNC_DB, engine, async_engine
 from .auth import router as auth_router
 from .routers import api as api_router
-from .scheduler import start_scheduler
+from .webhooks import router as webhook_router
+from .scheduler import start_scheduler, stop_scheduler
+from .github_import import backfill_issue_labels
+from .batch_reports import shutdown_pool
+from . import events, metrics
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(levelname)s [%(name)s] %(message)s")
 
 app = FastAPI(title="Time Tracker API")
 
@@ -18,18 +26,40 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost, so CORS preflights and errors are timed too
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+if async_engine is not None:
+    metrics.instrument_engine(async_engine)
 
 app.include_router(auth_router)
+app.include_router(webhook_router)
+if ASYNC_DB:
+    # registered first so its async handlers shadow the sync ones for the same paths
+    from .async_routers import api_async
+    app.include_router(api_async)
 app.include_router(api_router)
 
 @app.on_event("startup")
 def on_startup():
     init_db()
+    backfill_issue_labels()
+    events.start_relay()
     try:
         start_scheduler()
     except Exception as e:
-        print("Scheduler start error:", e)
+        logging.getLogger("app.scheduler").exception("Scheduler start error: %s", e)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_scheduler()
+    events.stop_relay()
+    shutdown_pool()
 
 @app.get("/health")
 def health():
     return {"ok": True}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
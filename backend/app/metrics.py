@@ -0,0 +1,205 @@
+# backend/app/metrics.py
+# In-process metrics in the Prometheus text format, served on /metrics.
+#
+# MetricsMiddleware times every request per route template; SQLAlchemy cursor
+# hooks on the engines count queries and their time per request (and overall),
+# and log statements slower than SLOW_QUERY_MS as well as requests issuing more
+# than SLOW_REQUEST_QUERIES statements, the usual sign of an N+1 loop.
+# The GitHub importer reports pages, issues, rate limit and durations here too.
+#
+# Every series is this worker's own and carries a `worker` label (leader.worker_id());
+# with WEB_CONCURRENCY > 1 each scrape of /metrics reaches one worker, so sum by the
+# other labels across the workers' series for app-wide numbers.
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from . import leader
+
+sql_log = logging.getLogger("app.sql")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "50"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_lock = threading.Lock()
+# name -> (type, help, {label tuple: value}); histograms store [bucket counts, sum, count]
+_metrics: Dict[str, Tuple[str, str, dict]] = {}
+_buckets: Dict[str, tuple] = {}
+
+
+def _series(name: str, kind: str, help: str) -> dict:
+    entry = _metrics.get(name)
+    if entry is None:
+        entry = _metrics[name] = (kind, help, {})
+    return entry[2]
+
+
+def inc(name: str, help: str, labels: Tuple[Tuple[str, str], ...] = (), value: float = 1):
+    with _lock:
+        series = _series(name, "counter", help)
+        series[labels] = series.get(labels, 0) + value
+
+
+def set_gauge(name: str, help: str, labels: Tuple[Tuple[str, str], ...] = (), value: float = 0):
+    with _lock:
+        _series(name, "gauge", help)[labels] = value
+
+
+def observe(name: str, help: str, value: float, labels: Tuple[Tuple[str, str], ...] = (),
+            buckets: tuple = LATENCY_BUCKETS):
+    with _lock:
+        series = _series(name, "histogram", help)
+        _buckets.setdefault(name, buckets)
+        h = series.get(labels)
+        if h is None:
+            h = series[labels] = [[0] * len(buckets), 0.0, 0]
+        i = bisect.bisect_left(buckets, value)
+        if i < len(buckets):
+            h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+
+def _fmt_labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def render() -> str:
+    """This worker's metrics in the Prometheus text exposition format (version 0.0.4)."""
+    worker = (("worker", leader.worker_id()),)
+    lines = []
+    with _lock:
+        for name, (kind, help, series) in sorted(_metrics.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series.items()):
+                labels = worker + labels
+                if kind != "histogram":
+                    lines.append(f"{name}{_fmt_labels(labels)} {value}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(_buckets[name], counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {total}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# set for the duration of a request; sync handlers and streamed bodies run in
+# threadpool workers that inherit a copy of the context, so they see the same object
+_request: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    dt = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += dt
+    observe("db_query_duration_seconds", "SQL statement execution time.", dt)
+    if dt * 1000 >= SLOW_QUERY_MS:
+        inc("db_slow_queries_total", f"SQL statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms).")
+        sql_log.warning("slow query (%.0f ms): %s", dt * 1000, " ".join(statement.split())[:1000])
+
+
+def instrument_engine(engine):
+    """Count and time every statement run on `engine` (a sync Engine or an AsyncEngine)."""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route(scope) -> str:
+    # route templates keep the label set bounded; unmatched paths share one label
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__name__", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed bodies are timed until their last chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        stats = RequestStats()
+        token = _request.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request.reset(token)
+            self._record(scope, status, time.perf_counter() - started, stats)
+
+    @staticmethod
+    def _record(scope, status: int, seconds: float, stats: RequestStats):
+        route = _route(scope)
+        if route == "/metrics":
+            return
+        labels = (("method", scope["method"]), ("route", route), ("status", str(status)))
+        observe("http_request_duration_seconds", "Request latency, until the last body chunk is sent.",
+                seconds, labels)
+        route_labels = (("method", scope["method"]), ("route", route))
+        observe("http_request_db_queries", "SQL statements issued per request.", stats.queries,
+                route_labels, COUNT_BUCKETS)
+        observe("http_request_db_seconds", "Time spent in SQL statements per request.", stats.db_seconds,
+                route_labels)
+        if stats.queries > SLOW_REQUEST_QUERIES:
+            sql_log.warning("%s %s issued %d queries (%.0f ms in SQL); N+1?",
+                            scope["method"], route, stats.queries, stats.db_seconds * 1000)
+
+
+def import_page(repo: str, status: int, rate_remaining: Optional[str]):
+    inc("github_import_pages_total", "GitHub issue pages fetched.", (("repo", repo), ("status", str(status))))
+    if rate_remaining is not None:
+        set_gauge("github_rate_limit_remaining", "X-RateLimit-Remaining of the last GitHub response.",
+                  value=int(rate_remaining))
+
+
+def import_finished(repo: str, result: str, seconds: float, upserted: int = 0):
+    labels = (("repo", repo), ("result", result))
+    inc("github_import_runs_total", "Repo imports by result (changed, unchanged, failed).", labels)
+    inc("github_import_issues_upserted_total", "Issues inserted or updated by the importer.",
+        (("repo", repo),), upserted)
+    observe("github_import_duration_seconds", "Wall time of one repo import.", seconds, labels)
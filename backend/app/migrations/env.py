@@ -0,0 +1,38 @@
+# backend/app/migrations/env.py
+from alembic import context
+from sqlmodel import SQLModel
+
+from app.database import engine
+from app import models  # noqa: F401  (registers tables on SQLModel.metadata)
+
+config = context.config
+target_metadata = SQLModel.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # search objects from 0005 live outside the models (FTS5 tables, tsvector column)
+    if type_ == "table" and name.startswith("issue_fts"):
+        return False
+    if name in ("search_vector", "ix_issue_search"):
+        return False
+    return True
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite can't ALTER most things in place; batch mode recreates tables
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+connection = config.attributes.get("connection")
+if connection is not None:
+    run_migrations(connection)
+else:
+    with engine.connect() as connection:
+        run_migrations(connection)
@@ -0,0 +1,82 @@
+"""import sync state, normalized issue labels, unique GitHub issue number
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger("alembic.runtime.migration")
+
+
+def merge_duplicate_issues(bind, insp):
+    """Fold issues sharing (project_id, github_number) into the oldest one.
+
+    The old refresh could insert an issue twice when two runs overlapped. Time
+    entries and timers move to the kept issue, the duplicates' labels are dropped
+    (the next import rewrites them) and rollup cells are recomputed.
+    """
+    groups = bind.execute(sa.text(
+        "SELECT project_id, github_number, MIN(id) FROM issue WHERE github_number IS NOT NULL "
+        "GROUP BY project_id, github_number HAVING COUNT(*) > 1"
+    )).all()
+    ids_in = sa.bindparam("ids", expanding=True)
+    for project_id, number, keep in groups:
+        dups = [row[0] for row in bind.execute(
+            sa.text("SELECT id FROM issue WHERE project_id = :p AND github_number = :n AND id <> :k"),
+            {"p": project_id, "n": number, "k": keep},
+        )]
+        log.warning("Merging duplicate issues %s into %s (project %s, #%s)", dups, keep, project_id, number)
+        for table in ("timeentry", "timer"):
+            bind.execute(sa.text(f"UPDATE {table} SET issue_id = :k WHERE issue_id IN :ids").bindparams(ids_in),
+                         {"k": keep, "ids": dups})
+        if insp.has_table("issuelabel"):
+            bind.execute(sa.text("DELETE FROM issuelabel WHERE issue_id IN :ids").bindparams(ids_in), {"ids": dups})
+        if insp.has_table("dailyrollup"):
+            bind.execute(sa.text("DELETE FROM dailyrollup WHERE issue_id IN :ids").bindparams(ids_in),
+                         {"ids": dups + [keep]})
+            bind.execute(sa.text(
+                "INSERT INTO dailyrollup (date, user_id, project_id, issue_id, minutes) "
+                "SELECT date, user_id, project_id, issue_id, SUM(duration_minutes) FROM timeentry "
+                "WHERE issue_id = :k GROUP BY date, user_id, project_id, issue_id"
+            ), {"k": keep})
+        bind.execute(sa.text("DELETE FROM issue WHERE id IN :ids").bindparams(ids_in), {"ids": dups})
+
+
+def upgrade():
+    # databases stamped from create_all may already have these tables
+    insp = sa.inspect(op.get_bind())
+    if not insp.has_table("reposyncstate"):
+        op.create_table(
+            "reposyncstate",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("repo", sa.String(), nullable=False, unique=True),
+            sa.Column("since", sa.String(), nullable=True),
+            sa.Column("etags", sa.JSON(), nullable=True),
+            sa.Column("synced_at", sa.DateTime(), nullable=True),
+        )
+    if not insp.has_table("issuelabel"):
+        op.create_table(
+            "issuelabel",
+            sa.Column("issue_id", sa.Integer(), sa.ForeignKey("issue.id"), primary_key=True),
+            sa.Column("name", sa.String(), primary_key=True),
+        )
+        op.create_index("ix_issuelabel_name", "issuelabel", ["name", "issue_id"])
+    # replaces the unnamed UNIQUE(project_id, github_number) some create_all databases have
+    merge_duplicate_issues(op.get_bind(), sa.inspect(op.get_bind()))
+    op.create_index("ix_issue_project_number", "issue", ["project_id", "github_number"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_issue_project_number", table_name="issue")
+    op.drop_index("ix_issuelabel_name", table_name="issuelabel")
+    op.drop_table("issuelabel")
+    op.drop_table("reposyncstate")
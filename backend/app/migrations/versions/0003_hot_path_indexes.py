@@ -0,0 +1,34 @@
+"""indexes for the report, time log, backlog, timer and import queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_user_github_id", "user", ["github_id"]),
+    ("ix_project_github_repo", "project", ["github_repo"]),
+    ("ix_issue_project_state", "issue", ["project_id", "state"]),
+    ("ix_issue_assignee", "issue", ["assignee"]),
+    ("ix_timeentry_date", "timeentry", ["date"]),
+    ("ix_timeentry_user_date", "timeentry", ["user_id", "date"]),
+    ("ix_timeentry_project_date", "timeentry", ["project_id", "date"]),
+    ("ix_timeentry_issue_date", "timeentry", ["issue_id", "date"]),
+    ("ix_timer_user_running", "timer", ["user_id", "running"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
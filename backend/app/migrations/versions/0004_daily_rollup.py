@@ -0,0 +1,36 @@
+"""daily rollup of time entry minutes for reports
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "dailyrollup",
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("project.id"), primary_key=True),
+        sa.Column("issue_id", sa.Integer(), sa.ForeignKey("issue.id"), primary_key=True),
+        sa.Column("minutes", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_dailyrollup_user_date", "dailyrollup", ["user_id", "date"])
+    op.create_index("ix_dailyrollup_project_date", "dailyrollup", ["project_id", "date"])
+    op.create_index("ix_dailyrollup_issue_date", "dailyrollup", ["issue_id", "date"])
+    op.execute(
+        "INSERT INTO dailyrollup (date, user_id, project_id, issue_id, minutes) "
+        "SELECT date, user_id, project_id, issue_id, SUM(duration_minutes) "
+        "FROM timeentry GROUP BY date, user_id, project_id, issue_id"
+    )
+
+
+def downgrade():
+    op.drop_table("dailyrollup")
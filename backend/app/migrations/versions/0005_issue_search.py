@@ -0,0 +1,41 @@
+"""full-text search over issue title, body and labels
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        # standalone FTS5 table keyed by issue.id; app/search.py keeps it in step on import
+        op.execute("CREATE VIRTUAL TABLE issue_fts USING fts5(title, body, labels, tokenize = 'porter unicode61')")
+        op.execute(
+            "INSERT INTO issue_fts (rowid, title, body, labels) "
+            "SELECT id, title, coalesce(body, ''), "
+            "coalesce((SELECT group_concat(name, ' ') FROM issuelabel WHERE issue_id = issue.id), '') FROM issue"
+        )
+    elif dialect == "postgresql":
+        op.execute(
+            "ALTER TABLE issue ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(labels::text, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(body, '')), 'C')) STORED"
+        )
+        op.execute("CREATE INDEX ix_issue_search ON issue USING gin (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute("DROP TABLE issue_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX ix_issue_search")
+        op.execute("ALTER TABLE issue DROP COLUMN search_vector")
@@ -0,0 +1,29 @@
+"""log of applied GitHub webhook deliveries
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "webhookdelivery",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("event", sa.String(), nullable=False),
+        sa.Column("action", sa.String(), nullable=True),
+        sa.Column("repo", sa.String(), nullable=True),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_webhookdelivery_received_at", "webhookdelivery", ["received_at"])
+
+
+def downgrade():
+    op.drop_table("webhookdelivery")
@@ -0,0 +1,37 @@
+"""background GitHub import jobs shared by all workers
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "importjob",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("repos", sa.JSON(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("holder", sa.String(), nullable=False),
+        sa.Column("pages_fetched", sa.Integer(), nullable=False),
+        sa.Column("issues_upserted", sa.Integer(), nullable=False),
+        sa.Column("results", sa.JSON(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.Float(), nullable=False),
+        sa.Column("heartbeat_at", sa.Float(), nullable=False),
+        sa.Column("started_at", sa.Float(), nullable=True),
+        sa.Column("finished_at", sa.Float(), nullable=True),
+    )
+    op.create_index("ix_importjob_status", "importjob", ["status"])
+
+
+def downgrade():
+    op.drop_table("importjob")
@@ -0,0 +1,22 @@
+"""GitHub updated_at of each stored issue, to skip out-of-order webhook deliveries
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("issue", sa.Column("updated_at", sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("issue") as batch:
+        batch.drop_column("updated_at")
@@ -1,8 +1,13 @@
-from sqlmodel import SQLModel, Field, Column, JSON
-from typing import Optional, List
+from sqlmodel import SQLModel, Field, Column, JSON, Index
+from typing import Optional, List, Dict
+import datetime as dt
 from datetime import datetime, date
 
+# Indexes are created by the Alembic migrations in app/migrations; keep them in
+# sync with the __table_args__ below so autogenerate stays clean.
+
 class User(SQLModel, table=True):
+    __table_args__ = (Index("ix_user_github_id", "github_id"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str
     email: str
@@ -11,11 +16,19 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Project(SQLModel, table=True):
+    __table_args__ = (Index("ix_project_github_repo", "github_repo"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     github_repo: Optional[str] = None
+    # bumped whenever the project's issues change; versions the issue snapshot (app/issue_snapshot.py)
+    issues_version: int = 0
 
 class Issue(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_issue_project_number", "project_id", "github_number", unique=True),
+        Index("ix_issue_project_state", "project_id", "state"),
+        Index("ix_issue_assignee", "assignee"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="project.id")
     github_number: Optional[int] = None
@@ -25,8 +38,23 @@ class Issue(SQLModel, table=True):
     state: str = "open"
     assignee: Optional[str] = None
     labels: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
+    # GitHub's `updated_at` of the stored version, so late webhook deliveries can't roll it back
+    updated_at: Optional[str] = None
+
+class IssueLabel(SQLModel, table=True):
+    # normalized copy of Issue.labels so label filters can run in SQL
+    __table_args__ = (Index("ix_issuelabel_name", "name", "issue_id"),)
+    issue_id: int = Field(foreign_key="issue.id", primary_key=True)
+    name: str = Field(primary_key=True)
 
 class TimeEntry(SQLModel, table=True):
+    # reports/time log filter on a date range, optionally narrowed by user or project
+    __table_args__ = (
+        Index("ix_timeentry_date", "date"),
+        Index("ix_timeentry_user_date", "user_id", "date"),
+        Index("ix_timeentry_project_date", "project_id", "date"),
+        Index("ix_timeentry_issue_date", "issue_id", "date"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     project_id: int = Field(foreign_key="project.id")
@@ -36,10 +64,81 @@ class TimeEntry(SQLModel, table=True):
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class DailyRollup(SQLModel, table=True):
+    # minutes per (day, user, project, issue), kept in step with TimeEntry by app/rollup.py
+    __table_args__ = (
+        Index("ix_dailyrollup_user_date", "user_id", "date"),
+        Index("ix_dailyrollup_project_date", "project_id", "date"),
+        Index("ix_dailyrollup_issue_date", "issue_id", "date"),
+    )
+    date: dt.date = Field(primary_key=True)
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    project_id: int = Field(foreign_key="project.id", primary_key=True)
+    issue_id: int = Field(foreign_key="issue.id", primary_key=True)
+    minutes: int = 0
+
+class ReportVersion(SQLModel, table=True):
+    # bumped with every rollup change on `date`; versions the cached weekly reports (app/report_cache.py)
+    date: dt.date = Field(primary_key=True)
+    version: int = 0
+
 class Timer(SQLModel, table=True):
+    __table_args__ = (Index("ix_timer_user_running", "user_id", "running"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     project_id: int = Field(foreign_key="project.id")
     issue_id: int = Field(foreign_key="issue.id")
     start_ts: datetime = Field(default_factory=datetime.utcnow)
     running: bool = True
+
+class RepoSyncState(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    repo: str = Field(unique=True)
+    # newest issue `updated_at` seen, sent back to GitHub as `since=`
+    since: Optional[str] = None
+    # page number -> ETag of the last `since=` listing, for If-None-Match
+    etags: Optional[Dict[str, str]] = Field(default=None, sa_column=Column(JSON))
+    synced_at: Optional[datetime] = None
+
+class Lease(SQLModel, table=True):
+    # named lock held by one worker process until `expires_at` (epoch seconds); see app/leader.py
+    name: str = Field(primary_key=True)
+    holder: str
+    expires_at: float
+    acquired_at: float
+
+class ImportJob(SQLModel, table=True):
+    # background GitHub import, visible to every worker; see app/jobs.py (times are epoch seconds)
+    __table_args__ = (Index("ix_importjob_status", "status"),)
+    id: str = Field(primary_key=True)
+    repos: List[str] = Field(sa_column=Column(JSON, nullable=False))
+    source: str
+    status: str = "queued"
+    # worker that runs the job; it refreshes heartbeat_at until the job finishes
+    holder: str
+    pages_fetched: int = 0
+    issues_upserted: int = 0
+    results: Optional[List[Dict]] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    created_at: float
+    heartbeat_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class UserEvent(SQLModel, table=True):
+    # SSE messages kept for a minute so every worker can relay them to its own streams; see app/events.py
+    __table_args__ = (Index("ix_userevent_created_at", "created_at"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int
+    origin: str
+    message: str
+    created_at: float
+
+class WebhookDelivery(SQLModel, table=True):
+    # X-GitHub-Delivery ids already applied, so redelivered webhooks are no-ops; see app/webhooks.py
+    __table_args__ = (Index("ix_webhookdelivery_received_at", "received_at"),)
+    id: str = Field(primary_key=True)
+    event: str
+    action: Optional[str] = None
+    repo: Optional[str] = None
+    received_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,52 @@
+# backend/app/queries.py
+# Shared SQL filter helpers for issue-related queries.
+import base64
+import json
+from datetime import date
+from typing import Iterable, List, Optional
+from sqlmodel import select
+from .models import Issue, IssueLabel
+
+
+def has_label(label: str):
+    # an uncorrelated IN lets the planner start from the (name, issue_id) index
+    # instead of probing IssueLabel once per candidate issue
+    return Issue.id.in_(select(IssueLabel.issue_id).where(IssueLabel.name == label))
+
+
+def issue_filters(stmt, label: Optional[str] = None, assignee: Optional[str] = None):
+    """Narrow a statement that already selects from/joins `Issue` by label and assignee."""
+    if label:
+        stmt = stmt.where(has_label(label))
+    if assignee:
+        stmt = stmt.where(Issue.assignee == assignee)
+    return stmt
+
+
+def encode_cursor(*key) -> str:
+    """Opaque keyset cursor for the last row of a page, e.g. (date, id) or (id,)."""
+    raw = json.dumps([k.isoformat() if isinstance(k, date) else k for k in key])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Inverse of encode_cursor; raises ValueError for anything malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("invalid cursor")
+    return key
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> List[str]:
+    """Split a `fields=a,b` projection into known names, in `allowed` order."""
+    allowed = list(allowed)
+    if not fields:
+        return allowed
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = sorted(wanted.difference(allowed))
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+    return [f for f in allowed if f in wanted]
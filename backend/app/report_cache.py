@@ -0,0 +1,120 @@
+# backend/app/report_cache.py
+# Bounded LRU cache for weekly report JSON/PDF payloads.
+#
+# Entries are keyed by (kind, week_start, project_id, user_id, label, assignee) and
+# tagged with the version of the data behind them: the ReportVersion of each day in
+# the 7-day window, which the rollup bumps in the same transaction as any TimeEntry
+# change, and the projects' issues_version, which imports and webhooks bump when
+# issue titles/labels/assignees change. A request reads the current version (one
+# small query) and renders again when its entry's tag is behind, so a write served
+# by any worker is seen by all of them.
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from email.utils import formatdate
+
+from sqlmodel import func, select
+
+from .models import Project, ReportVersion
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+
+
+class CachedReport:
+    __slots__ = ("body", "etag", "last_modified", "version")
+
+    def __init__(self, body: bytes, modified: int, version: tuple):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.last_modified = formatdate(modified, usegmt=True)
+        self.version = version
+
+
+_cache: "OrderedDict[tuple, CachedReport]" = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+# HTTP dates have 1s resolution; keep Last-Modified strictly increasing so a
+# re-render within the same second never looks unchanged to If-Modified-Since
+_last_stamp = 0
+
+
+def version_stmt(week_start: date):
+    """(sum of the window's day versions, sum of issues_version); every part only grows."""
+    days = (
+        select(func.coalesce(func.sum(ReportVersion.version), 0))
+        .where(ReportVersion.date >= week_start, ReportVersion.date < week_start + timedelta(days=7))
+        .scalar_subquery()
+    )
+    issues = select(func.coalesce(func.sum(Project.issues_version), 0)).scalar_subquery()
+    return select(days, issues)
+
+
+def version(session, week_start: date) -> tuple:
+    return tuple(session.exec(version_stmt(week_start)).one())
+
+
+def _next_stamp() -> int:
+    global _last_stamp
+    _last_stamp = max(int(time.time()), _last_stamp + 1)
+    return _last_stamp
+
+
+def _lookup(key: tuple, version: tuple):
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit.version == version:
+            _cache.move_to_end(key)
+            stats["hits"] += 1
+            return hit
+        if hit is not None:
+            # written to since it was rendered, here or by another worker
+            del _cache[key]
+            stats["invalidations"] += 1
+        stats["misses"] += 1
+        return None
+
+
+def _store(key: tuple, body: bytes, version: tuple) -> CachedReport:
+    with _lock:
+        report = CachedReport(body, _next_stamp(), version)
+        current = _cache.get(key)
+        # a render that raced a newer one doesn't replace it
+        if current is not None and current.version > version:
+            return report
+        _cache[key] = report
+        _cache.move_to_end(key)
+        while len(_cache) > REPORT_CACHE_SIZE:
+            _cache.popitem(last=False)
+            stats["evictions"] += 1
+    return report
+
+
+def get_or_render(kind: str, week_start: date, filters: tuple, version: tuple, render) -> CachedReport:
+    """Return the cached payload for this report at `version`, calling `render() -> bytes` on a miss.
+
+    `version` is read before rendering, so a write that lands during the render
+    leaves the entry tagged behind and the next request renders again.
+    """
+    key = (kind, week_start) + filters
+    hit = _lookup(key, version)
+    if hit is not None:
+        return hit
+    # render outside the lock; a concurrent miss for the same key just renders twice
+    return _store(key, render(), version)
+
+
+async def get_or_render_async(kind: str, week_start: date, filters: tuple, version: tuple, render) -> CachedReport:
+    """get_or_render for an async `render() -> bytes`; shares the same cache entries."""
+    key = (kind, week_start) + filters
+    hit = _lookup(key, version)
+    if hit is not None:
+        return hit
+    return _store(key, await render(), version)
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {**stats, "size": len(_cache), "max_size": REPORT_CACHE_SIZE}
@@ -1,11 +1,45 @@
+import calendar
+import heapq
 from typing import Optional
 from datetime import date, timedelta
-from sqlmodel import select
+from sqlmodel import select, func
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
+from . import archive
 from .database import get_session
-from .models import TimeEntry, Issue, User, Project
+from .models import TimeEntry, Issue, User, Project, DailyRollup
+from .queries import issue_filters
+
+PDF_YIELD_PER = 2000
+
+
+def rollup_totals_stmt(
+    start: date,
+    end: date,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None
+):
+    """(project name, issue title, day, minutes) in [start, end), summed in SQL from DailyRollup."""
+    stmt = (
+        select(Project.name, Issue.title, DailyRollup.date, func.sum(DailyRollup.minutes))
+        .where(DailyRollup.issue_id == Issue.id)
+        .where(DailyRollup.project_id == Project.id)
+        .where(DailyRollup.date >= start, DailyRollup.date < end)
+        .group_by(DailyRollup.issue_id, DailyRollup.date, Project.name, Issue.title)
+    )
+    if project_id:
+        stmt = stmt.where(DailyRollup.project_id == project_id)
+    if user_id:
+        stmt = stmt.where(DailyRollup.user_id == user_id)
+    return issue_filters(stmt, label, assignee)
+
+
+def rollup_totals(start: date, end: date, *filters):
+    with get_session() as session:
+        return session.exec(rollup_totals_stmt(start, end, *filters)).all()
 
 
 def weekly_aggregate(
@@ -15,106 +49,216 @@ def weekly_aggregate(
     label: Optional[str] = None,
     assignee: Optional[str] = None
 ):
+    rows = rollup_totals(week_start, week_start + timedelta(days=7), project_id, user_id, label, assignee)
+    return weekly_datasets(week_start, rows)
+
+
+def weekly_datasets(week_start: date, rows) -> dict:
+    days = [(week_start + timedelta(days=i)) for i in range(7)]
+    labels_days = [d.isoformat() for d in days]
+
+    by_issue = {}
+    for (project_name, title, day, minutes) in rows:
+        key = f"{project_name} — {title}"
+        arr = by_issue.setdefault(key, [0] * 7)
+        arr[(day - week_start).days] += minutes
+
+    # no stack, grouped bars instead
+    datasets = [{"label": k, "data": v} for k, v in by_issue.items()]
+    return {"labels": labels_days, "datasets": datasets}
+
+
+def add_months(d: date, months: int) -> date:
+    m = d.month - 1 + months
+    year, month = d.year + m // 12, m % 12 + 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def period_end(start: date, period: str) -> date:
+    if period == "week":
+        return start + timedelta(days=7)
+    return add_months(start, {"month": 1, "quarter": 3, "year": 12}[period])
+
+
+def next_bucket(d: date, bucket: str) -> date:
+    if bucket == "month":
+        return add_months(d, 1)
+    return d + timedelta(days=7 if bucket == "week" else 1)
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def range_aggregate(
+    start: date,
+    end: date,
+    bucket: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None
+):
+    """Like weekly_aggregate for any [start, end), bucketed by day, week or month."""
+    rows = rollup_totals(start, end, project_id, user_id, label, assignee)
+    return range_datasets(start, end, bucket, rows)
+
+
+def range_datasets(start: date, end: date, bucket: Optional[str], rows) -> dict:
+    if not bucket:
+        span = (end - start).days
+        bucket = "day" if span <= 31 else "week" if span <= 184 else "month"
+
+    buckets = []
+    d = bucket_start(start, bucket)
+    while d < end:
+        buckets.append(d)
+        d = next_bucket(d, bucket)
+    index = {b: i for i, b in enumerate(buckets)}
+
+    by_issue = {}
+    for (project_name, title, day, minutes) in rows:
+        key = f"{project_name} — {title}"
+        arr = by_issue.setdefault(key, [0] * len(buckets))
+        arr[index[bucket_start(day, bucket)]] += minutes
+
+    datasets = [{"label": k, "data": v} for k, v in by_issue.items()]
+    return {
+        "bucket": bucket,
+        "labels": [b.isoformat() for b in buckets],
+        "datasets": datasets,
+        "total_minutes": sum(sum(ds["data"]) for ds in datasets),
+    }
+
+
+def entry_rows_stmt(
+    start: date,
+    end: date,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None
+):
+    """(date, minutes, issue title, username, project name) of the entries in [start, end), by date."""
+    stmt = (
+        select(TimeEntry.date, TimeEntry.duration_minutes, Issue.title, User.username, Project.name)
+        .where(TimeEntry.issue_id == Issue.id)
+        .where(TimeEntry.user_id == User.id)
+        .where(TimeEntry.project_id == Project.id)
+        .where(TimeEntry.date >= start, TimeEntry.date < end)
+        .order_by(TimeEntry.date, TimeEntry.id)
+    )
+    if project_id:
+        stmt = stmt.where(TimeEntry.project_id == project_id)
+    if user_id:
+        stmt = stmt.where(TimeEntry.user_id == user_id)
+    return issue_filters(stmt, label, assignee)
+
+
+def entry_rows(
+    session,
+    start: date,
+    end: date,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None
+):
+    """Stream (date, minutes, issue title, username, project name) rows for [start, end).
+
+    Only plain columns are selected and fetched `PDF_YIELD_PER` at a time, so a
+    long range never holds every TimeEntry in memory. Archived entries of the
+    range are merged in by date.
+    """
+    stmt = entry_rows_stmt(start, end, project_id, user_id, label, assignee)
+    rows = session.exec(stmt.execution_options(yield_per=PDF_YIELD_PER))
+    if not archive.has_entries(start, end):
+        return rows
+    archived = archive.entries(
+        ["date", "duration_minutes", "issue_title", "user", "project"],
+        start, end, project_id, user_id, label, assignee,
+    )
+    return heapq.merge(archived, rows, key=lambda r: r[0])
+
+
+def pdf_report(
+    out,
+    start: date,
+    end: date,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    title: str = "Report"
+):
+    """Render entries in [start, end) as a PDF into `out` (a path or binary file object)."""
     with get_session() as session:
-        we = week_start + timedelta(days=7)
-
-        stmt = (
-            select(TimeEntry, Issue.title, Issue.labels, Issue.assignee,
-                   User.username, Project.name)
-            .where(TimeEntry.issue_id == Issue.id)
-            .where(TimeEntry.user_id == User.id)
-            .where(TimeEntry.project_id == Project.id)
-            .where(TimeEntry.date >= week_start, TimeEntry.date < we)
-        )
-        if project_id:
-            stmt = stmt.where(TimeEntry.project_id == project_id)
-        if user_id:
-            stmt = stmt.where(TimeEntry.user_id == user_id)
-
-        rows = session.exec(stmt).all()
-
-        # Filter label/assignee after join
-        filtered = []
-        for (te, title, labels, iss_assignee, username, project_name) in rows:
-            if label and (not labels or label not in labels):
-                continue
-            if assignee and iss_assignee != assignee:
-                continue
-            filtered.append((te, title, labels or [], iss_assignee, username, project_name))
-
-        days = [(week_start + timedelta(days=i)) for i in range(7)]
-        labels_days = [d.isoformat() for d in days]
-
-        by_issue = {}
-        for (te, title, _labels, _assignee, username, project_name) in filtered:
-            key = f"{project_name} — {title}"
-            arr = by_issue.setdefault(key, [0] * 7)
-            idx = (te.date - week_start).days
-            if 0 <= idx < 7:
-                arr[idx] += te.duration_minutes
-
-        # no stack, grouped bars instead
-        datasets = [{"label": k, "data": v} for k, v in by_issue.items()]
-        return {"labels": labels_days, "datasets": datasets}
+        rows = entry_rows(session, start, end, project_id, user_id, label, assignee)
+        render_pdf(out, rows, start, end, project_id, user_id, title)
+
+
+def render_pdf(
+    out,
+    rows,
+    start: date,
+    end: date,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    title: str = "Report"
+):
+    """Draw (date, minutes, issue title, username, project name) `rows` as a PDF into `out`.
+
+    Needs no database, so batch_reports can run it in worker processes.
+    """
+    c = canvas.Canvas(out, pagesize=A4, pageCompression=1)
+    W, H = A4
+    y = H - 2 * cm
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(2 * cm, y, f"{title} — {start.isoformat()} to {(end - timedelta(days=1)).isoformat()}")
+    y -= 1 * cm
+    c.setFont("Helvetica", 10)
+    c.drawString(2 * cm, y, f"Project: {project_id or 'All'}   User: {user_id or 'All'}")
+    y -= 0.8 * cm
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(2 * cm, y, "Date")
+    c.drawString(5 * cm, y, "User")
+    c.drawString(9 * cm, y, "Project")
+    c.drawString(13 * cm, y, "Issue")
+    c.drawString(18 * cm, y, "Minutes")
+    y -= 0.4 * cm
+    c.setFont("Helvetica", 10)
+    total = 0
+
+    for (day, minutes, issue_title, username, project_name) in rows:
+        if y < 2 * cm:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            y = H - 2 * cm
+        c.drawString(2 * cm, y, day.isoformat())
+        c.drawString(5 * cm, y, username[:20])
+        c.drawString(9 * cm, y, project_name[:20])
+        c.drawString(13 * cm, y, (issue_title or '')[:30])
+        c.drawRightString(19.5 * cm, y, str(minutes))
+        y -= 0.3 * cm
+        total += minutes
+
+    y -= 0.5 * cm
+    c.setFont("Helvetica-Bold", 10)
+    c.drawRightString(19.5 * cm, y, f"Total minutes: {total}")
+    c.save()
 
 
 def weekly_pdf(
-    path: str,
+    out,
     week_start: date,
     project_id: Optional[int] = None,
     user_id: Optional[int] = None,
     label: Optional[str] = None,
     assignee: Optional[str] = None
 ):
-    with get_session() as session:
-        we = week_start + timedelta(days=7)
-
-        stmt = (
-            select(TimeEntry, Issue.title, User.username, Project.name)
-            .where(TimeEntry.issue_id == Issue.id)
-            .where(TimeEntry.user_id == User.id)
-            .where(TimeEntry.project_id == Project.id)
-            .where(TimeEntry.date >= week_start, TimeEntry.date < we)
-        )
-        if project_id:
-            stmt = stmt.where(TimeEntry.project_id == project_id)
-        if user_id:
-            stmt = stmt.where(TimeEntry.user_id == user_id)
-
-        rows = session.exec(stmt).all()
-
-        c = canvas.Canvas(path, pagesize=A4)
-        W, H = A4
-        y = H - 2 * cm
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(2 * cm, y, f"Weekly Report — {week_start.isoformat()} to {(we- timedelta(days=1)).isoformat()}")
-        y -= 1 * cm
-        c.setFont("Helvetica", 10)
-        c.drawString(2 * cm, y, f"Project: {project_id or 'All'}   User: {user_id or 'All'}")
-        y -= 0.8 * cm
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(2 * cm, y, "Date")
-        c.drawString(5 * cm, y, "User")
-        c.drawString(9 * cm, y, "Project")
-        c.drawString(13 * cm, y, "Issue")
-        c.drawString(18 * cm, y, "Minutes")
-        y -= 0.4 * cm
-        c.setFont("Helvetica", 10)
-        total = 0
-
-        for (te, title, username, project_name) in rows:
-            if y < 2 * cm:
-                c.showPage()
-                y = H - 2 * cm
-            c.drawString(2 * cm, y, te.date.isoformat())
-            c.drawString(5 * cm, y, username[:20])
-            c.drawString(9 * cm, y, project_name[:20])
-            c.drawString(13 * cm, y, (title or '')[:30])
-            c.drawRightString(19.5 * cm, y, str(te.duration_minutes))
-            y -= 0.3 * cm
-            total += te.duration_minutes
-
-        y -= 0.5 * cm
-        c.setFont("Helvetica-Bold", 10)
-        c.drawRightString(19.5 * cm, y, f"Total minutes: {total}")
-        c.save()
+    pdf_report(out, week_start, week_start + timedelta(days=7),
+               project_id, user_id, label, assignee, title="Weekly Report")
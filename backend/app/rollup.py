@@ -0,0 +1,84 @@
+# backend/app/rollup.py
+# Maintains DailyRollup alongside TimeEntry writes. Callers pass their own session
+# so the rollup changes commit (or roll back) together with the entry itself, and
+# so does the day's ReportVersion bump that tells every worker's report cache.
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import DailyRollup, ReportVersion, TimeEntry
+
+_inserts = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def version_statement(dialect: str):
+    """Bumps the ReportVersion of each `date` it is executed with."""
+    table = ReportVersion.__table__
+    stmt = _inserts[dialect](table).values(version=1)
+    return stmt.on_conflict_do_update(index_elements=["date"], set_={"version": table.c.version + 1})
+
+
+def minutes_statements(dialect: str, user_id: int, project_id: int, issue_id: int, day, minutes: int) -> list:
+    """Statements that add (or with a negative value, remove) minutes from one rollup cell."""
+    key = {"date": day, "user_id": user_id, "project_id": project_id, "issue_id": issue_id}
+    stmt = _inserts[dialect](DailyRollup).values(**key, minutes=minutes)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={"minutes": DailyRollup.minutes + stmt.excluded.minutes},
+    )
+    bump = version_statement(dialect).values(date=day)
+    if minutes >= 0:
+        return [stmt, bump]
+    return [stmt, bump, (
+        delete(DailyRollup)
+        .where(*(getattr(DailyRollup, k) == v for k, v in key.items()))
+        .where(DailyRollup.minutes <= 0)
+    )]
+
+
+def add_cells(session, cells: dict):
+    """Bulk add_minutes: {(date, user_id, project_id, issue_id): minutes} in one executemany."""
+    if not cells:
+        return
+    dialect = session.get_bind().dialect.name
+    table = DailyRollup.__table__
+    stmt = _inserts[dialect](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["date", "user_id", "project_id", "issue_id"],
+        set_={"minutes": table.c.minutes + stmt.excluded.minutes},
+    )
+    session.connection().execute(stmt, [
+        {"date": d, "user_id": u, "project_id": p, "issue_id": i, "minutes": m}
+        for (d, u, p, i), m in cells.items()
+    ])
+    session.connection().execute(version_statement(dialect), [{"date": d} for d in sorted({k[0] for k in cells})])
+
+
+def _entry_statements(session, entry: TimeEntry, sign: int) -> list:
+    return minutes_statements(
+        session.get_bind().dialect.name,
+        entry.user_id, entry.project_id, entry.issue_id, entry.date, sign * entry.duration_minutes,
+    )
+
+
+def add_minutes(session, user_id: int, project_id: int, issue_id: int, day, minutes: int):
+    for stmt in minutes_statements(session.get_bind().dialect.name, user_id, project_id, issue_id, day, minutes):
+        session.execute(stmt)
+
+
+def entry_added(session, entry: TimeEntry):
+    for stmt in _entry_statements(session, entry, 1):
+        session.execute(stmt)
+
+
+def entry_removed(session, entry: TimeEntry):
+    for stmt in _entry_statements(session, entry, -1):
+        session.execute(stmt)
+
+
+async def entry_added_async(session, entry: TimeEntry):
+    for stmt in _entry_statements(session, entry, 1):
+        await session.execute(stmt)
+
+
+async def entry_removed_async(session, entry: TimeEntry):
+    for stmt in _entry_statements(session, entry, -1):
+        await session.execute(stmt)
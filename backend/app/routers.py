@@ -1,117 +1,351 @@
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import FileResponse
-from sqlmodel import select
+from fastapi import APIRouter, Body, Request, HTTPException, Query, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+import sqlalchemy as sa
+from sqlmodel import Session, select, func
 from datetime import date, datetime, timedelta
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, List
+import asyncio
+import heapq
+import io
+import itertools
+import json
 import os
-import tempfile
+from email.utils import parsedate_to_datetime
 
-from .database import get_session
-from .models import Project, Issue, TimeEntry, Timer, User
-from .reports import weekly_aggregate, weekly_pdf
-from .github_import import import_all
+from .database import get_session, db_session
+from .models import Project, Issue, TimeEntry, Timer, User, DailyRollup
+from .auth import SessionUser, session_user
+from .reports import weekly_aggregate, weekly_pdf, range_aggregate, period_end, pdf_report, rollup_totals_stmt
+from . import rollup, report_cache, events, ingest, export, search, analytics, batch_reports, issue_snapshot, archive
+from .queries import issue_filters, parse_fields, encode_cursor, decode_cursor
+from .jobs import enqueue_import, get_job
 
 api = APIRouter(prefix="/api")
 
-
-def current_user(request: Request) -> User:
-    uid = request.cookies.get("user_id")
-    if not uid:
-        raise HTTPException(status_code=401, detail="not authenticated")
-    with get_session() as session:
-        user = session.get(User, int(uid))
-        if not user:
-            raise HTTPException(status_code=401, detail="user not found")
-        return user
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_RETRY_MS = 5000
+# serve /issues from the in-memory issue snapshot instead of querying per request
+ISSUE_SNAPSHOT = os.getenv("ISSUE_SNAPSHOT", "true").lower() in ("1", "true", "yes")
 
 
 @api.get("/users")
-def list_users():
-    with get_session() as session:
-        return session.exec(select(User)).all()
+def list_users(session: Session = Depends(db_session)):
+    return session.exec(select(User)).all()
 
 
 @api.get("/projects")
-def list_projects():
-    with get_session() as session:
-        return session.exec(select(Project)).all()
+def list_projects(session: Session = Depends(db_session)):
+    return session.exec(select(Project)).all()
+
+
+ISSUE_FIELDS = {c.name: c for c in Issue.__table__.columns}
+TIME_ENTRY_FIELDS = {
+    "id": TimeEntry.id,
+    "date": TimeEntry.date,
+    "duration_minutes": TimeEntry.duration_minutes,
+    "notes": TimeEntry.notes,
+    "issue_id": TimeEntry.issue_id,
+    "issue_title": Issue.title,
+    "user": User.username,
+    "project": Project.name,
+}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 10_000
+
+
+def projection(fields: Optional[str], allowed: Dict, keys: List[str]):
+    # requested output names, plus the keyset columns the cursor needs
+    try:
+        names = parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    selected = names + [k for k in keys if k not in names]
+    return names, [allowed[n].label(n) for n in selected]
+
+
+def page_request(paginate: Optional[bool], cursor: Optional[str], limit: Optional[int]):
+    """(paginate, limit) for a list endpoint: the bare list stays the default, and
+    passing `cursor` or `limit` (or paginate=true) asks for a page object."""
+    if paginate is None:
+        paginate = cursor is not None or limit is not None
+    return paginate, limit or DEFAULT_PAGE_SIZE
+
+
+def cursor_key(cursor: Optional[str], *types):
+    # decode a cursor and convert each key part, e.g. cursor_key(c, date.fromisoformat, int)
+    if not cursor:
+        return None
+    try:
+        return tuple(t(k) for t, k in zip(types, decode_cursor(cursor, len(types))))
+    except (TypeError, ValueError):
+        raise HTTPException(400, "invalid cursor")
+
+
+def page(rows, names: List[str], limit: int, total: int, keys: List[str]) -> Dict:
+    more = len(rows) > limit
+    # rows are Row objects, or plain mappings where archived entries were merged in
+    rows = [getattr(row, "_mapping", row) for row in rows[:limit]]
+    return {
+        "items": [{n: row[n] for n in names} for row in rows],
+        "next_cursor": encode_cursor(*(rows[-1][k] for k in keys)) if more else None,
+        "total": total,
+    }
 
 
 @api.get("/issues")
 def list_issues(
+    request: Request,
+    project_id: Optional[int] = None,
+    state: Optional[str] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    paginate: Optional[bool] = None,
+    session: Session = Depends(db_session),
+):
+    """Issues ordered by id: a plain list, or with `limit`/`cursor` a page at a time.
+
+    `fields=id,title,...` limits the columns read and returned (e.g. to skip `body`);
+    a page is `{items, next_cursor, total}`, and its `next_cursor` goes back as
+    `cursor` for the next page. Responses carry an ETag that changes only when the
+    project's issues do.
+    """
+    paginate, limit = page_request(paginate, cursor, limit)
+    names, columns = projection(fields, ISSUE_FIELDS, ["id"])
+    after = cursor_key(cursor, int)
+    if ISSUE_SNAPSHOT:
+        return snapshot_issues(request, session, project_id, state, label, assignee, names, after, limit, paginate)
+    conds = []
+    if project_id is not None:
+        conds.append(Issue.project_id == project_id)
+    if state:
+        conds.append(Issue.state == state)
+    stmt = issue_filters(sa.select(*columns).where(*conds), label, assignee).order_by(Issue.id)
+    if not paginate:
+        return [{n: row._mapping[n] for n in names} for row in session.exec(stmt)]
+    total = session.exec(
+        issue_filters(sa.select(func.count()).select_from(Issue).where(*conds), label, assignee)
+    ).scalar_one()
+    if after:
+        stmt = stmt.where(Issue.id > after[0])
+    rows = session.exec(stmt.limit(limit + 1)).all()
+    return page(rows, names, limit, total, ["id"])
+
+
+def snapshot_issues(request, session, project_id, state, label, assignee, names, after, limit, paginate):
+    version = issue_snapshot.versions(session, project_id)
+    if version is None:
+        body = b"[]" if not paginate else b'{"items":[],"next_cursor":null,"total":0}'
+        return Response(body, media_type="application/json")
+    tag = issue_snapshot.etag(
+        version, state, label, assignee, tuple(names), after, limit if paginate else None
+    )
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+    inm = request.headers.get("if-none-match")
+    if inm and (tag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"):
+        return Response(status_code=304, headers=headers)
+    snap = issue_snapshot.get(session, project_id, version)
+    body = issue_snapshot.render(
+        snap, names, state, label, assignee, after[0] if after else None, limit if paginate else None
+    )
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@api.get("/issues/search")
+def search_issues(
+    q: str,
     project_id: Optional[int] = None,
     state: Optional[str] = None,
     label: Optional[str] = None,
     assignee: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(db_session),
 ):
-    with get_session() as session:
-        stmt = select(Issue)
-        if project_id is not None:
-            stmt = stmt.where(Issue.project_id == project_id)
-        if state:
-            stmt = stmt.where(Issue.state == state)
-        issues = session.exec(stmt).all()
-        if label:
-            issues = [i for i in issues if i.labels and label in i.labels]
-        if assignee:
-            issues = [i for i in issues if i.assignee == assignee]
-        return issues
+    """Issues matching `q` in title, body or labels, best match first, paged like /issues.
+
+    Each item also has `title_hl` and a body `snippet` with the matches wrapped in <mark>.
+    """
+    names, columns = projection(fields, ISSUE_FIELDS, ["id"])
+    after = cursor_key(cursor, float, int)
+    try:
+        stmt, count = search.search_stmt(session.get_bind().dialect.name, q, columns, after)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    conds = []
+    if project_id is not None:
+        conds.append(Issue.project_id == project_id)
+    if state:
+        conds.append(Issue.state == state)
+    stmt = issue_filters(stmt.where(*conds), label, assignee)
+    total = session.exec(issue_filters(count.where(*conds), label, assignee)).scalar_one()
+    rows = session.exec(stmt.limit(limit + 1)).all()
+    return page(rows, names + ["title_hl", "snippet"], limit, total, ["rank", "id"])
 
 
 @api.get("/issues/{issue_id}")
-def get_issue(issue_id: int):
-    with get_session() as session:
-        it = session.get(Issue, issue_id)
-        if not it:
-            raise HTTPException(404, "Issue not found")
-        return it
+def get_issue(issue_id: int, session: Session = Depends(db_session)):
+    it = session.get(Issue, issue_id)
+    if not it:
+        raise HTTPException(404, "Issue not found")
+    return it
 
 
 @api.get("/issues/by-gh/{owner}/{repo}/{number}")
-def get_issue_by_github(owner: str, repo: str, number: int):
-    with get_session() as session:
-        project = session.exec(
-            select(Project).where(Project.github_repo == f"{owner}/{repo}")
-        ).first()
-        if not project:
-            raise HTTPException(404, "Project not found")
-        issue = session.exec(
-            select(Issue).where(
-                Issue.project_id == project.id, Issue.github_number == number
-            )
-        ).first()
-        if not issue:
-            raise HTTPException(404, "Issue not found")
-        return issue
+def get_issue_by_github(owner: str, repo: str, number: int, session: Session = Depends(db_session)):
+    project = session.exec(
+        select(Project).where(Project.github_repo == f"{owner}/{repo}")
+    ).first()
+    if not project:
+        raise HTTPException(404, "Project not found")
+    issue = session.exec(
+        select(Issue).where(
+            Issue.project_id == project.id, Issue.github_number == number
+        )
+    ).first()
+    if not issue:
+        raise HTTPException(404, "Issue not found")
+    return issue
+
+
+def new_entry(user_id: int, issue: Issue, payload: Dict) -> TimeEntry:
+    minutes = int(payload.get("duration_minutes", 0))
+    if minutes <= 0:
+        raise HTTPException(400, "duration_minutes must be > 0")
+    d = (
+        date.fromisoformat(payload.get("date"))
+        if payload.get("date")
+        else date.today()
+    )
+    return TimeEntry(
+        user_id=user_id,
+        project_id=issue.project_id,
+        issue_id=issue.id,
+        date=d,
+        duration_minutes=minutes,
+        notes=payload.get("notes"),
+    )
 
 
 @api.post("/issues/{issue_id}/time-entries")
-def add_time_entry(issue_id: int, payload: Dict, request: Request):
-    user = current_user(request)
-    with get_session() as session:
-        issue = session.get(Issue, issue_id)
-        if not issue:
-            raise HTTPException(404, "Issue not found")
-        minutes = int(payload.get("duration_minutes", 0))
-        if minutes <= 0:
-            raise HTTPException(400, "duration_minutes must be > 0")
-        d = (
-            date.fromisoformat(payload.get("date"))
-            if payload.get("date")
-            else date.today()
-        )
-        entry = TimeEntry(
-            user_id=user.id,
-            project_id=issue.project_id,
-            issue_id=issue.id,
-            date=d,
-            duration_minutes=minutes,
-            notes=payload.get("notes"),
-        )
-        session.add(entry)
-        session.commit()
-        session.refresh(entry)
-        return entry
+def add_time_entry(
+    issue_id: int,
+    payload: Dict,
+    user: SessionUser = Depends(session_user),
+    session: Session = Depends(db_session),
+):
+    issue = session.get(Issue, issue_id)
+    if not issue:
+        raise HTTPException(404, "Issue not found")
+    entry = new_entry(user.id, issue, payload)
+    session.add(entry)
+    rollup.entry_added(session, entry)
+    session.commit()
+    session.refresh(entry)
+    events.publish(user.id, "entry", entry_event(entry))
+    return entry
+
+
+def entry_bounds(week_start: Optional[str], start: Optional[date] = None, end: Optional[date] = None):
+    """[lo, hi) dates of a time entry query from `week_start` and `start`/`end`; None where open."""
+    lo, hi = start, end
+    if week_start:
+        ws = date.fromisoformat(week_start)
+        we = ws + timedelta(days=7)
+        lo = max(lo, ws) if lo else ws
+        hi = min(hi, we) if hi else we
+    return lo, hi
+
+
+def time_entries_query(
+    week_start: Optional[str],
+    project_id: Optional[int],
+    user_id: Optional[int],
+    label: Optional[str],
+    assignee: Optional[str],
+    fields: Optional[str],
+    cursor: Optional[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """(output names, page statement, count statement) for GET /time-entries.
+
+    `start`/`end` bound the date range as [start, end), on top of `week_start`.
+    """
+    names, columns = projection(fields, TIME_ENTRY_FIELDS, ["date", "id"])
+    after = cursor_key(cursor, date.fromisoformat, int)
+    lo, hi = entry_bounds(week_start, start, end)
+    conds = []
+    if project_id:
+        conds.append(TimeEntry.project_id == project_id)
+    if user_id:
+        conds.append(TimeEntry.user_id == user_id)
+    if lo:
+        conds.append(TimeEntry.date >= lo)
+    if hi:
+        conds.append(TimeEntry.date < hi)
+    stmt = issue_filters(
+        sa.select(*columns)
+        .where(TimeEntry.issue_id == Issue.id)
+        .where(TimeEntry.user_id == User.id)
+        .where(TimeEntry.project_id == Project.id)
+        .where(*conds),
+        label, assignee,
+    ).order_by(TimeEntry.date, TimeEntry.id)
+    if after:
+        stmt = stmt.where(sa.tuple_(TimeEntry.date, TimeEntry.id) > after)
+    # the count only joins Issue when a label/assignee filter needs it
+    count = sa.select(func.count()).select_from(TimeEntry).where(*conds)
+    if label or assignee:
+        count = issue_filters(count.where(TimeEntry.issue_id == Issue.id), label, assignee)
+    return names, stmt, count
+
+
+class ArchivedEntries:
+    """The archived side of a time_entries_query: the same filters, read from app/archive.py."""
+
+    def __init__(self, names: List[str], lo, hi, project_id, user_id, label, assignee, after):
+        # archived rows come in the statement's column order, so both merge positionally
+        self.columns = names + [k for k in ("date", "id") if k not in names]
+        self.filters = (lo, hi, project_id, user_id, label, assignee)
+        self.after = after
+
+    def count(self) -> int:
+        return archive.count(*self.filters)
+
+    def merge(self, hot, limit: Optional[int] = None):
+        """`hot` rows and the archived ones as one stream ordered by (date, id)."""
+        d, i = self.columns.index("date"), self.columns.index("id")
+        archived = archive.entries(self.columns, *self.filters, after=self.after)
+        rows = heapq.merge(hot, archived, key=lambda r: (r[d], r[i]))
+        return itertools.islice(rows, limit) if limit is not None else rows
+
+    def page_rows(self, hot, limit: int) -> List[Dict]:
+        return [dict(zip(self.columns, r)) for r in self.merge(hot, limit + 1)]
+
+
+def archived_entries(
+    names: List[str],
+    week_start: Optional[str],
+    project_id: Optional[int],
+    user_id: Optional[int],
+    label: Optional[str],
+    assignee: Optional[str],
+    cursor: Optional[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Optional[ArchivedEntries]:
+    """ArchivedEntries for a time_entries_query with these arguments, or None if no archived month is in range."""
+    lo, hi = entry_bounds(week_start, start, end)
+    after = cursor_key(cursor, date.fromisoformat, int)
+    if not archive.has_entries(lo, hi):
+        return None
+    return ArchivedEntries(names, lo, hi, project_id, user_id, label, assignee, after)
 
 
 @api.get("/time-entries")
@@ -121,178 +355,522 @@ def list_time_entries(
     user_id: Optional[int] = None,
     label: Optional[str] = None,
     assignee: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    paginate: Optional[bool] = None,
+    session: Session = Depends(db_session),
 ):
-    with get_session() as session:
-        stmt = (
-            select(TimeEntry, Issue.title, User.username, Project.name)
-            .where(TimeEntry.issue_id == Issue.id)
-            .where(TimeEntry.user_id == User.id)
-            .where(TimeEntry.project_id == Project.id)
-        )
-        if project_id:
-            stmt = stmt.where(TimeEntry.project_id == project_id)
-        if user_id:
-            stmt = stmt.where(TimeEntry.user_id == user_id)
-        if week_start:
-            ws = date.fromisoformat(week_start)
-            we = ws + timedelta(days=7)
-            stmt = stmt.where(TimeEntry.date >= ws).where(TimeEntry.date < we)
-
-        rows = session.exec(stmt).all()
-
-        # apply label/assignee filtering
-        if label or assignee:
-            filtered = []
-            for te, title, username, project_name in rows:
-                issue = session.get(Issue, te.issue_id)
-                if label and (not issue.labels or label not in issue.labels):
-                    continue
-                if assignee and issue.assignee != assignee:
-                    continue
-                filtered.append((te, title, username, project_name))
-            rows = filtered
-
-        return [
-            {
-                "id": te.id,
-                "date": te.date.isoformat(),
-                "duration_minutes": te.duration_minutes,
-                "notes": te.notes,
-                "issue_id": te.issue_id,
-                "issue_title": title,
-                "user": username,
-                "project": project_name,
-            }
-            for (te, title, username, project_name) in rows
-        ]
+    """Time entries ordered by (date, id); a plain list, or paged like /issues."""
+    paginate, limit = page_request(paginate, cursor, limit)
+    names, stmt, count = time_entries_query(week_start, project_id, user_id, label, assignee, fields, cursor)
+    archived = archived_entries(names, week_start, project_id, user_id, label, assignee, cursor)
+    if not paginate:
+        if archived:
+            return [dict(zip(names, row)) for row in archived.merge(session.exec(stmt))]
+        return [{n: row._mapping[n] for n in names} for row in session.exec(stmt)]
+    total = session.exec(count).scalar_one()
+    rows = session.exec(stmt.limit(limit + 1)).all()
+    if archived:
+        total += archived.count()
+        rows = archived.page_rows(rows, limit)
+    return page(rows, names, limit, total, ["date", "id"])
+
+
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def export_response(fmt: str, names: List[str], stmt, filename: str, gzip: bool,
+                    archived: Optional[ArchivedEntries] = None):
+    """Stream `stmt` (merged with `archived`) as CSV or NDJSON with chunked encoding, optionally as a .gz download."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(404, "export format must be csv or ndjson")
+    rows = export.stream_rows(stmt)
+    if archived:
+        rows = archived.merge(rows)
+    lines = (export.csv_lines if fmt == "csv" else export.ndjson_lines)(names, rows)
+    filename = f"{filename}.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export.blocks(lines, gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@api.get("/time-entries/export.{fmt}")
+def export_time_entries(
+    fmt: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    week_start: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    fields: Optional[str] = None,
+    gzip: bool = False,
+):
+    """All matching time entries (same filters as /time-entries, `end` inclusive), unpaginated."""
+    try:
+        s = date.fromisoformat(start) if start else None
+        e = date.fromisoformat(end) + timedelta(days=1) if end else None
+    except ValueError:
+        raise HTTPException(400, "start and end must be YYYY-MM-DD")
+    names, stmt, _ = time_entries_query(week_start, project_id, user_id, label, assignee, fields, None, s, e)
+    archived = archived_entries(names, week_start, project_id, user_id, label, assignee, None, s, e)
+    return export_response(fmt, names, stmt, "time-entries", gzip, archived)
+
+
+def ingest_result(inserted: int, errors: List[dict], error_count: int) -> Dict:
+    return {"inserted": inserted, "error_count": error_count, "errors": errors[:ingest.MAX_REPORTED_ERRORS]}
+
+
+@api.post("/time-entries/batch")
+def add_time_entries_batch(
+    entries: List[Any] = Body(...),
+    user: SessionUser = Depends(session_user),
+    session: Session = Depends(db_session),
+):
+    """Insert a JSON array of entries (issue_id, duration_minutes, date, notes) in one transaction.
+
+    Rows that fail validation are listed in `errors` by 1-based position; the rest are inserted.
+    """
+    if len(entries) > MAX_BATCH_SIZE:
+        raise HTTPException(413, f"at most {MAX_BATCH_SIZE} entries per batch; use /time-entries/import")
+    inserted, errors = ingest.insert_entries(session, user.id, enumerate(entries, 1))
+    session.commit()
+    if inserted:
+        events.publish(user.id, "entries_imported", {"inserted": inserted})
+    return ingest_result(inserted, errors, len(errors))
+
+
+@api.post("/time-entries/import")
+async def import_time_entries(
+    request: Request, format: Optional[str] = None, user: SessionUser = Depends(session_user)
+):
+    """Stream a CSV (with header row) or NDJSON upload into time entries.
+
+    The body is parsed incrementally and committed every INGEST_CHUNK_SIZE rows, so
+    memory stays bounded; rows that fail validation are reported, not fatal. A line
+    longer than MAX_RECORD_BYTES ends the upload with 413. The format comes from
+    `format=csv|ndjson` or the Content-Type.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(400, "format must be csv or ndjson")
+    inserted, error_count, errors, chunk = 0, 0, [], []
+
+    async def flush():
+        nonlocal inserted, error_count
+        n, errs = await run_in_threadpool(ingest.ingest_chunk, user.id, chunk)
+        inserted += n
+        error_count += len(errs)
+        # only the first MAX_REPORTED_ERRORS are kept, so a bad upload can't grow memory
+        errors.extend(errs[:ingest.MAX_REPORTED_ERRORS - len(errors)])
+        chunk.clear()
+
+    too_large = None
+    try:
+        async for record in ingest.iter_records(request.stream(), fmt):
+            chunk.append(record)
+            if len(chunk) >= ingest.INGEST_CHUNK_SIZE:
+                await flush()
+    except ingest.RecordTooLarge as e:
+        too_large = e
+    if chunk:
+        await flush()
+    if inserted:
+        await run_in_threadpool(events.publish, user.id, "entries_imported", {"inserted": inserted})
+    if too_large:
+        raise HTTPException(413, f"{too_large}; the {inserted} rows before it were imported")
+    return ingest_result(inserted, errors, error_count)
 
 
 @api.delete("/time-entries/{entry_id}")
-def delete_time_entry(entry_id: int, request: Request):
-    user = current_user(request)
-    with get_session() as session:
-        entry = session.get(TimeEntry, entry_id)
-        if not entry:
-            raise HTTPException(404, "Time entry not found")
-        if entry.user_id != user.id:
-            raise HTTPException(403, "Not allowed")
-        session.delete(entry)
-        session.commit()
+def delete_time_entry(
+    entry_id: int, user: SessionUser = Depends(session_user), session: Session = Depends(db_session)
+):
+    entry = session.get(TimeEntry, entry_id)
+    if not entry:
+        raise HTTPException(404, "Time entry not found")
+    if entry.user_id != user.id:
+        raise HTTPException(403, "Not allowed")
+    rollup.entry_removed(session, entry)
+    session.delete(entry)
+    session.commit()
+    events.publish(user.id, "entry_deleted", {"id": entry_id})
     return {"ok": True}
 
 
 @api.post("/issues/{issue_id}/timer/start")
-def start_timer(issue_id: int, request: Request):
-    user = current_user(request)
-    with get_session() as session:
-        issue = session.get(Issue, issue_id)
-        if not issue:
-            raise HTTPException(404, "Issue not found")
-        running = session.exec(
-            select(Timer).where(Timer.user_id == user.id, Timer.running)
-        ).all()
-        for t in running:
-            t.running = False
-        timer = Timer(
-            user_id=user.id,
-            project_id=issue.project_id,
-            issue_id=issue.id,
-            running=True,
-        )
-        session.add(timer)
-        session.commit()
-        session.refresh(timer)
-        return {"timer_id": timer.id, "started": timer.start_ts.isoformat()}
+def start_timer(
+    issue_id: int, user: SessionUser = Depends(session_user), session: Session = Depends(db_session)
+):
+    issue = session.get(Issue, issue_id)
+    if not issue:
+        raise HTTPException(404, "Issue not found")
+    running = session.exec(
+        select(Timer).where(Timer.user_id == user.id, Timer.running)
+    ).all()
+    for t in running:
+        t.running = False
+    timer = Timer(
+        user_id=user.id,
+        project_id=issue.project_id,
+        issue_id=issue.id,
+        running=True,
+    )
+    session.add(timer)
+    session.commit()
+    session.refresh(timer)
+    events.publish(user.id, "timer", timer_started_event(issue))
+    return {"timer_id": timer.id, "started": timer.start_ts.isoformat()}
+
+
+def timer_started_event(issue: Issue) -> Dict:
+    return {"running": True, "issue_id": issue.id, "issue_title": issue.title, "elapsed_seconds": 0}
+
+
+def stopped_entry(timer: Timer, payload: Dict) -> TimeEntry:
+    # stops `timer` and returns the TimeEntry covering its run (at least one minute)
+    timer.running = False
+    delta = datetime.utcnow() - timer.start_ts
+    return TimeEntry(
+        user_id=timer.user_id,
+        project_id=timer.project_id,
+        issue_id=timer.issue_id,
+        date=date.today(),
+        duration_minutes=max(1, int(delta.total_seconds() // 60)),
+        notes=payload.get("notes"),
+    )
 
 
 @api.post("/timer/stop")
-def stop_timer(request: Request, payload: Dict = {}):
-    user = current_user(request)
-    with get_session() as session:
-        timer = session.exec(
-            select(Timer).where(Timer.user_id == user.id, Timer.running)
-        ).first()
-        if not timer:
-            raise HTTPException(400, "No running timer")
-        timer.running = False
-        delta = datetime.utcnow() - timer.start_ts
-        minutes = max(1, int(delta.total_seconds() // 60))
-        entry = TimeEntry(
-            user_id=user.id,
-            project_id=timer.project_id,
-            issue_id=timer.issue_id,
-            date=date.today(),
-            duration_minutes=minutes,
-            notes=payload.get("notes"),
-        )
-        session.add(entry)
-        session.commit()
-        return {"stopped": True, "duration_minutes": minutes, "entry_id": entry.id}
+def stop_timer(
+    payload: Dict = {}, user: SessionUser = Depends(session_user), session: Session = Depends(db_session)
+):
+    timer = session.exec(
+        select(Timer).where(Timer.user_id == user.id, Timer.running)
+    ).first()
+    if not timer:
+        raise HTTPException(400, "No running timer")
+    entry = stopped_entry(timer, payload)
+    session.add(entry)
+    rollup.entry_added(session, entry)
+    session.commit()
+    events.publish(user.id, "timer", {"running": False})
+    events.publish(user.id, "entry", entry_event(entry))
+    return {"stopped": True, "duration_minutes": entry.duration_minutes, "entry_id": entry.id}
+
+
+def running_timer_stmt(user_id: int):
+    # the running timer joined with its issue title, in one round trip
+    return (
+        select(Timer.start_ts, Issue.id, Issue.title)
+        .where(Timer.user_id == user_id, Timer.running, Timer.issue_id == Issue.id)
+        .limit(1)
+    )
+
+
+def timer_payload(row) -> Dict:
+    if not row:
+        return {"running": False}
+    start_ts, issue_id, title = row
+    return {
+        "running": True,
+        "issue_id": issue_id,
+        "issue_title": title,
+        "elapsed_seconds": int((datetime.utcnow() - start_ts).total_seconds()),
+    }
+
+
+def timer_state(session: Session, user_id: int) -> Dict:
+    return timer_payload(session.exec(running_timer_stmt(user_id)).first())
+
+
+def entry_event(entry: TimeEntry) -> Dict:
+    return {
+        "id": entry.id,
+        "date": entry.date.isoformat(),
+        "duration_minutes": entry.duration_minutes,
+        "notes": entry.notes,
+        "issue_id": entry.issue_id,
+        "project_id": entry.project_id,
+    }
 
 
 @api.get("/timer/status")
-def timer_status(request: Request):
-    user = current_user(request)
-    with get_session() as session:
-        timer = session.exec(
-            select(Timer).where(Timer.user_id == user.id, Timer.running)
-        ).first()
-        if not timer:
-            return {"running": False}
-        issue = session.get(Issue, timer.issue_id)
-        elapsed = int((datetime.utcnow() - timer.start_ts).total_seconds())
-        return {
-            "running": True,
-            "issue_id": issue.id,
-            "issue_title": issue.title,
-            "elapsed_seconds": elapsed,
-        }
+def timer_status(user: SessionUser = Depends(session_user), session: Session = Depends(db_session)):
+    return timer_state(session, user.id)
+
+
+@api.get("/events")
+async def event_stream(user: SessionUser = Depends(session_user)):
+    """Server-sent events for the signed-in user: `timer`, `entry` and `entry_deleted`.
+
+    The first event is the current timer state; afterwards nothing is sent until
+    the user starts/stops a timer or logs time, apart from a periodic keepalive.
+    """
+    # the stream outlives the request, so it reads the snapshot with its own short session
+    def snapshot():
+        with get_session() as session:
+            return timer_state(session, user.id)
+
+    async def stream():
+        # subscribe before reading the snapshot so no event can fall in between
+        with events.subscribe(user.id) as queue:
+            state = await run_in_threadpool(snapshot)
+            yield f"retry: {SSE_RETRY_MS}\n" + events.sse("timer", state)
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api.get("/events/stats")
+def event_stats():
+    return events.snapshot()
+
+
+def cached_response(request: Request, report, media_type: str, headers: Dict = None) -> Response:
+    headers = {
+        **(headers or {}),
+        "ETag": report.etag,
+        "Last-Modified": report.last_modified,
+        "Cache-Control": "private, no-cache",
+    }
+    inm = request.headers.get("if-none-match")
+    ims = request.headers.get("if-modified-since")
+    if inm:
+        fresh = report.etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+    elif ims:
+        try:
+            fresh = parsedate_to_datetime(report.last_modified) <= parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            fresh = False
+    else:
+        fresh = False
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return Response(report.body, media_type=media_type, headers=headers)
+
+
+def parse_week_start(week_start: Optional[str]) -> date:
+    # defaults to this week's Monday
+    if week_start:
+        return date.fromisoformat(week_start)
+    return date.today() - timedelta(days=date.today().weekday())
 
 
 @api.get("/reports/week")
 def weekly_report(
+    request: Request,
     week_start: Optional[str] = None,
     project_id: Optional[int] = None,
     user_id: Optional[int] = None,
     label: Optional[str] = None,
     assignee: Optional[str] = None,
+    session: Session = Depends(db_session),
 ):
-    ws = (
-        date.fromisoformat(week_start)
-        if week_start
-        else (date.today() - timedelta(days=date.today().weekday()))
+    ws = parse_week_start(week_start)
+    report = report_cache.get_or_render(
+        "json", ws, (project_id, user_id, label, assignee), report_cache.version(session, ws),
+        lambda: json.dumps(
+            weekly_aggregate(ws, project_id, user_id, label, assignee), ensure_ascii=False
+        ).encode("utf-8"),
     )
-    return weekly_aggregate(ws, project_id, user_id, label, assignee)
+    return cached_response(request, report, "application/json")
+
+
+@api.get("/reports/range.pdf")
+def range_report_pdf(
+    start: str,
+    end: Optional[str] = None,
+    period: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+):
+    # long ranges are not cached; rows are streamed from the DB into an in-memory PDF
+    s, e = parse_range(start, end, period)
+    buf = io.BytesIO()
+    pdf_report(buf, s, e, project_id, user_id, label, assignee)
+    size = buf.tell()
+    return StreamingResponse(
+        iter_buffer(buf),
+        media_type="application/pdf",
+        headers={
+            "Content-Length": str(size),
+            "Content-Disposition": f'attachment; filename="report-{s.isoformat()}-{(e - timedelta(days=1)).isoformat()}.pdf"',
+        },
+    )
+
+
+@api.get("/reports/batch.zip")
+def batch_report_zip(
+    start: str,
+    end: Optional[str] = None,
+    period: Optional[str] = None,
+    by: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+):
+    """A zip of weekly PDFs for [start, end], one per week (x user x project with `by`),
+    rendered in the shared process pool; manifest.json lists each PDF's render time.
+    """
+    s, e = parse_range(start, end, period)
+    try:
+        pdfs, manifest = batch_reports.render_batch(
+            s, e, batch_reports.parse_splits(by), project_id, user_id, label, assignee
+        )
+    except ValueError as err:
+        raise HTTPException(400, str(err))
+    buf = io.BytesIO()
+    batch_reports.write_zip(buf, pdfs, manifest)
+    size = buf.tell()
+    return StreamingResponse(
+        iter_buffer(buf),
+        media_type="application/zip",
+        headers={
+            "Content-Length": str(size),
+            "Content-Disposition": f'attachment; filename="reports-{s.isoformat()}-{(e - timedelta(days=1)).isoformat()}.zip"',
+        },
+    )
+
+
+@api.get("/reports/cache")
+def report_cache_stats():
+    return report_cache.snapshot()
+
+
+def parse_range(start: str, end: Optional[str], period: Optional[str]):
+    # `end` is inclusive; alternatively `period` = week|month|quarter|year from `start`
+    s = date.fromisoformat(start)
+    if end:
+        e = date.fromisoformat(end) + timedelta(days=1)
+    elif period in ("week", "month", "quarter", "year"):
+        e = period_end(s, period)
+    else:
+        raise HTTPException(400, "end or period (week|month|quarter|year) required")
+    if e <= s:
+        raise HTTPException(400, "end must not be before start")
+    return s, e
+
+
+def iter_buffer(buf, chunk_size: int = 64 * 1024):
+    buf.seek(0)
+    while chunk := buf.read(chunk_size):
+        yield chunk
+    buf.close()
+
+
+@api.get("/reports/range")
+def range_report(
+    start: str,
+    end: Optional[str] = None,
+    period: Optional[str] = None,
+    bucket: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+):
+    s, e = parse_range(start, end, period)
+    if bucket not in (None, "day", "week", "month"):
+        raise HTTPException(400, "bucket must be day, week or month")
+    return range_aggregate(s, e, bucket, project_id, user_id, label, assignee)
+
+
+@api.get("/reports/pivot")
+def pivot_report(
+    start: str,
+    end: Optional[str] = None,
+    period: Optional[str] = None,
+    rows: Optional[str] = None,
+    columns: Optional[str] = None,
+    stats: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    session: Session = Depends(db_session),
+):
+    """Entry minutes pivoted by `rows` x `columns` (user, project, issue, label, assignee,
+    day, week, month, year), each cell reporting `stats` (sum, count, mean, min, max, p1..p99).
+    """
+    s, e = parse_range(start, end, period)
+    try:
+        row_dims, col_dims, wanted = analytics.parse_spec(rows, columns, stats)
+        return analytics.pivot(session, s, e, row_dims, col_dims, wanted, project_id, user_id, label, assignee)
+    except ValueError as err:
+        raise HTTPException(400, str(err))
+
+
+@api.get("/reports/range.{fmt}")
+def export_range_report(
+    fmt: str,
+    start: str,
+    end: Optional[str] = None,
+    period: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    label: Optional[str] = None,
+    assignee: Optional[str] = None,
+    gzip: bool = False,
+):
+    """Daily per-issue totals from the rollup as CSV/NDJSON rows (project, issue, date, minutes)."""
+    s, e = parse_range(start, end, period)
+    stmt = rollup_totals_stmt(s, e, project_id, user_id, label, assignee).order_by(
+        DailyRollup.date, Project.name, Issue.title
+    )
+    filename = f"report-{s.isoformat()}-{(e - timedelta(days=1)).isoformat()}"
+    return export_response(fmt, ["project", "issue", "date", "minutes"], stmt, filename, gzip)
 
 
 @api.get("/reports/week.pdf")
 def weekly_report_pdf(
+    request: Request,
     week_start: Optional[str] = None,
     project_id: Optional[int] = None,
     user_id: Optional[int] = None,
     label: Optional[str] = None,
     assignee: Optional[str] = None,
+    session: Session = Depends(db_session),
 ):
-    ws = (
-        date.fromisoformat(week_start)
-        if week_start
-        else (date.today() - timedelta(days=date.today().weekday()))
-    )
-    fd, path = tempfile.mkstemp(suffix=".pdf")
-    os.close(fd)
-    weekly_pdf(path, ws, project_id, user_id, label, assignee)
-    return FileResponse(
-        path,
-        media_type="application/pdf",
-        filename=f"weekly-{ws.isoformat()}.pdf",
+    ws = parse_week_start(week_start)
+
+    def render():
+        buf = io.BytesIO()
+        weekly_pdf(buf, ws, project_id, user_id, label, assignee)
+        return buf.getvalue()
+
+    filters = (project_id, user_id, label, assignee)
+    report = report_cache.get_or_render("pdf", ws, filters, report_cache.version(session, ws), render)
+    return cached_response(
+        request, report, "application/pdf",
+        {"Content-Disposition": f'attachment; filename="weekly-{ws.isoformat()}.pdf"'},
     )
 
 
 @api.post("/github/refresh")
-async def github_refresh(request: Request):
-    user = request.cookies.get("user_id")
-    if not user:
-        raise HTTPException(status_code=401, detail="not authenticated")
-    # Run the import asynchronously
-    await import_all()
-    return {"ok": True, "message": "GitHub issues refreshed"}
+async def github_refresh(user: SessionUser = Depends(session_user)):
+    job = await enqueue_import(source="manual")
+    return {"ok": True, "message": "GitHub refresh started", "job_id": job.id, "status": job.status}
+
+
+@api.get("/github/jobs/{job_id}")
+def github_job(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
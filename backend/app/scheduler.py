@@ -1,8 +1,73 @@
+import asyncio
+import logging
+import os
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from .github_import import import_all
+from . import archive, jobs, leader
+
+# with webhooks delivering issue changes, the poll is only a reconciliation pass
+IMPORT_INTERVAL_SECONDS = float(os.getenv(
+    "IMPORT_INTERVAL_SECONDS", "21600" if os.getenv("GITHUB_WEBHOOK_SECRET") else "3600"
+))
+LEASE = "scheduler"
+JOB_ID = "scheduled_import"
+ARCHIVE_JOB_ID = "scheduled_archive"
 
 scheduler = AsyncIOScheduler()
+log = logging.getLogger("app.scheduler")
+_election: asyncio.Task = None
+
+async def scheduled_import():
+    # goes through the same queue as manual refreshes, so the two never overlap
+    job = await jobs.enqueue_import(source="scheduler")
+    task = jobs.task(job.id)
+    if task:
+        await asyncio.shield(task)
+
+async def scheduled_archive():
+    result = await asyncio.to_thread(archive.run, archive.due_cutoff())
+    log.info("Archive run: %s", result)
+
+def is_leader() -> bool:
+    return scheduler.get_job(JOB_ID) is not None
+
+def add_leader_jobs():
+    scheduler.add_job(scheduled_import, "interval", seconds=IMPORT_INTERVAL_SECONDS, id=JOB_ID)
+    if archive.ARCHIVE_AFTER_DAYS and archive.available():
+        scheduler.add_job(scheduled_archive, "interval", seconds=archive.ARCHIVE_INTERVAL_SECONDS, id=ARCHIVE_JOB_ID)
+
+def remove_leader_jobs():
+    for job_id in (JOB_ID, ARCHIVE_JOB_ID):
+        if scheduler.get_job(job_id):
+            scheduler.remove_job(job_id)
+
+async def elect():
+    # every worker runs this; only the lease holder has the import (and archive) job scheduled
+    while True:
+        try:
+            held = await asyncio.to_thread(leader.try_acquire, LEASE)
+        except Exception:
+            log.exception("Lease renewal failed")
+            held = False
+        if held and not is_leader():
+            log.info("%s is now the scheduler leader", leader.worker_id())
+            add_leader_jobs()
+        elif not held and is_leader():
+            log.warning("%s lost the scheduler lease", leader.worker_id())
+            remove_leader_jobs()
+        await asyncio.sleep(leader.LEADER_RENEW_SECONDS)
 
 def start_scheduler():
-    scheduler.add_job(import_all, "interval", hours=1)
+    global _election
+    if archive.ARCHIVE_AFTER_DAYS and not archive.available():
+        log.warning("ARCHIVE_AFTER_DAYS is set but pyarrow is not installed; archiving is off")
     scheduler.start()
+    _election = asyncio.get_running_loop().create_task(elect())
+
+def stop_scheduler():
+    if _election:
+        _election.cancel()
+    if is_leader():
+        remove_leader_jobs()
+        leader.release(LEASE)
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,100 @@
+# backend/app/search.py
+# Full-text search over issue titles, bodies and labels. SQLite keeps a standalone
+# FTS5 table (issue_fts, rowid = issue.id) that the GitHub importer rewrites on every
+# upsert; PostgreSQL uses the generated `issue.search_vector` tsvector column with a
+# GIN index, which the database maintains by itself. Both created by migration 0005.
+import re
+from typing import Iterable, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import func, text
+
+from .models import Issue
+
+FTS_TABLE = "issue_fts"
+# relative weight of title / body / labels matches
+SQLITE_WEIGHTS = (10.0, 1.0, 5.0)
+PG_CONFIG = "english"
+SNIPPET_START, SNIPPET_END = "<mark>", "</mark>"
+SNIPPET_TOKENS = 16
+
+_fts = sa.table(FTS_TABLE, sa.column("rowid"), sa.column("title"), sa.column("body"), sa.column("labels"))
+
+
+def label_text(labels) -> str:
+    return " ".join(l for l in (labels or []) if l)
+
+
+def index_issues(session, rows: Iterable[Tuple[int, dict]]):
+    """Rewrite the search entries of `(issue_id, issue_row)` pairs; a no-op outside SQLite."""
+    if session.get_bind().dialect.name != "sqlite":
+        return
+    rows = list(rows)
+    if not rows:
+        return
+    session.execute(
+        text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": issue_id} for issue_id, _ in rows]
+    )
+    session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, body, labels) VALUES (:id, :title, :body, :labels)"),
+        [
+            {"id": issue_id, "title": r["title"], "body": r.get("body") or "", "labels": label_text(r.get("labels"))}
+            for issue_id, r in rows
+        ],
+    )
+
+
+def rebuild(conn):
+    """Re-create every FTS5 entry from the issue table (SQLite only)."""
+    if conn.dialect.name != "sqlite":
+        return
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, body, labels) "
+        "SELECT id, title, coalesce(body, ''), "
+        "coalesce((SELECT group_concat(name, ' ') FROM issuelabel WHERE issue_id = issue.id), '') FROM issue"
+    ))
+
+
+def fts_query(q: str) -> str:
+    """User input as an FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted so FTS5 operators and punctuation in the input are taken literally.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise ValueError("empty search query")
+    return " ".join(f'"{w}"' for w in words) + "*"
+
+
+def search_stmt(dialect: str, q: str, columns, after: Optional[Tuple[float, int]] = None):
+    """(statement, count statement) for issues matching `q`, best match first.
+
+    Rows carry `rank` (ascending = better, also the first cursor key), plus
+    `title_hl` and `snippet` with matches wrapped in <mark>…</mark>. `columns`
+    are the labeled Issue columns to return.
+    """
+    if dialect == "sqlite":
+        match = sa.literal_column(FTS_TABLE).op("MATCH")(fts_query(q))
+        rank = func.bm25(sa.literal_column(FTS_TABLE), *SQLITE_WEIGHTS)
+        title_hl = func.highlight(sa.literal_column(FTS_TABLE), 0, SNIPPET_START, SNIPPET_END)
+        snippet = func.snippet(sa.literal_column(FTS_TABLE), 1, SNIPPET_START, SNIPPET_END, "…", SNIPPET_TOKENS)
+        stmt = sa.select(*columns, rank.label("rank"), title_hl.label("title_hl"), snippet.label("snippet")) \
+            .select_from(_fts).join(Issue, Issue.id == _fts.c.rowid).where(match)
+        count = sa.select(func.count()).select_from(_fts).join(Issue, Issue.id == _fts.c.rowid).where(match)
+    elif dialect == "postgresql":
+        query = func.websearch_to_tsquery(PG_CONFIG, q)
+        vector = sa.literal_column("issue.search_vector")
+        match = vector.op("@@")(query)
+        rank = -func.ts_rank_cd(vector, query)
+        options = f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords={SNIPPET_TOKENS}, MinWords=5"
+        title_hl = func.ts_headline(PG_CONFIG, Issue.title, query, f"{options}, HighlightAll=true")
+        snippet = func.ts_headline(PG_CONFIG, func.coalesce(Issue.body, ""), query, options)
+        stmt = sa.select(*columns, rank.label("rank"), title_hl.label("title_hl"), snippet.label("snippet")) \
+            .where(match)
+        count = sa.select(func.count()).select_from(Issue).where(match)
+    else:
+        raise ValueError(f"full-text search is not supported on {dialect}")
+    if after:
+        stmt = stmt.where(sa.tuple_(rank, Issue.id) > after)
+    return stmt.order_by(rank, Issue.id), count
@@ -0,0 +1,140 @@
+# backend/app/webhooks.py
+# GitHub webhook receiver: `issues` and `label` events update just the affected
+# rows through the importer's upsert path, within seconds of the change, so the
+# scheduled import is only a reconciliation pass.
+#
+# Deliveries must carry a valid X-Hub-Signature-256 for GITHUB_WEBHOOK_SECRET.
+# Each X-GitHub-Delivery id is logged in the same transaction as its changes, so
+# redeliveries are answered without touching anything twice. Deliveries can arrive
+# out of order, so an issue payload older than the stored issue is skipped. Events
+# for repos without a Project are acknowledged and ignored.
+import hashlib
+import hmac
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from . import search
+from .database import get_session
+from .github_import import bump_issues_version, upsert_issues, write_labels
+from .models import Issue, IssueLabel, Project, WebhookDelivery
+
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+WEBHOOK_LOG_DAYS = int(os.getenv("WEBHOOK_LOG_DAYS", "14"))
+# issue actions that change nothing we store, or that we keep the row for
+IGNORED_ACTIONS = {"deleted", "transferred", "pinned", "unpinned", "locked", "unlocked", "milestoned", "demilestoned"}
+
+router = APIRouter()
+log = logging.getLogger("app.webhooks")
+
+
+def verify_signature(body: bytes, signature: str, secret: str = None) -> bool:
+    secret = secret or GITHUB_WEBHOOK_SECRET
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def project_for(session, repo: str):
+    return session.exec(select(Project.id).where(Project.github_repo == repo)).first()
+
+
+def apply_issue(session, project_id: int, action: str, issue: dict) -> str:
+    if action in IGNORED_ACTIONS or "pull_request" in issue:
+        return "ignored"
+    stored = session.exec(
+        select(Issue.id, Issue.updated_at)
+        .where(Issue.project_id == project_id, Issue.github_number == issue["number"])
+    ).first()
+    # same format as GitHub sends, so the strings compare chronologically
+    if stored and stored.updated_at and issue.get("updated_at") and issue["updated_at"] < stored.updated_at:
+        return "stale"
+    upsert_issues(session, project_id, [issue], {issue["number"]: stored.id} if stored else {})
+    return "upserted"
+
+
+def apply_label(session, project_id: int, action: str, label: dict, changes: dict) -> str:
+    """Rename or drop a repo label on every issue of the project that carries it."""
+    if action == "edited":
+        old = (changes.get("name") or {}).get("from")
+        new = label["name"]
+        if not old or old == new:
+            return "ignored"
+    elif action == "deleted":
+        old, new = label["name"], None
+    else:
+        return "ignored"
+
+    issues = session.exec(
+        select(Issue.id, Issue.title, Issue.body, Issue.labels)
+        .where(Issue.project_id == project_id)
+        .where(Issue.id.in_(select(IssueLabel.issue_id).where(IssueLabel.name == old)))
+    ).all()
+    rows = []
+    for issue_id, title, body, labels in issues:
+        labels = [new if name == old else name for name in labels or [] if new or name != old]
+        labels = list(dict.fromkeys(labels))
+        rows.append((issue_id, {"title": title, "body": body, "labels": labels}))
+    if not rows:
+        return "ignored"
+    session.execute(update(Issue), [{"id": issue_id, "labels": r["labels"]} for issue_id, r in rows])
+    write_labels(session, [(issue_id, r["labels"]) for issue_id, r in rows])
+    search.index_issues(session, rows)
+    bump_issues_version(session, project_id)
+    return f"relabelled {len(rows)}"
+
+
+def handle(delivery: str, event: str, payload: dict) -> dict:
+    """Apply one verified delivery; returns what happened to it."""
+    action = payload.get("action")
+    repo = (payload.get("repository") or {}).get("full_name")
+    with get_session() as session:
+        session.add(WebhookDelivery(id=delivery, event=event, action=action, repo=repo))
+        try:
+            session.flush()
+        except IntegrityError:
+            session.rollback()
+            return {"ok": True, "delivery": delivery, "result": "duplicate"}
+
+        project_id = project_for(session, repo) if repo else None
+        if event not in ("issues", "label"):
+            result = "ignored"
+        elif project_id is None:
+            result = "untracked repo"
+        elif event == "issues":
+            result = apply_issue(session, project_id, action, payload["issue"])
+        else:
+            result = apply_label(session, project_id, action, payload["label"], payload.get("changes") or {})
+
+        session.execute(delete(WebhookDelivery).where(
+            WebhookDelivery.received_at < datetime.utcnow() - timedelta(days=WEBHOOK_LOG_DAYS)
+        ))
+        session.commit()
+    log.info("%s %s.%s for %s: %s", delivery, event, action, repo, result)
+    return {"ok": True, "delivery": delivery, "result": result}
+
+
+@router.post("/github/webhook")
+async def github_webhook(request: Request):
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(503, "GITHUB_WEBHOOK_SECRET is not configured")
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(401, "invalid signature")
+    delivery = request.headers.get("X-GitHub-Delivery")
+    event = request.headers.get("X-GitHub-Event")
+    if not delivery or not event:
+        raise HTTPException(400, "X-GitHub-Delivery and X-GitHub-Event headers required")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(400, "body must be JSON")
+    return await run_in_threadpool(handle, delivery, event, payload)
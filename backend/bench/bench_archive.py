@@ -0,0 +1,135 @@
+# backend/bench/bench_archive.py
+# Archiving old time entries to Parquet must not change what the API returns: the
+# time log (walked page by page), exports, pivots and PDF/batch rows are captured
+# before and after archive.run() and compared. The first run is made to fail after
+# writing its first file (a crash before the delete commits), so the rerun has to
+# recover without archiving anything twice. Prints DB/archive sizes and timings;
+# exits non-zero on any difference.
+#
+#   cd backend && python -m bench.bench_archive --entries 300000
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=300_000)
+parser.add_argument("--cutoff", type=date.fromisoformat, default=date(2024, 7, 15))
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/archive.db"
+os.environ["ARCHIVE_DIR"] = f"{tmp}/archive"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app import archive  # noqa: E402
+from app.batch_reports import batch_rows  # noqa: E402
+from app.database import engine, get_session  # noqa: E402
+from app.main import app  # noqa: E402
+from app.reports import entry_rows  # noqa: E402
+from .seed import seed  # noqa: E402
+
+START, END = date(2023, 1, 1), date(2025, 1, 1)
+LISTINGS = [
+    {},
+    {"project_id": 3, "fields": "id,date,duration_minutes,issue_title"},
+    {"label": "label-4", "user_id": 7},
+    {"week_start": "2024-07-08"},  # straddles the cutoff
+]
+PIVOTS = [
+    {"start": "2023-01-01", "end": "2024-12-31", "rows": "user", "columns": "month", "stats": "sum,count,p50"},
+    {"start": "2024-06-01", "period": "quarter", "rows": "label", "stats": "sum,p90", "project_id": 2},
+]
+
+
+def walk(client, params):
+    items, cursor = [], None
+    while True:
+        r = client.get("/api/time-entries", params={**params, "limit": 1000, **({"cursor": cursor} if cursor else {})})
+        r.raise_for_status()
+        body = r.json()
+        items += body["items"]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return body["total"], items
+
+
+def capture(client):
+    out = {}
+    t0 = time.perf_counter()
+    for i, params in enumerate(LISTINGS):
+        out[f"list {i}"] = walk(client, params)
+    out["list unpaginated"] = client.get("/api/time-entries", params={"user_id": 3, "paginate": "false"}).json()
+    t1 = time.perf_counter()
+    out["export csv"] = client.get("/api/time-entries/export.csv", params={"start": "2023-01-01"}).content
+    out["export ndjson"] = client.get("/api/time-entries/export.ndjson",
+                                      params={"label": "label-2", "start": "2024-03-01", "end": "2024-09-30"}).content
+    t2 = time.perf_counter()
+    for i, params in enumerate(PIVOTS):
+        out[f"pivot {i}"] = client.get("/api/reports/pivot", params=params).json()
+    t3 = time.perf_counter()
+    with get_session() as session:
+        out["pdf rows"] = [tuple(r) for r in entry_rows(session, START, END, user_id=5)]
+        out["batch rows"] = [tuple(r) for r in batch_rows(session, date(2024, 5, 1), date(2024, 9, 1), project_id=4)]
+    t4 = time.perf_counter()
+    print(f"  listings {t1 - t0:6.2f}s  exports {t2 - t1:6.2f}s  pivots {t3 - t2:6.2f}s  pdf rows {t4 - t3:6.2f}s")
+    return out
+
+
+def sizes():
+    con = sqlite3.connect(f"{tmp}/archive.db")
+    con.execute("VACUUM")
+    hot = con.execute("SELECT count(*) FROM timeentry").fetchone()[0]
+    con.close()
+    parquet = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(archive.ARCHIVE_DIR) for f in fs)
+    db = os.path.getsize(f"{tmp}/archive.db")
+    print(f"  hot entries {hot:>8}  db {db / 2**20:7.1f} MiB  archive {parquet / 2**20:7.1f} MiB")
+
+
+def crash_once():
+    # raise right after the first month's file is in place, before its delete commits
+    write = archive._write
+
+    def failing(month, rows):
+        write(month, rows)
+        archive._write = write
+        raise RuntimeError("simulated crash")
+    archive._write = failing
+
+
+def main():
+    with TestClient(app) as client:
+        seed(engine, entries=args.entries, issues=5000, users=20, projects=8, start=START, days=(END - START).days)
+        print("before archiving")
+        sizes()
+        before = capture(client)
+
+        crash_once()
+        try:
+            archive.run(args.cutoff)
+        except RuntimeError:
+            pass
+        t0 = time.perf_counter()
+        result = archive.run(args.cutoff)
+        print(f"archive.run({args.cutoff}) {result}  ({time.perf_counter() - t0:.2f}s)")
+        again = archive.run(args.cutoff)
+        sizes()
+        print("after archiving")
+        after = capture(client)
+
+    ok = again["archived"] == 0 and result["archived"] > 0
+    for key in before:
+        same = before[key] == after[key]
+        ok &= same
+        print(f"{key:<18} {'same' if same else 'DIFFERENT'}")
+    print("ok" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# backend/bench/bench_batch_pdf.py
+# Month-end PDF batch (every week x user) rendered with 1, 2, 4, ... worker processes.
+# The single data fetch is timed separately; speedup is the render wall time vs. 1 worker.
+#
+#   cd backend && python -m bench.bench_batch_pdf --entries 200000
+import argparse
+import os
+import tempfile
+from datetime import date
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=200_000)
+parser.add_argument("--by", default="user")
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/batch.db"
+
+from app import batch_reports  # noqa: E402
+from app.database import engine, init_db  # noqa: E402
+from .seed import seed  # noqa: E402
+
+START, END = date(2024, 1, 1), date(2024, 2, 1)
+
+
+def main():
+    init_db()
+    # the whole seed lands in the one month being reported
+    seed(engine, entries=args.entries, users=20, projects=10, start=START, days=(END - START).days)
+    splits = batch_reports.parse_splits(args.by)
+
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    counts.append(os.cpu_count() or 1)
+
+    base = None
+    for workers in counts:
+        # a warm pool: spawning the workers is not part of the render time
+        batch_reports.REPORT_WORKERS = workers
+        batch_reports.shutdown_pool()
+        if workers > 1:
+            list(batch_reports.get_pool().map(abs, range(workers)))
+        pdfs, manifest = batch_reports.render_batch(START, END, splits, workers=workers)
+        wall = manifest["render_seconds"]
+        cpu = sum(p["render_seconds"] for p in manifest["pdfs"])
+        base = base or wall
+        print(f"workers={workers:<3} pdfs={len(pdfs):<5} fetch={manifest['fetch_seconds']:6.2f}s  "
+              f"render={wall:6.2f}s wall / {cpu:6.2f}s summed  speedup x{base / wall:.2f}")
+    batch_reports.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
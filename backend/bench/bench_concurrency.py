@@ -0,0 +1,142 @@
+# backend/bench/bench_concurrency.py
+# Mixed read/write load against the API at N parallel clients: uncached range
+# reports and time-log pages (reads) interleaved with new time entries (writes).
+# Runs the same workload against SQLite with library defaults (rollback journal,
+# synchronous=FULL, 5+10 pool), with the engine settings from app/database.py, and
+# with those settings on the async (aiosqlite) handlers.
+#
+#   cd backend && python -m bench.bench_concurrency --clients 64 --duration 20
+#   cd backend && python -m bench.bench_concurrency --clients 512 --configs tuned,async
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--clients", type=int, default=64)
+parser.add_argument("--duration", type=float, default=20.0)
+parser.add_argument("--entries", type=int, default=100_000)
+parser.add_argument("--write-ratio", type=float, default=0.3)
+parser.add_argument("--port", type=int, default=8767)
+parser.add_argument("--configs", default="defaults,tuned,tuned-p5,async")
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+TEMPLATE = f"{tmp}/template.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{TEMPLATE}"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+# seed a rollback-journal file so every run starts from the same single-file copy
+os.environ["SQLITE_JOURNAL_MODE"] = "DELETE"
+
+import httpx  # noqa: E402
+from app.auth import SESSION_COOKIE, issue_token  # noqa: E402
+from app.database import engine, init_db  # noqa: E402
+from app.models import User  # noqa: E402
+from .seed import seed  # noqa: E402
+from .server import api_server  # noqa: E402
+
+USERS, ISSUES, START, DAYS = 20, 2000, date(2024, 1, 1), 365
+
+CONFIGS = {
+    "defaults": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT_MS": "5000",
+        "SQLITE_MMAP_SIZE": "0",
+        "DB_POOL_SIZE": "5",
+        "DB_MAX_OVERFLOW": "10",
+    },
+    "tuned": {"SQLITE_JOURNAL_MODE": "WAL"},
+    "tuned-p5": {"SQLITE_JOURNAL_MODE": "WAL", "DB_POOL_SIZE": "5", "DB_MAX_OVERFLOW": "0"},
+    "async": {"SQLITE_JOURNAL_MODE": "WAL", "ASYNC_DB": "1"},
+}
+
+
+def token(uid: int) -> str:
+    return issue_token(User(id=uid, username=f"user{uid}", email=""))
+
+
+async def client_loop(client, base, rnd, stop, latencies, errors):
+    uid = rnd.randint(1, USERS)
+    cookies = {SESSION_COOKIE: token(uid)}
+    while not stop.is_set():
+        day = START + timedelta(days=rnd.randrange(DAYS))
+        if rnd.random() < args.write_ratio:
+            kind = "write"
+            req = client.post(
+                f"{base}/api/issues/{rnd.randint(1, ISSUES)}/time-entries",
+                cookies=cookies, json={"duration_minutes": rnd.randint(5, 120), "date": day.isoformat()},
+            )
+        elif rnd.random() < 0.5:
+            kind = "report"
+            req = client.get(f"{base}/api/reports/range", params={
+                "start": day.replace(day=1).isoformat(), "period": "month",
+                "bucket": "day", "user_id": rnd.randint(1, USERS),
+            })
+        else:
+            kind = "timelog"
+            req = client.get(f"{base}/api/time-entries", params={
+                "week_start": (day - timedelta(days=day.weekday())).isoformat(),
+                "user_id": rnd.randint(1, USERS),
+            })
+        t0 = time.perf_counter()
+        try:
+            r = await req
+            ok = r.status_code < 400
+            detail = r.text[:80]
+        except httpx.HTTPError as e:
+            ok, detail = False, repr(e)
+        latencies[kind].append(time.perf_counter() - t0)
+        if not ok:
+            errors[kind].append(detail)
+
+
+async def run(base: str):
+    latencies, errors = defaultdict(list), defaultdict(list)
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        tasks = [
+            asyncio.create_task(client_loop(client, base, random.Random(i), stop, latencies, errors))
+            for i in range(args.clients)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return latencies, errors
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+
+def main():
+    init_db()
+    seed(engine, entries=args.entries, issues=ISSUES, users=USERS, projects=10, start=START, days=DAYS)
+    engine.dispose()
+
+    for name in args.configs.split(","):
+        env = CONFIGS[name]
+        db = f"{tmp}/{name}.db"
+        shutil.copy(TEMPLATE, db)
+        env = {**env, "DATABASE_URL": f"sqlite:///{db}"}
+        with api_server(args.port, env) as base:
+            latencies, errors = asyncio.run(run(base))
+        total = sum(len(v) for v in latencies.values())
+        print(f"{name:<9} clients={args.clients} ops={total / args.duration:7.1f}/s  errors={sum(len(v) for v in errors.values())}")
+        for kind in ("report", "timelog", "write"):
+            print(f"  {kind:<8} n={len(latencies[kind]):<6} p50={pct(latencies[kind], 0.5):7.1f}ms  "
+                  f"p95={pct(latencies[kind], 0.95):7.1f}ms  errors={len(errors[kind])}")
+        sample = next((e[0] for e in errors.values() if e), None)
+        if sample:
+            print(f"  first error: {sample}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# backend/bench/bench_export.py
+# Peak Python memory and throughput of the streaming time-entry export at growing
+# sizes, against building the same CSV from a materialized .all() list. The
+# streamed peak should stay flat as the row count grows.
+#
+#   cd backend && python -m bench.bench_export --entries 400000
+import argparse
+import csv
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=400_000)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/export.db"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+
+from app import export  # noqa: E402
+from app.database import engine, get_session, init_db  # noqa: E402
+from app.routers import time_entries_query  # noqa: E402
+from .seed import seed  # noqa: E402
+
+START, DAYS = date(2023, 1, 1), 730
+
+
+def query(days):
+    names, stmt, _ = time_entries_query(None, None, None, None, None, None, None, START, START + days)
+    return names, stmt
+
+
+def materialized(days, gzip):
+    names, stmt = query(days)
+    with get_session() as session:
+        rows = session.exec(stmt).all()
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(names)
+    writer.writerows([[v.isoformat() if isinstance(v, date) else v for v in row[:len(names)]] for row in rows])
+    return len(out.getvalue().encode())
+
+
+def streamed(days, gzip):
+    names, stmt = query(days)
+    return sum(len(b) for b in export.blocks(export.csv_lines(names, export.stream_rows(stmt)), gzip))
+
+
+def measure(name, fn, days, gzip=False):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    size = fn(days, gzip)
+    dt = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<14} days={days.days:<4} peak={peak / 2**20:7.1f} MiB  time={dt:6.2f}s  "
+          f"out={size / 2**20:6.1f} MiB")
+
+
+init_db()
+seed(engine, entries=args.entries, start=START, days=DAYS)
+for days in (DAYS // 8, DAYS // 2, DAYS):
+    span = date.fromordinal(START.toordinal() + days) - START
+    measure("materialized", materialized, span)
+    measure("streamed", streamed, span)
+    measure("streamed+gzip", streamed, span, gzip=True)
@@ -0,0 +1,47 @@
+# backend/bench/bench_import.py
+# Full import vs. no-change incremental refresh against the fake GitHub server.
+#
+#   cd backend && python -m bench.bench_import --issues 10000
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--issues", type=int, default=10000)
+parser.add_argument("--port", type=int, default=8765)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{args.port}"
+
+from sqlmodel import delete  # noqa: E402
+from app.database import init_db, get_session  # noqa: E402
+from app.models import RepoSyncState  # noqa: E402
+from app.github_import import import_repo  # noqa: E402
+from .fake_github import FakeGitHub, make_issues  # noqa: E402
+
+REPO = "fake/repo"
+
+
+def run(gh, label):
+    gh.reset_counters()
+    t0 = time.perf_counter()
+    stats = asyncio.run(import_repo(REPO))
+    dt = time.perf_counter() - t0
+    rate = f"upsert={stats['issues_per_sec']:.0f} issues/s" if not stats.get("unchanged") else "upsert=-"
+    print(f"{label:<32} requests={gh.requests:<5} 304s={gh.app.state.not_modified:<5} wall={dt:.2f}s {rate}")
+
+
+init_db()
+with FakeGitHub({REPO: make_issues(args.issues)}, port=args.port) as gh:
+    run(gh, "initial full import")
+    # what every refresh used to cost: no cursor, walk and rewrite everything
+    with get_session() as session:
+        session.exec(delete(RepoSyncState))
+        session.commit()
+    run(gh, "full re-import (old behaviour)")
+    run(gh, "first incremental refresh")
+    run(gh, "no-change refresh")
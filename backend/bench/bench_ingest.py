@@ -0,0 +1,98 @@
+# backend/bench/bench_ingest.py
+# Historical timesheet import rates: one POST per entry vs. /time-entries/batch vs.
+# a streamed CSV upload to /time-entries/import, against a uvicorn subprocess.
+#
+#   cd backend && python -m bench.bench_ingest --entries 200000
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=200_000)
+parser.add_argument("--single", type=int, default=2000, help="entries sent one POST at a time")
+parser.add_argument("--batch-size", type=int, default=5000)
+parser.add_argument("--port", type=int, default=8768)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/ingest.db"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from app.auth import SESSION_COOKIE, issue_token  # noqa: E402
+from app.database import engine, init_db  # noqa: E402
+from app.models import User  # noqa: E402
+from .seed import seed  # noqa: E402
+from .server import api_server  # noqa: E402
+
+ISSUES = 5000
+rnd = random.Random(7)
+
+
+def rows(n):
+    for _ in range(n):
+        yield {
+            "issue_id": rnd.randint(1, ISSUES),
+            "duration_minutes": rnd.randint(5, 240),
+            "date": (date(2020, 1, 1) + timedelta(days=rnd.randrange(1500))).isoformat(),
+            "notes": "imported",
+        }
+
+
+def csv_body(n, block=64 * 1024):
+    # sent in 64 KiB blocks, like a file upload
+    buf = ["issue_id,duration_minutes,date,notes\n"]
+    size = 0
+    for r in rows(n):
+        line = f"{r['issue_id']},{r['duration_minutes']},{r['date']},{r['notes']}\n"
+        buf.append(line)
+        size += len(line)
+        if size >= block:
+            yield "".join(buf).encode()
+            buf, size = [], 0
+    yield "".join(buf).encode()
+
+
+def report(label, n, dt):
+    print(f"{label:<26} entries={n:<8} {dt:8.2f}s  {n / dt:10.0f} entries/s")
+
+
+def main():
+    init_db()
+    seed(engine, entries=0, issues=ISSUES, users=5, projects=10)
+    cookies = {SESSION_COOKIE: issue_token(User(id=1, username="user1", email=""))}
+
+    with api_server(args.port) as base, httpx.Client(base_url=base, cookies=cookies, timeout=600) as client:
+        t0 = time.perf_counter()
+        for r in rows(args.single):
+            client.post(f"/api/issues/{r.pop('issue_id')}/time-entries", json=r).raise_for_status()
+        report("single POST", args.single, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        done = 0
+        while done < args.entries:
+            n = min(args.batch_size, args.entries - done)
+            r = client.post("/api/time-entries/batch", json=list(rows(n)))
+            r.raise_for_status()
+            assert r.json()["error_count"] == 0, r.json()["errors"][:3]
+            done += n
+        report(f"batch ({args.batch_size}/request)", done, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        r = client.post("/api/time-entries/import", content=csv_body(args.entries),
+                        headers={"content-type": "text/csv"})
+        r.raise_for_status()
+        report("streamed CSV upload", r.json()["inserted"], time.perf_counter() - t0)
+
+    with engine.connect() as conn:
+        entries = conn.execute(text("SELECT SUM(duration_minutes) FROM timeentry")).scalar()
+        rolled = conn.execute(text("SELECT SUM(minutes) FROM dailyrollup")).scalar()
+    print(f"rollup consistent: {entries == rolled}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# backend/bench/bench_issue_snapshot.py
+# /api/issues as the backlog calls it: a query per request vs. the in-memory issue
+# snapshot, and the snapshot answering a revalidation with 304.
+#
+#   cd backend && python -m bench.bench_issue_snapshot --issues 20000
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--issues", type=int, default=20_000)
+parser.add_argument("--requests", type=int, default=200)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/snapshot.db"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app import routers  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from .seed import seed  # noqa: E402
+
+FIELDS = "id,github_number,title,url,state,assignee,labels"
+QUERIES = [
+    {"fields": FIELDS, "project_id": 1},
+    {"fields": FIELDS, "project_id": 1, "label": "label-3"},
+    {"fields": FIELDS, "project_id": 2, "assignee": "user1", "state": "open"},
+    {"fields": FIELDS, "label": "label-7", "limit": 500},
+]
+
+
+def run(client, label, snapshot: bool, revalidate: bool = False):
+    routers.ISSUE_SNAPSHOT = snapshot
+    etags = {}
+    for i, q in enumerate(QUERIES):
+        etags[i] = client.get("/api/issues", params=q).headers.get("etag")
+    t0 = time.perf_counter()
+    for n in range(args.requests):
+        i = n % len(QUERIES)
+        headers = {"If-None-Match": etags[i]} if revalidate and etags[i] else {}
+        r = client.get("/api/issues", params=QUERIES[i], headers=headers)
+        assert r.status_code == (304 if revalidate else 200), r.status_code
+    dt = time.perf_counter() - t0
+    print(f"{label:<22} {dt / args.requests * 1000:7.2f} ms/request")
+
+
+def main():
+    with TestClient(app) as client:
+        seed(engine, entries=1000, issues=args.issues, users=20, projects=5, start=date(2024, 1, 1), days=90)
+        run(client, "query per request", snapshot=False)
+        run(client, "snapshot", snapshot=True)
+        run(client, "snapshot, 304", snapshot=True, revalidate=True)
+
+
+if __name__ == "__main__":
+    main()
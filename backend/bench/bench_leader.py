@@ -0,0 +1,89 @@
+# backend/bench/bench_leader.py
+# Scheduled imports under `uvicorn --workers N`: only the lease holder may import,
+# so the fake GitHub must see one import per interval rather than N. The leader is
+# then SIGKILLed and another worker has to take over within the lease time.
+# Exits non-zero if either check fails.
+#
+#   cd backend && python -m bench.bench_leader --workers 4
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--interval", type=float, default=2.0)
+parser.add_argument("--intervals", type=int, default=5, help="intervals observed per phase")
+parser.add_argument("--port", type=int, default=8770)
+parser.add_argument("--github-port", type=int, default=8771)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+env = {
+    **os.environ,
+    "DATABASE_URL": f"sqlite:///{tmp}/leader.db",
+    "GITHUB_API_URL": f"http://127.0.0.1:{args.github_port}",
+    "IMPORT_INTERVAL_SECONDS": str(args.interval),
+    "LEADER_RENEW_SECONDS": str(args.interval / 4),
+    "LEADER_LEASE_SECONDS": str(args.interval),
+    "WEB_CONCURRENCY": str(args.workers),
+    "LOG_LEVEL": "WARNING",
+}
+os.environ.update(env)
+
+from sqlmodel import select  # noqa: E402
+from app.database import get_session  # noqa: E402
+from app.github_import import DEFAULT_REPOS  # noqa: E402
+from app.models import Lease  # noqa: E402
+from app.scheduler import LEASE  # noqa: E402
+from .fake_github import FakeGitHub  # noqa: E402
+
+
+def holder():
+    with get_session() as session:
+        lease = session.exec(select(Lease).where(Lease.name == LEASE)).first()
+        return lease.holder if lease and lease.expires_at > time.time() else None
+
+
+def observe(gh, label: str) -> bool:
+    gh.reset_counters()
+    window = args.interval * args.intervals
+    time.sleep(window)
+    imports = gh.app.state.listings / len(DEFAULT_REPOS)
+    # the window may catch one run more or less depending on where the timer is
+    ok = args.intervals - 1 <= imports <= args.intervals + 1
+    print(f"{label:<22} {imports:4.0f} imports in {window:.0f}s "
+          f"(expected ~{args.intervals}, {args.workers} workers)  leader={holder()}  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    subprocess.run([sys.executable, "-m", "app.database"], env=env, check=True)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        with FakeGitHub({}, port=args.github_port) as gh:
+            while holder() is None:
+                time.sleep(0.1)
+            results = [observe(gh, "steady state")]
+
+            pid = int(holder().split(":")[1])
+            os.kill(pid, signal.SIGKILL)
+            print(f"killed leader pid {pid}")
+            # the lease has to run out before anyone else may take it
+            time.sleep(args.interval * 1.5)
+            results.append(observe(gh, "after failover"))
+    finally:
+        server.terminate()
+        server.wait()
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# backend/bench/bench_pdf_memory.py
+# Peak Python memory for a year-long PDF report: materialized ORM rows vs. the
+# column-projected, yield_per-streamed renderer in reports.pdf_report.
+#
+#   cd backend && python -m bench.bench_pdf_memory --entries 100000
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=100_000)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/pdf.db"
+
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.units import cm  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+from sqlmodel import select  # noqa: E402
+from app.database import engine, get_session, init_db  # noqa: E402
+from app.models import Issue, Project, TimeEntry, User  # noqa: E402
+from app.reports import pdf_report  # noqa: E402
+from .seed import seed  # noqa: E402
+
+START, END = date(2024, 1, 1), date(2025, 1, 1)
+
+
+def materialized(out):
+    # the pre-streaming implementation: full ORM objects, fetched with .all()
+    with get_session() as session:
+        rows = session.exec(
+            select(TimeEntry, Issue.title, User.username, Project.name)
+            .where(TimeEntry.issue_id == Issue.id)
+            .where(TimeEntry.user_id == User.id)
+            .where(TimeEntry.project_id == Project.id)
+            .where(TimeEntry.date >= START, TimeEntry.date < END)
+        ).all()
+        c = canvas.Canvas(out, pagesize=A4)
+        y = A4[1] - 2 * cm
+        for (te, title, username, project_name) in rows:
+            if y < 2 * cm:
+                c.showPage()
+                y = A4[1] - 2 * cm
+            c.drawString(2 * cm, y, te.date.isoformat())
+            c.drawString(5 * cm, y, username[:20])
+            c.drawString(9 * cm, y, project_name[:20])
+            c.drawString(13 * cm, y, (title or '')[:30])
+            c.drawRightString(19.5 * cm, y, str(te.duration_minutes))
+            y -= 0.3 * cm
+        c.save()
+
+
+def streamed(out):
+    pdf_report(out, START, END)
+
+
+def measure(name, fn):
+    buf = io.BytesIO()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(buf)
+    dt = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<14} peak={peak / 2**20:7.1f} MiB  time={dt:6.2f}s  pdf={buf.tell() / 2**20:6.1f} MiB")
+
+
+init_db()
+seed(engine, entries=args.entries, start=START, days=(END - START).days)
+measure("materialized", materialized)
+measure("streamed", streamed)
@@ -0,0 +1,76 @@
+# backend/bench/bench_pivot.py
+# /reports/pivot engines on a year of time entries: the NumPy path vs. the plain
+# dict/list loops used when NumPy is not installed (the weekly_aggregate style).
+# Loading the columns from the DB is timed separately from the pivot itself.
+#
+#   cd backend && python -m bench.bench_pivot --entries 1000000
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=1_000_000)
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/pivot.db"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+
+from app import analytics  # noqa: E402
+from app.database import engine, get_session, init_db  # noqa: E402
+from .seed import seed  # noqa: E402
+
+START, END = date(2024, 1, 1), date(2025, 1, 1)
+SPECS = [
+    ("user", "month", "sum,count"),
+    ("project,user", "week", "sum,count,mean"),
+    ("label", "month", "sum,p50,p90,p99"),
+    ("assignee", "", "sum,count,min,max,p95"),
+    ("issue", "", "sum,p90"),
+]
+numpy = analytics.np
+
+
+def best(fn):
+    times = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main():
+    if numpy is None:
+        raise SystemExit("numpy is not installed; pip install numpy")
+    init_db()
+    seed(engine, entries=args.entries, issues=20_000, users=50, projects=20, start=START, days=365)
+
+    with get_session() as session:
+        for name, np_module in (("numpy", numpy), ("python", None)):
+            analytics.np = np_module
+            dt, data = best(lambda: analytics.load_entries(session, START, END))
+            print(f"load   {name:<7} rows={len(data):<8} {dt:7.2f}s")
+        analytics.np = numpy
+
+        for rows, columns, stats in SPECS:
+            row_dims, col_dims, wanted = analytics.parse_spec(rows, columns, stats)
+            lookups = analytics.Lookups(session, row_dims + col_dims)
+            timings = {}
+            for name, np_module in (("numpy", numpy), ("python", None)):
+                analytics.np = np_module
+                data = analytics.load_entries(session, START, END)
+                fn = analytics._numpy_pivot if np_module else analytics._python_pivot
+                timings[name], result = best(lambda: fn(data, lookups, row_dims, col_dims, wanted))
+            analytics.np = numpy
+            cells = len(result["row_keys"]) * len(result["column_keys"])
+            print(f"pivot  rows={rows or '-':<13} cols={columns or '-':<6} stats={stats:<22} cells={cells:<6} "
+                  f"numpy={timings['numpy'] * 1000:8.1f}ms  python={timings['python'] * 1000:8.1f}ms  "
+                  f"x{timings['python'] / timings['numpy']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# backend/bench/bench_search.py
+# Issue search on a large backlog: downloading every issue with its body and
+# filtering client-side (what the backlog had to do before /issues/search) vs. one
+# ranked, paginated request to the FTS-backed /issues/search.
+#
+#   cd backend && python -m bench.bench_search --issues 100000
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--issues", type=int, default=100_000)
+parser.add_argument("--body-words", type=int, default=80)
+parser.add_argument("--queries", type=int, default=20)
+parser.add_argument("--port", type=int, default=8769)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/search.db"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+
+import httpx  # noqa: E402
+from app.database import engine, init_db  # noqa: E402
+from .seed import seed, vocabulary  # noqa: E402
+from .server import api_server  # noqa: E402
+
+
+def client_side(client, words):
+    t0 = time.perf_counter()
+    r = client.get("/api/issues", params={"paginate": "false"})
+    issues = r.json()
+    hits = [
+        i for i in issues
+        if all(w in f"{i['title']} {i['body'] or ''} {' '.join(i['labels'] or [])}".lower() for w in words)
+    ]
+    return time.perf_counter() - t0, len(r.content), len(hits)
+
+
+def server_side(client, words):
+    t0 = time.perf_counter()
+    r = client.get("/api/issues/search", params={
+        "q": " ".join(words), "limit": 50, "fields": "id,github_number,title,url,state,assignee,labels",
+    })
+    r.raise_for_status()
+    return time.perf_counter() - t0, len(r.content), r.json()["total"]
+
+
+def report(label, results):
+    times = [t for t, _, _ in results]
+    size = statistics.mean(b for _, b, _ in results)
+    print(f"{label:<22} p50={statistics.median(times) * 1000:8.1f}ms  max={max(times) * 1000:8.1f}ms  "
+          f"response={size / 2**20:7.2f} MiB")
+
+
+def main():
+    init_db()
+    t0 = time.perf_counter()
+    seed(engine, entries=0, issues=args.issues, body_words=args.body_words)
+    print(f"seeded {args.issues} issues ({args.body_words} body words) and FTS index in {time.perf_counter() - t0:.1f}s")
+
+    # the seed's vocabulary, sampled from common, mid and rare words
+    words = vocabulary(5000, random.Random(42))
+    rnd = random.Random(1)
+    queries = [[rnd.choice(words[lo:hi]) for _ in range(n)]
+               for lo, hi, n in ((0, 50, 2), (50, 500, 1), (500, 5000, 1)) for _ in range(args.queries // 3)]
+
+    with api_server(args.port) as base, httpx.Client(base_url=base, timeout=600) as client:
+        server = [server_side(client, q) for q in queries]
+        # the full download is the same for every query, a few runs are enough
+        local = [client_side(client, q) for q in queries[::max(1, len(queries) // 3)]]
+    report("list + client filter", local)
+    report("/issues/search", server)
+    print(f"matches per query: median {statistics.median(n for _, _, n in server):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# backend/bench/bench_timer_events.py
+# N browser tabs watching their timer: polling /api/timer/status vs. one /api/events
+# stream each. The API runs as a separate uvicorn process so its CPU time can be
+# measured on its own; the same start/stop traffic is driven in both modes.
+#
+#   cd backend && python -m bench.bench_timer_events --clients 500 --duration 30
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--clients", type=int, default=500)
+parser.add_argument("--users", type=int, default=50)
+parser.add_argument("--duration", type=float, default=30.0)
+parser.add_argument("--poll-interval", type=float, default=5.0)
+parser.add_argument("--port", type=int, default=8766)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/events.db"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+
+import httpx  # noqa: E402
+from app.auth import SESSION_COOKIE, issue_token  # noqa: E402
+from app.database import engine, init_db  # noqa: E402
+from app.models import User  # noqa: E402
+from .seed import seed  # noqa: E402
+from .server import api_server  # noqa: E402
+
+BASE = f"http://127.0.0.1:{args.port}"
+
+
+def cookies(i: int) -> dict:
+    uid = i % args.users + 1
+    return {SESSION_COOKIE: issue_token(User(id=uid, username=f"user{uid}", email=""))}
+
+
+async def drive(client: httpx.AsyncClient, stop: asyncio.Event, counts: dict):
+    # one user toggles a timer every second, in both modes
+    n = 0
+    while not stop.is_set():
+        c = cookies(n)
+        await client.post(f"{BASE}/api/issues/{n % 10 + 1}/timer/start", cookies=c)
+        await client.post(f"{BASE}/api/timer/stop", cookies=c, json={})
+        counts["requests"] += 2
+        n += 1
+        await asyncio.sleep(1)
+
+
+async def poller(client, i, stop, counts, latencies):
+    # stagger first polls so the load is spread over the interval
+    await asyncio.sleep(args.poll_interval * i / args.clients)
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await client.get(f"{BASE}/api/timer/status", cookies=cookies(i))
+        latencies.append(time.perf_counter() - t0)
+        counts["requests"] += 1
+        await asyncio.sleep(args.poll_interval)
+
+
+async def listener(client, i, stop, counts, connected):
+    async with client.stream("GET", f"{BASE}/api/events", cookies=cookies(i)) as r:
+        counts["requests"] += 1
+        connected.append(i)
+        async for line in r.aiter_lines():
+            if line.startswith("event:"):
+                counts["events"] += 1
+            if stop.is_set():
+                break
+
+
+async def run(mode: str) -> dict:
+    counts = {"requests": 0, "events": 0}
+    latencies, connected = [], []
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        if mode == "poll":
+            tasks = [asyncio.create_task(poller(client, i, stop, counts, latencies)) for i in range(args.clients)]
+        else:
+            tasks = [asyncio.create_task(listener(client, i, stop, counts, connected)) for i in range(args.clients)]
+            while len(connected) < args.clients:
+                await asyncio.sleep(0.1)
+        baseline = counts["requests"]
+        driver = asyncio.create_task(drive(client, stop, counts))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await driver
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    counts["steady_requests"] = counts["requests"] - baseline
+    counts["p50_ms"] = sorted(latencies)[len(latencies) // 2] * 1000 if latencies else 0.0
+    return counts
+
+
+def measure(mode: str):
+    cpu = {}
+    with api_server(args.port, cpu=cpu):
+        counts = asyncio.run(run(mode))
+    cpu = cpu["seconds"]
+    print(
+        f"{mode:<7} clients={args.clients} requests={counts['requests']:<6} "
+        f"steady={counts['steady_requests'] / args.duration:7.1f} req/s  "
+        f"events={counts['events']:<6} server_cpu={cpu:6.2f}s  poll_p50={counts['p50_ms']:.1f}ms"
+    )
+
+
+init_db()
+seed(engine, entries=1000, issues=100, users=args.users, projects=2)
+measure("poll")
+measure("stream")
@@ -0,0 +1,108 @@
+# backend/bench/explain_indexes.py
+# Seeds a SQLite database through the migrations and asserts, via EXPLAIN QUERY PLAN,
+# that every hot query is answered from an index. The report, time log, PDF and
+# timer statements come from the builders routers.py / reports.py execute.
+#
+#   cd backend && python -m bench.explain_indexes --entries 1000000
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--entries", type=int, default=1_000_000)
+parser.add_argument("--issues", type=int, default=10_000)
+parser.add_argument("--users", type=int, default=20)
+parser.add_argument("--projects", type=int, default=10)
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/explain.db"
+
+import sqlalchemy as sa  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlmodel import select  # noqa: E402
+from app.database import engine, init_db  # noqa: E402
+from app import report_cache  # noqa: E402
+from app.models import Issue, Project, User  # noqa: E402
+from app.queries import encode_cursor, issue_filters  # noqa: E402
+from app.reports import entry_rows_stmt, rollup_totals_stmt  # noqa: E402
+from app.routers import running_timer_stmt, time_entries_query  # noqa: E402
+from .seed import seed  # noqa: E402
+
+
+WEEK = date(2023, 6, 5)
+WEEK_END = WEEK + timedelta(days=7)
+
+
+def rollup(**filters):
+    return rollup_totals_stmt(WEEK, WEEK_END, **filters)
+
+
+def time_log(**filters):
+    args = {"week_start": WEEK.isoformat(), "project_id": None, "user_id": None, "label": None,
+            "assignee": None, "fields": None, "cursor": None, **filters}
+    _, stmt, _ = time_entries_query(**args)
+    return stmt.limit(101)
+
+
+def pdf_rows(**filters):
+    return entry_rows_stmt(WEEK, WEEK_END, **filters)
+
+
+# (name, statement, table that must be searched, index (name prefix) or rowid lookup it must use)
+HOT_QUERIES = [
+    ("weekly report", rollup(), "dailyrollup", "ix_dailyrollup_"),
+    ("weekly report by user", rollup(user_id=3), "dailyrollup", "ix_dailyrollup_user_date"),
+    ("weekly report by project", rollup(project_id=2), "dailyrollup", "ix_dailyrollup_project_date"),
+    ("weekly report by label", rollup(label="label-3"), "dailyrollup", "ix_dailyrollup_"),
+    ("report cache version", report_cache.version_stmt(WEEK), "reportversion", "sqlite_autoindex_reportversion_1"),
+    ("time log week", time_log(), "timeentry", "ix_timeentry_date"),
+    ("time log by user", time_log(user_id=3), "timeentry", "ix_timeentry_user_date"),
+    ("time log by project", time_log(project_id=2), "timeentry", "ix_timeentry_project_date"),
+    ("time log page after cursor", time_log(cursor=encode_cursor(WEEK, 10**9)),
+     "timeentry", "ix_timeentry_date"),
+    ("weekly pdf rows", pdf_rows(), "timeentry", "ix_timeentry_date"),
+    ("weekly pdf rows by user", pdf_rows(user_id=3), "timeentry", "ix_timeentry_user_date"),
+    ("backlog page after cursor",
+     select(Issue.id).where(Issue.project_id == 2, Issue.id > 5000).order_by(Issue.id).limit(101),
+     "issue", "INTEGER PRIMARY KEY"),
+    ("timer status", running_timer_stmt(3), "timer", "ix_timer_user_running"),
+    ("issue by github number",
+     select(Issue).where(Issue.project_id == 2, Issue.github_number == 42), "issue", "ix_issue_project_number"),
+    ("backlog by project/state",
+     select(Issue).where(Issue.project_id == 2, Issue.state == "open"), "issue", "ix_issue_project_state"),
+    ("backlog by assignee", issue_filters(select(Issue), assignee="user4"), "issue", "ix_issue_assignee"),
+    ("backlog by label", issue_filters(select(Issue), label="label-3"), "issuelabel", "ix_issuelabel_name"),
+    ("project by repo", select(Project).where(Project.github_repo == "org/p3"), "project", "ix_project_github_repo"),
+    ("login by github id", select(User).where(User.github_id == "7"), "user", "ix_user_github_id"),
+]
+
+
+def main():
+    init_db()
+    t0 = time.perf_counter()
+    seed(engine, args.entries, args.issues, args.users, args.projects)
+    print(f"seeded {args.entries} time entries in {time.perf_counter() - t0:.1f}s")
+
+    failed = 0
+    with engine.connect() as conn:
+        for name, stmt, table, index in HOT_QUERIES:
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[3] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+            ok = any(
+                p.startswith(f"SEARCH {table} ") and (f"INDEX {index}" in p or f"USING {index}" in p)
+                for p in plan
+            )
+            failed += not ok
+            t0 = time.perf_counter()
+            conn.execute(text(sql)).fetchall()
+            ms = (time.perf_counter() - t0) * 1000
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<28} {ms:8.1f}ms  " + " | ".join(plan))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/bench/fake_github.py
+# Minimal stand-in for the GitHub issues API, enough to drive github_import offline.
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+def make_issues(n: int, start: datetime = datetime(2024, 1, 1)):
+    issues = []
+    for i in range(1, n + 1):
+        issues.append({
+            "number": i,
+            "title": f"Issue {i}",
+            "body": f"Body of issue {i}\n" * 5,
+            "html_url": f"https://github.com/fake/repo/issues/{i}",
+            "state": "closed" if i % 3 == 0 else "open",
+            "labels": [{"name": f"label-{i % 7}"}, {"name": "bug" if i % 2 else "feature"}],
+            "assignee": {"login": f"user{i % 5}"} if i % 4 else None,
+            "updated_at": (start + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+    return issues
+
+
+def create_app(repos: dict, rate_limit_every: int = 0):
+    """`repos` maps "owner/name" to a list of issue dicts (see make_issues).
+
+    With `rate_limit_every=N`, every Nth request is answered with a 403
+    rate-limit response carrying `Retry-After: 1`.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.not_modified = 0
+    # page-1 requests, i.e. one per repo per import run
+    app.state.listings = 0
+
+    @app.get("/repos/{owner}/{name}/issues")
+    def issues(owner: str, name: str, request: Request,
+               page: int = 1, per_page: int = 30, since: str = None):
+        app.state.requests += 1
+        app.state.listings += page == 1
+        if rate_limit_every and app.state.requests % rate_limit_every == 0:
+            return Response(status_code=403, headers={"Retry-After": "1", "X-RateLimit-Remaining": "0"})
+        items = sorted(repos.get(f"{owner}/{name}", []), key=lambda it: it["updated_at"])
+        if since:
+            items = [it for it in items if it["updated_at"] >= since]
+        chunk = items[(page - 1) * per_page: page * per_page]
+        body = json.dumps(chunk).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        headers = {"ETag": etag, "X-RateLimit-Remaining": "4999"}
+        last = max(1, -(-len(items) // per_page))
+        if last > 1:
+            base = str(request.url.remove_query_params("page"))
+            headers["Link"] = f'<{base}&page={page + 1}>; rel="next", <{base}&page={last}>; rel="last"'
+        if request.headers.get("if-none-match") == etag:
+            app.state.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    return app
+
+
+class FakeGitHub:
+    """Runs the fake API on a background uvicorn thread for the duration of a `with` block."""
+
+    def __init__(self, repos: dict, port: int = 8765, rate_limit_every: int = 0):
+        self.app = create_app(repos, rate_limit_every)
+        self.url = f"http://127.0.0.1:{port}"
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def requests(self) -> int:
+        return self.app.state.requests
+
+    def reset_counters(self):
+        self.app.state.requests = 0
+        self.app.state.not_modified = 0
+        self.app.state.listings = 0
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
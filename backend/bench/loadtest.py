@@ -0,0 +1,299 @@
+# backend/bench/loadtest.py
+# Load test of the hot endpoints against a uvicorn subprocess: timer status, the time
+# log, the weekly report as JSON and PDF, the issue list and a GitHub import (driven
+# by bench/fake_github.py, so everything runs offline). Each scenario replays the
+# same seeded list of requests from `--clients` concurrent clients and reports p50,
+# p90 and p99 latency and throughput. Results are written as JSON with the commit,
+# database and data size, and `--compare` prints the change against an earlier run.
+#
+# Runs on a fresh temporary SQLite database by default; `--database-url` points it
+# at anything else (e.g. Postgres), which must be empty unless --fresh (drop
+# everything first) or --reuse (keep the data as it is) is given. Weekly reports
+# are measured uncached (REPORT_CACHE_SIZE=0) unless `--env` says otherwise.
+#
+#   cd backend && python -m bench.loadtest --entries 1000000
+#   cd backend && python -m bench.loadtest --database-url postgresql://bench@localhost/bench --fresh
+#   cd backend && python -m bench.loadtest --compare bench/results/<earlier run>.json
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+SCENARIOS = ["timer_status", "time_entries", "report_week_json", "report_week_pdf", "issues", "import"]
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--database-url", help="default: a new SQLite file in a temp directory")
+data = parser.add_mutually_exclusive_group()
+data.add_argument("--fresh", action="store_true", help="drop all tables of --database-url first")
+data.add_argument("--reuse", action="store_true", help="benchmark the data already in --database-url")
+parser.add_argument("--entries", type=int, default=1_000_000)
+parser.add_argument("--issues", type=int, default=20_000)
+parser.add_argument("--users", type=int, default=50)
+parser.add_argument("--projects", type=int, default=20)
+parser.add_argument("--labels", type=int, default=25)
+parser.add_argument("--labels-per-issue", type=int, default=2)
+parser.add_argument("--start", type=date.fromisoformat, default=date(2023, 1, 1))
+parser.add_argument("--days", type=int, default=2 * 365)
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+parser.add_argument("--clients", type=int, default=16)
+parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+parser.add_argument("--imports", type=int, default=10, help="measured import runs (one at a time)")
+parser.add_argument("--import-issues", type=int, default=5000, help="issues per fake GitHub repo")
+parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra server environment")
+parser.add_argument("--port", type=int, default=8790)
+parser.add_argument("--github-port", type=int, default=8791)
+parser.add_argument("--out", help="default: bench/results/<dialect>-<time>.json")
+parser.add_argument("--compare", metavar="RESULTS_JSON", help="print the change against an earlier run")
+args = parser.parse_args()
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp}/loadtest.db"
+os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{args.github_port}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ.setdefault("APP_SECRET", "bench-secret-" + "x" * 32)
+SERVER_ENV = {"REPORT_CACHE_SIZE": "0", **dict(kv.split("=", 1) for kv in args.env)}
+
+import httpx  # noqa: E402
+from alembic import command  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from app.auth import SESSION_COOKIE, issue_token  # noqa: E402
+from app.database import alembic_config, engine, init_db  # noqa: E402
+from app.github_import import DEFAULT_REPOS  # noqa: E402
+from app.models import Project, TimeEntry, User  # noqa: E402
+from .fake_github import FakeGitHub, make_issues  # noqa: E402
+from .seed import seed  # noqa: E402
+from .server import api_server  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def prepare() -> dict:
+    """Create and fill the database (or check what is there); returns the data sizes."""
+    if args.fresh:
+        cfg = alembic_config()
+        with engine.begin() as conn:
+            cfg.attributes["connection"] = conn
+            command.downgrade(cfg, "base")
+    init_db()
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(User)).scalar_one()
+    if existing and not args.reuse:
+        raise SystemExit(f"{engine.url.render_as_string()} already has data; use --fresh or --reuse")
+    if not existing:
+        t0 = time.perf_counter()
+        seed(engine, entries=args.entries, issues=args.issues, users=args.users, projects=args.projects,
+             start=args.start, days=args.days, labels=args.labels, rnd_seed=args.seed,
+             labels_per_issue=args.labels_per_issue)
+        print(f"seeded in {time.perf_counter() - t0:.1f}s")
+    engine.dispose()
+    with engine.connect() as conn:
+        count = lambda model: conn.execute(select(func.count()).select_from(model)).scalar_one()  # noqa: E731
+        first, last = conn.execute(select(func.min(TimeEntry.date), func.max(TimeEntry.date))).one()
+        return {"users": count(User), "projects": count(Project), "time_entries": count(TimeEntry),
+                "first_day": first, "last_day": last}
+
+
+def request_factory(name: str, sizes: dict):
+    """A function rnd -> (user id, path, params) for one scenario's requests."""
+    first, last = sizes["first_day"], sizes["last_day"]
+    days = (last - first).days + 1
+    users, projects = sizes["users"], sizes["projects"]
+
+    def monday(rnd):
+        day = first + timedelta(days=rnd.randrange(days))
+        return (day - timedelta(days=day.weekday())).isoformat()
+
+    def maybe(rnd, value):
+        return value if rnd.random() < 0.5 else None
+
+    def make(rnd):
+        if name == "timer_status":
+            return "/api/timer/status", {}
+        if name == "time_entries":
+            return "/api/time-entries", {
+                "week_start": monday(rnd), "user_id": maybe(rnd, rnd.randint(1, users)), "limit": 100,
+            }
+        if name in ("report_week_json", "report_week_pdf"):
+            path = "/api/reports/week" + (".pdf" if name.endswith("pdf") else "")
+            return path, {"week_start": monday(rnd), "project_id": maybe(rnd, rnd.randint(1, projects))}
+        if name == "issues":
+            return "/api/issues", {
+                "project_id": rnd.randint(1, projects),
+                "label": maybe(rnd, f"label-{rnd.randrange(args.labels)}"),
+                "fields": "id,github_number,title,state,assignee,labels",
+                "limit": 100,
+            }
+        raise ValueError(name)
+
+    def factory(rnd):
+        path, params = make(rnd)
+        return rnd.randint(1, users), path, {k: v for k, v in params.items() if v is not None}
+
+    return factory
+
+
+def summary(latencies: list, errors: int, seconds: float) -> dict:
+    ms = sorted(x * 1000 for x in latencies)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(ms) / seconds, 1) if seconds else 0.0,
+        "latency_ms": {
+            "p50": round(cuts[49], 2), "p90": round(cuts[89], 2), "p99": round(cuts[98], 2),
+            "mean": round(statistics.fmean(ms), 2), "max": round(ms[-1], 2),
+        } if ms else {},
+    }
+
+
+async def replay(client: httpx.AsyncClient, base: str, requests: list, tokens: dict):
+    """Send `requests` from args.clients concurrent clients; (latencies, errors, wall seconds)."""
+    latencies, errors = [], []
+    pending = iter(requests)
+
+    async def worker():
+        for uid, path, params in pending:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(base + path, params=params, cookies={SESSION_COOKIE: tokens[uid]})
+                ok = r.status_code == 200
+                detail = f"{r.status_code} {path}"
+            except httpx.HTTPError as e:
+                ok, detail = False, repr(e)
+            latencies.append(time.perf_counter() - t0)
+            if not ok:
+                errors.append(detail)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.clients)))
+    return latencies, errors, time.perf_counter() - t0
+
+
+async def run_import(client: httpx.AsyncClient, base: str, token: str) -> float:
+    t0 = time.perf_counter()
+    r = await client.post(f"{base}/api/github/refresh", cookies={SESSION_COOKIE: token})
+    r.raise_for_status()
+    job_id = r.json()["job_id"]
+    while True:
+        job = (await client.get(f"{base}/api/github/jobs/{job_id}")).json()
+        if job["status"] not in ("queued", "running"):
+            break
+        await asyncio.sleep(0.01)
+    if job["status"] != "done" or any(res.get("error") for res in job["results"]):
+        raise RuntimeError(f"import failed: {job}")
+    return time.perf_counter() - t0
+
+
+async def run_all(base: str, sizes: dict, scenarios: list) -> dict:
+    tokens = {uid: issue_token(User(id=uid, username=f"user{uid}", email="")) for uid in range(1, sizes["users"] + 1)}
+    results = {}
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        for name in scenarios:
+            if name == "import":
+                # the first run writes every issue, the later ones find nothing changed
+                first = await run_import(client, base, tokens[1])
+                times = [await run_import(client, base, tokens[1]) for _ in range(args.imports)]
+                results["import_initial"] = summary([first], 0, first)
+                results["import_unchanged"] = summary(times, 0, sum(times))
+            else:
+                factory = request_factory(name, sizes)
+                warm = random.Random(f"{args.seed}-{name}-warmup")
+                rnd = random.Random(f"{args.seed}-{name}")
+                await replay(client, base, [factory(warm) for _ in range(args.warmup)], tokens)
+                latencies, errors, seconds = await replay(
+                    client, base, [factory(rnd) for _ in range(args.requests)], tokens
+                )
+                results[name] = summary(latencies, len(errors), seconds)
+                if errors:
+                    results[name]["first_error"] = errors[0]
+            r = results.get(name) or results["import_unchanged"]
+            lat = r["latency_ms"]
+            print(f"{name:<17} n={r['requests']:<6} {r['throughput_rps']:8.1f} req/s  p50={lat['p50']:8.2f}ms  "
+                  f"p90={lat['p90']:8.2f}ms  p99={lat['p99']:8.2f}ms  errors={r['errors']}")
+    return results
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def compare(old: dict, new: dict):
+    print(f"\nagainst {old['meta'].get('git', {}).get('commit') or '?'} ({old['meta'].get('started_at')})")
+    print(f"{'scenario':<17} {'p50 ms':>20} {'p99 ms':>20} {'req/s':>20}")
+
+    def cell(a, b):
+        change = f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+        return f"{a:8.1f} -> {b:8.1f} {change:>5}"
+
+    for name, r in new["scenarios"].items():
+        before = old["scenarios"].get(name)
+        if not before or not r["latency_ms"] or not before["latency_ms"]:
+            continue
+        print(f"{name:<17} {cell(before['latency_ms']['p50'], r['latency_ms']['p50'])} "
+              f"{cell(before['latency_ms']['p99'], r['latency_ms']['p99'])} "
+              f"{cell(before['throughput_rps'], r['throughput_rps'])}")
+    if old["meta"].get("data") != new["meta"]["data"]:
+        print("note: the runs used different data")
+
+
+def main():
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios).difference(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenario(s): {', '.join(sorted(unknown))}; use {', '.join(SCENARIOS)}")
+    sizes = prepare()
+    meta = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": engine.dialect.name,
+        "server_env": SERVER_ENV,
+        "data": {**sizes, "first_day": sizes["first_day"].isoformat(), "last_day": sizes["last_day"].isoformat(),
+                 "issues": args.issues, "labels": args.labels, "seed": args.seed},
+        "clients": args.clients,
+        "requests": args.requests,
+        "warmup": args.warmup,
+    }
+    print(f"{meta['database']}: {sizes['time_entries']} entries, {sizes['users']} users, "
+          f"{sizes['projects']} projects; {args.clients} clients")
+
+    repos = {repo: make_issues(args.import_issues) for repo in DEFAULT_REPOS}
+    cpu = {}
+    with FakeGitHub(repos, port=args.github_port), api_server(args.port, SERVER_ENV, cpu) as base:
+        results = asyncio.run(run_all(base, sizes, scenarios))
+    meta["server_cpu_seconds"] = round(cpu.get("seconds", 0.0), 2)
+
+    run = {"meta": meta, "scenarios": results}
+    out = args.out or os.path.join(RESULTS_DIR, f"{meta['database']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"results written to {out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), run)
+    if any(r["errors"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/bench/seed.py
+# Synthetic data for benchmarks: users, projects, labelled issues and time entries,
+# written with bulk INSERTs straight through the engine (tables must already exist).
+# The same rnd_seed always gives the same rows, on SQLite and Postgres alike.
+#
+#   cd backend && DATABASE_URL=sqlite:///data/bench.db python -m bench.seed --entries 2000000
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app import search
+
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "to", "va", "sel", "dor", "pu", "ne", "gri", "fa", "sho", "tem", "qui", "bal"]
+
+
+def vocabulary(size: int, rnd: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def issue_text(rnd: random.Random, words: list, weights: list, n: int) -> str:
+    return " ".join(rnd.choices(words, weights, k=n))
+
+
+def seed(engine, entries: int = 100_000, issues: int = 10_000, users: int = 20, projects: int = 10,
+         start: date = date(2022, 1, 1), days: int = 3 * 365, labels: int = 25, rnd_seed: int = 42,
+         body_words: int = 0, labels_per_issue: int = 1):
+    """`body_words` > 0 gives issues generated titles and bodies of that many (Zipf-distributed) words."""
+    rnd = random.Random(rnd_seed)
+    words = vocabulary(5000, rnd) if body_words else []
+    weights = [1 / (i + 1) for i in range(len(words))]
+    # "user" is a reserved word in Postgres
+    user_table = engine.dialect.identifier_preparer.quote("user")
+
+    def issue_labels(i):
+        return list(dict.fromkeys(f"label-{(i + k * 7) % labels}" for k in range(labels_per_issue)))
+
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {user_table} (id, username, email, github_id, role, created_at) "
+                          "VALUES (:i, :u, :e, :g, 'user', '2022-01-01')"),
+                     [{"i": i, "u": f"user{i}", "e": f"u{i}@x", "g": str(i)} for i in range(1, users + 1)])
+        conn.execute(text("INSERT INTO project (id, name, github_repo) VALUES (:i, :n, :r)"),
+                     [{"i": i, "n": f"p{i}", "r": f"org/p{i}"} for i in range(1, projects + 1)])
+        conn.execute(text("INSERT INTO issue (id, project_id, github_number, title, body, state, assignee, labels) "
+                          "VALUES (:i, :p, :i, :t, :b, :s, :a, :l)"),
+                     [{"i": i, "p": i % projects + 1,
+                       "t": issue_text(rnd, words, weights, 6) if body_words else f"issue {i}",
+                       "b": issue_text(rnd, words, weights, body_words) if body_words else None,
+                       "s": "closed" if i % 3 else "open", "a": f"user{i % users}",
+                       "l": json.dumps(issue_labels(i))}
+                      for i in range(1, issues + 1)])
+        conn.execute(text("INSERT INTO issuelabel (issue_id, name) VALUES (:i, :n)"),
+                     [{"i": i, "n": name} for i in range(1, issues + 1) for name in issue_labels(i)])
+        search.rebuild(conn)
+        conn.execute(text("INSERT INTO timer (user_id, project_id, issue_id, start_ts, running) "
+                          "VALUES (:u, 1, 1, '2022-01-01', :r)"),
+                     [{"u": u, "r": n == 0} for u in range(1, users + 1) for n in range(50)])
+        chunk = 100_000
+        for offset in range(0, entries, chunk):
+            rows = []
+            for _ in range(min(chunk, entries - offset)):
+                issue = rnd.randint(1, issues)
+                rows.append({
+                    "u": rnd.randint(1, users), "p": issue % projects + 1, "i": issue,
+                    "d": (start + timedelta(days=rnd.randrange(days))).isoformat(),
+                    "m": rnd.randint(5, 240),
+                })
+            conn.execute(text("INSERT INTO timeentry (user_id, project_id, issue_id, date, duration_minutes, created_at) "
+                              "VALUES (:u, :p, :i, :d, :m, '2022-01-01')"), rows)
+        conn.execute(text(
+            "INSERT INTO dailyrollup (date, user_id, project_id, issue_id, minutes) "
+            "SELECT date, user_id, project_id, issue_id, SUM(duration_minutes) "
+            "FROM timeentry GROUP BY date, user_id, project_id, issue_id"
+        ))
+        if engine.dialect.name == "postgresql":
+            # the ids above were explicit, so move the sequences past them
+            for table in (user_table, "project", "issue"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+        conn.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the DATABASE_URL database with synthetic data.")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--issues", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--labels", type=int, default=25)
+    parser.add_argument("--labels-per-issue", type=int, default=2)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2022, 1, 1))
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.database import engine, init_db
+    init_db()
+    seed(engine, entries=args.entries, issues=args.issues, users=args.users, projects=args.projects,
+         start=args.start, days=args.days, labels=args.labels, rnd_seed=args.seed,
+         labels_per_issue=args.labels_per_issue)
+
+
+if __name__ == "__main__":
+    main()
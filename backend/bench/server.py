@@ -0,0 +1,36 @@
+# backend/bench/server.py
+# Runs the API in a uvicorn subprocess so a benchmark can measure it from outside.
+import contextlib
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+@contextlib.contextmanager
+def api_server(port: int, env: dict = None, cpu: dict = None):
+    """Start app.main:app on `port`; on exit stores the server's CPU seconds in cpu["seconds"]."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("server did not start")
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait()
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if cpu is not None:
+            cpu["seconds"] = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
@@ -14,15 +14,24 @@ export const api = {
     const q = new URLSearchParams(params as any).toString();
     return req(`/api/issues${q ? `?${q}` : ''}`);
   },
+  searchIssues: (params: Record<string, any> = {}) => {
+    const q = new URLSearchParams(params as any).toString();
+    return req(`/api/issues/search?${q}`);
+  },
   issue: (id: number) => req(`/api/issues/${id}`),
   startTimer: (issue_id: number) => req(`/api/issues/${issue_id}/timer/start`, { method: 'POST' }),
   stopTimer: (notes?: string) => req(`/api/timer/stop`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ notes }) }),
   timerStatus: () => req('/api/timer/status'),
+  eventsUrl: () => `${API_BASE}/api/events`,
   addTime: (issue_id: number, body: any) => req(`/api/issues/${issue_id}/time-entries`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) }),
   timeEntries: (params: Record<string, any> = {}) => {
     const q = new URLSearchParams(params as any).toString();
     return req(`/api/time-entries${q ? `?${q}` : ''}`);
   },
+  exportTimeEntriesUrl: (format: 'csv' | 'ndjson', params: Record<string, any> = {}) => {
+    const q = new URLSearchParams(params as any).toString();
+    return `${API_BASE}/api/time-entries/export.${format}${q ? `?${q}` : ''}`;
+  },
   deleteTimeEntry: (id: number) => req(`/api/time-entries/${id}`, { method: 'DELETE' }),
   reportWeek: (params: Record<string, any> = {}) => {
     const q = new URLSearchParams(params as any).toString();
@@ -32,5 +41,10 @@ export const api = {
     const q = new URLSearchParams(params as any).toString();
     return `${API_BASE}/api/reports/week.pdf${q ? `?${q}` : ''}`;
   },
-  refreshIssues: () => req('/api/github/refresh', { method: 'POST' })
+  reportBatchZipUrl: (params: Record<string, any> = {}) => {
+    const q = new URLSearchParams(params as any).toString();
+    return `${API_BASE}/api/reports/batch.zip?${q}`;
+  },
+  refreshIssues: () => req('/api/github/refresh', { method: 'POST' }),
+  githubJob: (id: string) => req(`/api/github/jobs/${id}`)
 }